@@ -0,0 +1,211 @@
+"""
+Archive sources
+Treats ZIP/TAR members as files: lists archive directories, skips resource
+forks and OS junk, and opens members as streams without extracting to disk
+
+A member is addressed by a virtual path made of the archive path followed by
+the member name, e.g. "Packs/Fall Down.zip/Stems/Bass.wav", so file records,
+pairing and the UI can treat it like any other path.
+"""
+
+import os
+import shutil
+import tarfile
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+import config
+
+
+class ArchiveError(OSError):
+    """Raised when an archive or member cannot be read"""
+
+
+def is_archive(name: Union[str, Path]) -> bool:
+    """True if the name has a supported archive extension (.zip, .tar, .tar.gz, ...)"""
+    return str(name).lower().endswith(tuple(config.SUPPORTED_ARCHIVE_FORMATS))
+
+
+def is_junk_member(member: str) -> bool:
+    """True for __MACOSX folders, ._* resource forks, .DS_Store and similar entries"""
+    parts = member.strip("/").split("/")
+    if any(part in config.JUNK_DIR_NAMES for part in parts[:-1]):
+        return True
+    name = parts[-1]
+    return name in config.JUNK_FILE_NAMES or name.startswith(tuple(config.JUNK_FILE_PREFIXES))
+
+
+def split_archive_path(path: Union[str, Path]) -> Optional[Tuple[str, str]]:
+    """
+    Split a virtual member path into (archive path, member name)
+    
+    Args:
+        path: File path, possibly pointing inside an archive
+    
+    Returns:
+        (archive path, member name with "/" separators), or None for regular paths
+    """
+    path = os.fspath(path)
+    parts = Path(path).parts
+    # Cheap name check first: most paths never touch an archive
+    if not any(is_archive(part) for part in parts[:-1]):
+        return None
+    
+    for i in range(len(parts) - 1, 0, -1):
+        if is_archive(parts[i - 1]):
+            archive = os.path.join(*parts[:i])
+            if os.path.isfile(archive):
+                return archive, "/".join(parts[i:])
+    return None
+
+
+def member_path(archive: str, member: str) -> str:
+    """Virtual path of an archive member"""
+    return os.path.join(archive, *member.split("/"))
+
+
+def list_members(archive: str) -> List[Tuple[str, int]]:
+    """
+    List the regular file members of an archive (junk entries skipped)
+    
+    ZIP files only read the central directory; TAR files read member headers.
+    
+    Args:
+        archive: Archive file path
+    
+    Returns:
+        List of (member name, uncompressed size)
+    """
+    try:
+        if zipfile.is_zipfile(archive):
+            with zipfile.ZipFile(archive) as zf:
+                members = [(info.filename, info.file_size)
+                           for info in zf.infolist() if not info.is_dir()]
+        else:
+            with tarfile.open(archive) as tf:
+                members = [(info.name, info.size) for info in tf.getmembers() if info.isfile()]
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise ArchiveError(f"Cannot read archive {archive}: {e}") from e
+    
+    return [(name, size) for name, size in members if not is_junk_member(name)]
+
+
+@contextmanager
+def open_member(archive: str, member: str) -> Iterator[BinaryIO]:
+    """
+    Open an archive member as a binary, seekable stream
+    
+    Args:
+        archive: Archive file path
+        member: Member name
+    
+    Yields:
+        File object (closed, with the archive, on exit)
+    """
+    container = None
+    try:
+        if zipfile.is_zipfile(archive):
+            container = zipfile.ZipFile(archive)
+            f = container.open(member)
+        else:
+            container = tarfile.open(archive)
+            f = container.extractfile(member)
+            if f is None:
+                raise ArchiveError(f"Not a regular file: {member}")
+    except (KeyError, zipfile.BadZipFile, tarfile.TarError, ArchiveError) as e:
+        if container is not None:
+            container.close()
+        if isinstance(e, ArchiveError):
+            raise
+        if isinstance(e, KeyError):
+            raise ArchiveError(f"Member not found in {archive}: {member}") from e
+        raise ArchiveError(f"Cannot read archive {archive}: {e}") from e
+    
+    try:
+        yield f
+    finally:
+        f.close()
+        container.close()
+
+
+@contextmanager
+def open_source(path: Union[str, Path]) -> Iterator[Union[str, BinaryIO]]:
+    """
+    Open a file or archive member for soundfile / pretty_midi
+    
+    Regular files are passed through as path strings (so readers can use
+    their native file access); archive members are streamed.
+    
+    Args:
+        path: File path or virtual member path
+    
+    Yields:
+        Path string or binary file object
+    """
+    split = split_archive_path(path)
+    if split is None:
+        yield str(path)
+    else:
+        with open_member(*split) as f:
+            yield f
+
+
+def exists(path: Union[str, Path]) -> bool:
+    """os.path.exists that also understands archive member paths"""
+    if os.path.exists(path):
+        return True
+    split = split_archive_path(path)
+    if split is None:
+        return False
+    try:
+        with open_member(*split):
+            return True
+    except ArchiveError:
+        return False
+
+
+def content_key(path: Union[str, Path]) -> Optional[Tuple[str, int, int]]:
+    """
+    (absolute path, size, mtime_ns) identifying a file's current contents
+    
+    Archive members use the archive's size and mtime. Used as a cache key, so
+    a file that is edited or replaced gets a new key.
+    
+    Args:
+        path: File or archive member path
+    
+    Returns:
+        Key tuple, or None if the file (or archive) cannot be stat'ed
+    """
+    split = split_archive_path(path)
+    try:
+        st = os.stat(split[0] if split is not None else path)
+    except OSError:
+        return None
+    return (os.path.abspath(str(path)), st.st_size, st.st_mtime_ns)
+
+
+def read_bytes(path: Union[str, Path]) -> bytes:
+    """Read a file or archive member completely"""
+    with open_source(path) as source:
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return f.read()
+        return source.read()
+
+
+def copy_file(src: Union[str, Path], dst: Union[str, Path]):
+    """
+    Copy a file or archive member to dst (shutil.copy2 for regular files)
+    
+    Args:
+        src: Source path or virtual member path
+        dst: Destination file path
+    """
+    split = split_archive_path(src)
+    if split is None:
+        shutil.copy2(src, dst)
+        return
+    with open_member(*split) as f_in, open(dst, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
@@ -0,0 +1,267 @@
+"""
+Decoded audio cache
+Process-wide LRU cache of decoded stems, so previewing, BPM detection and
+export decode each file once. Entries are keyed by (path, size, mtime,
+target rate, resampler), so edited files are decoded again. Memory use is bounded by a
+byte budget; evicted stems can spill to an on-disk .npy cache that is read
+back memory-mapped (and shared with worker processes). Mapped entries are
+paged in and out by the OS, so they do not count against the budget.
+"""
+
+import os
+import mmap
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+import config
+import archive_source
+
+
+CacheKey = Tuple[str, int, int, int, Optional[str]]  # (path, size, mtime_ns, target sample rate, resampler)
+
+
+class AudioCache:
+    """
+    Byte-budgeted LRU cache of decoded audio (AudioBuffer)
+    
+    Cached arrays are read-only views shared by every caller; copy before
+    modifying. Thread-safe.
+    """
+    
+    def __init__(
+        self,
+        max_bytes: int = config.AUDIO_CACHE_BYTES,
+        spill_dir: Optional[Union[str, Path]] = config.AUDIO_CACHE_SPILL_DIR,
+        spill_bytes: int = config.AUDIO_CACHE_SPILL_BYTES
+    ):
+        """
+        Args:
+            max_bytes: In-memory budget (0 disables the cache)
+            spill_dir: Directory for evicted stems as .npy (None = no spill)
+            spill_bytes: Disk budget of spill_dir (oldest files removed first)
+        """
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_bytes = spill_bytes
+        self._entries: "OrderedDict[CacheKey, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._mapped_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.spill_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(audio_path: Union[str, Path], target_sr: int, resampler: Optional[str] = None) -> Optional[CacheKey]:
+        """Cache key for a file (None if it cannot be stat'ed)"""
+        key = archive_source.content_key(audio_path)
+        return None if key is None else key + (int(target_sr), resampler)
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory (memory-mapped spill entries excluded)"""
+        return self._bytes
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(
+        self,
+        audio_path: Union[str, Path],
+        target_sr: int,
+        resampler: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Cached audio for a file, or None
+        
+        Args:
+            audio_path: Audio file (or ZIP/TAR member path)
+            target_sr: Sample rate the audio was decoded/resampled to
+            resampler: Backend it was resampled with (see resampling.BACKENDS)
+        
+        Returns:
+            Read-only AudioBuffer, or None on a miss
+        """
+        if self.max_bytes <= 0:
+            return None
+        key = self.make_key(audio_path, target_sr, resampler)
+        if key is None:
+            return None
+        
+        with self._lock:
+            audio_data = self._entries.get(key)
+            if audio_data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return audio_data
+        
+        audio_data = self._load_spill(key)
+        with self._lock:
+            if audio_data is None:
+                self.misses += 1
+                return None
+            self.spill_hits += 1
+        self._insert(key, audio_data)
+        return audio_data
+    
+    def put(
+        self,
+        audio_path: Union[str, Path],
+        target_sr: int,
+        audio_data: np.ndarray,
+        resampler: Optional[str] = None
+    ):
+        """
+        Cache decoded audio
+        
+        A read-only view is cached, so audio_data itself keeps its flags; it
+        shares the samples, so the caller must not modify audio_data
+        afterwards.
+        
+        Args:
+            audio_path: Audio file it was decoded from
+            target_sr: Its sample rate
+            audio_data: AudioBuffer (larger than the budget: not cached)
+            resampler: Backend it was resampled with (see resampling.BACKENDS)
+        
+        Returns:
+            The read-only view that was cached (a read-only view all the same
+            when the audio is not cached)
+        """
+        cached = audio_data.view()
+        cached.flags.writeable = False
+        if self.max_bytes <= 0 or audio_data.nbytes > self.max_bytes:
+            return cached
+        key = self.make_key(audio_path, target_sr, resampler)
+        if key is not None:
+            self._insert(key, cached)
+        return cached
+    
+    def _charge(self, audio_data: np.ndarray, sign: int):
+        """Add (sign=1) or remove (sign=-1) an entry's bytes from the RAM or mapped total"""
+        if _is_mapped(audio_data):
+            self._mapped_bytes += sign * audio_data.nbytes
+        else:
+            self._bytes += sign * audio_data.nbytes
+    
+    def _insert(self, key: CacheKey, audio_data: np.ndarray):
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._charge(old, -1)
+            self._entries[key] = audio_data
+            self._charge(audio_data, 1)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_audio = self._entries.popitem(last=False)
+                self._charge(old_audio, -1)
+                self.evictions += 1
+                evicted.append((old_key, old_audio))
+        
+        # Disk writes outside the lock
+        for old_key, old_audio in evicted:
+            self._spill(old_key, old_audio)
+    
+    def _spill_path(self, key: CacheKey) -> Optional[Path]:
+        if self.spill_dir is None:
+            return None
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return self.spill_dir / f"{digest}.npy"
+    
+    def _spill(self, key: CacheKey, audio_data: np.ndarray):
+        path = self._spill_path(key)
+        if path is None or path.exists():
+            return  # Spill disabled, or already on disk (e.g. loaded from there)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.asarray(audio_data))
+            # Source rate goes in a sidecar file (<digest>.rate)
+            path.with_suffix(".rate").write_text(str(getattr(audio_data, 'source_rate', key[3])))
+            os.replace(tmp_path, path)
+            self._prune_spill()
+        except OSError as e:
+            print(f"  ⚠ Audio cache spill failed: {e}")
+    
+    def _load_spill(self, key: CacheKey) -> Optional[np.ndarray]:
+        path = self._spill_path(key)
+        if path is None or not path.exists():
+            return None
+        from audio_processing import AudioBuffer
+        try:
+            samples = np.load(path, mmap_mode='r')
+            source_rate = int(path.with_suffix(".rate").read_text())
+            os.utime(path)  # Recently used: pruned last
+        except (OSError, ValueError):
+            return None
+        audio_data = AudioBuffer(samples, key[3], source_rate)
+        audio_data.flags.writeable = False
+        return audio_data
+    
+    def _prune_spill(self):
+        """Delete the least recently used spill files until under the disk budget"""
+        files = sorted(self.spill_dir.glob("*.npy"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.spill_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            path.with_suffix(".rate").unlink(missing_ok=True)
+    
+    def clear(self, spill: bool = False):
+        """
+        Drop every in-memory entry
+        
+        Args:
+            spill: Also delete the on-disk spill cache
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._mapped_bytes = 0
+        if spill and self.spill_dir is not None and self.spill_dir.exists():
+            for path in list(self.spill_dir.glob("*.npy")) + list(self.spill_dir.glob("*.rate")):
+                path.unlink(missing_ok=True)
+    
+    def stats(self) -> Dict[str, int]:
+        """Entry count, bytes (in RAM / memory-mapped) and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "mapped_bytes": self._mapped_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _is_mapped(audio_data: np.ndarray) -> bool:
+    """Whether an array is backed by a memory-mapped file (e.g. a spill hit)"""
+    base = audio_data
+    while base is not None:
+        if isinstance(base, (np.memmap, mmap.mmap)):
+            return True
+        base = getattr(base, 'base', None)
+    return False
+
+
+_cache: Optional[AudioCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> AudioCache:
+    """The process-wide cache (created from config on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AudioCache()
+        return _cache
@@ -3,14 +3,24 @@ Audio and MIDI processing module
 Handles waveform visualization, slicing, and alignment
 """
 
+import math
+import threading
 import numpy as np
 import librosa
 import soundfile as sf
 from pathlib import Path
-from typing import Tuple, Optional, List
+from typing import Tuple, Optional, List, Sequence, Union
 import pretty_midi
 from dataclasses import dataclass
 import config
+import archive_source
+import audio_cache
+import midi_cache
+import wav_mmap
+from midi_header import MIDIHeaderError
+from note_array import NoteArrayMIDI
+import resampling
+import pcm
 
 
 @dataclass
@@ -31,78 +41,291 @@ class MIDIInfo:
     has_tempo_map: bool
 
 
+@dataclass
+class SliceWindow:
+    """One bar window cut by AlignedSlicer.slice_windows"""
+    start_bars: float
+    end_bars: float
+    start_time: float
+    end_time: float
+    audio: np.ndarray  # View into the shared decode buffer (copy before modifying)
+    midi: Optional[NoteArrayMIDI] = None
+
+
+class AudioBuffer(np.ndarray):
+    """
+    Audio samples that carry their sample rate
+    
+    A plain ndarray everywhere it is used (slicing, NumPy, librosa, soundfile)
+    plus two attributes that survive views and arithmetic: sample_rate (rate
+    of these samples) and source_rate (rate of the file they were decoded
+    from). resample_audio / save_audio read sample_rate from the buffer, so
+    audio that is already at the target rate is never resampled again.
+    """
+    
+    def __new__(cls, data, sample_rate: int, source_rate: Optional[int] = None):
+        obj = np.asarray(data).view(cls)
+        obj.sample_rate = sample_rate
+        obj.source_rate = source_rate or sample_rate
+        return obj
+    
+    def __array_finalize__(self, obj):
+        self.sample_rate = getattr(obj, 'sample_rate', None)
+        self.source_rate = getattr(obj, 'source_rate', None)
+    
+    def __reduce__(self):
+        # Keep the rates when pickled (session state, worker processes)
+        reconstruct, args, state = super().__reduce__()
+        return reconstruct, args, (state, self.sample_rate, self.source_rate)
+    
+    def __setstate__(self, state):
+        array_state, self.sample_rate, self.source_rate = state
+        super().__setstate__(array_state)
+    
+    @property
+    def resampled(self) -> bool:
+        """True if these samples were resampled from the source file's rate"""
+        return self.source_rate != self.sample_rate
+
+
+_resample_lock = threading.Lock()
+_resample_count = 0
+
+
+def resample_count() -> int:
+    """Resample operations run in this process so far (debug counter)"""
+    return _resample_count
+
+
+def _count_resample():
+    global _resample_count
+    with _resample_lock:
+        _resample_count += 1
+
+
+def _read_frames(
+    f: sf.SoundFile,
+    frames: int,
+    arena=None,
+    sample_rate: Optional[int] = None,
+    wav: Optional[wav_mmap.WavMap] = None
+) -> np.ndarray:
+    """
+    Read float32 frames from the current position (1D for mono, like sf.read;
+    frames=-1 reads to the end)
+    
+    With an arena, samples that need no resampling are decoded straight into
+    shared memory; otherwise the arena copy is made after resampling. With a
+    memory-mapped WAV, only the pages of the range are read (same values).
+    """
+    start = f.tell()
+    remaining = max(f.frames - start, 0)
+    frames = remaining if frames < 0 else min(frames, remaining)
+    out = None
+    if arena is not None and sample_rate == config.DEFAULT_SAMPLE_RATE:
+        out = arena.empty((frames,) if f.channels == 1 else (frames, f.channels), np.float32)
+    if wav is not None:
+        return wav.read(start, start + frames, out=out)
+    return f.read(frames, dtype='float32', out=out)
+
+
+def _resample(audio_data: np.ndarray, orig_sr: int, target_sr: int, method: str) -> AudioBuffer:
+    """
+    Resample audio (every resample in this module goes through here)
+    
+    Args:
+        audio_data: Audio data (1D mono or 2D frames x channels)
+        orig_sr: Rate of audio_data
+        target_sr: Target sample rate
+        method: Resampler backend (see resampling.BACKENDS)
+    
+    Returns:
+        AudioBuffer at target_sr (source_rate carried over)
+    """
+    _count_resample()
+    source_rate = getattr(audio_data, 'source_rate', None) or orig_sr
+    # All channels in one call with the processor's backend
+    resampled = resampling.resample(np.asarray(audio_data), orig_sr, target_sr, method)
+    return AudioBuffer(resampled, target_sr, source_rate)
+
+
 class AudioProcessor:
-    """Handles audio file loading, analysis, and processing"""
+    """
+    Handles audio file loading, analysis, and processing
     
-    def __init__(self):
+    Stateless by default: loaded audio is only returned, never kept on the
+    instance, so one processor can be shared between threads and buffers are
+    freed as soon as the caller drops them. Pass retain_last=True to also keep
+    the last loaded buffer on audio_data / sample_rate / duration / channels.
+    """
+    
+    def __init__(self, retain_last: bool = False, resampler: Optional[str] = None):
+        """
+        Args:
+            retain_last: Keep the last loaded buffer on the instance
+            resampler: Backend for non-44.1kHz sources (see resampling.BACKENDS;
+                None = resampling.get_default_method(), i.e. config.RESAMPLER / --resampler)
+        """
+        if resampler is not None and resampler not in resampling.BACKENDS:
+            raise ValueError(f"Unknown resampler '{resampler}' (choose from {', '.join(resampling.BACKENDS)})")
+        self.retain_last = retain_last
+        self._resampler = resampler
         self.audio_data = None
         self.sample_rate = None
         self.duration = None
         self.channels = None
+        self._lock = threading.Lock()
+    
+    @property
+    def resampler(self) -> str:
+        """Resampler backend this processor uses"""
+        return self._resampler or resampling.get_default_method()
+    
+    def _remember(self, audio_data: np.ndarray, sample_rate: int):
+        """Keep the last loaded buffer (retain_last only)"""
+        if not self.retain_last:
+            return
+        with self._lock:
+            self.audio_data = audio_data
+            self.sample_rate = sample_rate
+            self.channels = 1 if audio_data.ndim == 1 else audio_data.shape[1]
+            self.duration = audio_data.shape[0] / sample_rate
     
-    def load_audio(self, audio_path: Path) -> Tuple[np.ndarray, int]:
+    def load_audio(self, audio_path: Path, arena=None) -> Tuple[AudioBuffer, int]:
         """
         Load audio file and resample to standard sample rate if needed
         
+        Decoded audio is kept in the process-wide audio_cache, so loading the
+        same unchanged file again is free. The returned array is a read-only
+        view shared with the cache and every other caller: copy it before
+        modifying it (with an arena, the arena copy is returned, writable).
+        
         Args:
-            audio_path: Path to audio file
-            
+            audio_path: Path to audio file (or ZIP/TAR member path)
+            arena: shared_audio.SharedArena to place the samples in, so they can
+                be handed to worker processes without copying (optional)
+        
         Returns:
             Tuple of (audio_data, sample_rate)
         """
-        # Load with soundfile (preserves multi-channel)
-        audio_data, sample_rate = sf.read(str(audio_path), dtype='float32')
+        cache = audio_cache.get_cache()
+        method = self.resampler
+        audio_data = cache.get(audio_path, config.DEFAULT_SAMPLE_RATE, method)
+        if audio_data is not None:
+            if arena is not None:
+                audio_data = AudioBuffer(arena.copy(audio_data), audio_data.sample_rate, audio_data.source_rate)
+            self._remember(audio_data, config.DEFAULT_SAMPLE_RATE)
+            return audio_data, config.DEFAULT_SAMPLE_RATE
+        
+        # Load with soundfile (preserves multi-channel); archive members are streamed
+        wav = wav_mmap.open_wav(audio_path)  # Uncompressed WAVs are read from mapped pages
+        with archive_source.open_source(audio_path) as source, sf.SoundFile(source) as f:
+            sample_rate = f.samplerate
+            audio_data = AudioBuffer(_read_frames(f, -1, arena, sample_rate, wav), sample_rate)
         
         # Resample to default sample rate if different
         if sample_rate != config.DEFAULT_SAMPLE_RATE:
             print(f"  ℹ Resampling from {sample_rate} Hz to {config.DEFAULT_SAMPLE_RATE} Hz")
-            
-            # Handle mono vs stereo
-            if audio_data.ndim == 1:
-                # Mono audio
-                audio_data = librosa.resample(
-                    audio_data,
-                    orig_sr=sample_rate,
-                    target_sr=config.DEFAULT_SAMPLE_RATE
-                )
-            else:
-                # Stereo/multi-channel - resample each channel
-                resampled_channels = []
-                for channel_idx in range(audio_data.shape[1]):
-                    resampled_channel = librosa.resample(
-                        audio_data[:, channel_idx],
-                        orig_sr=sample_rate,
-                        target_sr=config.DEFAULT_SAMPLE_RATE
-                    )
-                    resampled_channels.append(resampled_channel)
-                audio_data = np.column_stack(resampled_channels)
-            
+            audio_data = _resample(audio_data, sample_rate, config.DEFAULT_SAMPLE_RATE, method)
             sample_rate = config.DEFAULT_SAMPLE_RATE
+            if arena is not None:
+                audio_data = AudioBuffer(arena.copy(audio_data), sample_rate, audio_data.source_rate)
         
-        self.audio_data = audio_data
-        self.sample_rate = sample_rate
-        
-        # Determine number of channels
-        if audio_data.ndim == 1:
-            self.channels = 1
-            self.duration = len(audio_data) / sample_rate
-        else:
-            self.channels = audio_data.shape[1]
-            self.duration = audio_data.shape[0] / sample_rate
+        # Arena buffers live only as long as their arena, so they are not cached
+        if arena is None:
+            audio_data = cache.put(audio_path, sample_rate, audio_data, method)
+        self._remember(audio_data, sample_rate)
         
         return audio_data, sample_rate
     
+    def load_audio_window(
+        self,
+        audio_path: Path,
+        start_time: float,
+        end_time: float,
+        arena=None
+    ) -> Tuple[AudioBuffer, int]:
+        """
+        Load only a time range of an audio file (seek + partial read)
+        
+        Returns the same samples as load_audio followed by slice_audio, but
+        decodes just the window (plus a short margin for the resampler when
+        the file is not at the standard rate), so memory and time scale with
+        the slice length instead of the file length. If the whole file is in
+        the audio cache at its own rate, the window is a view into it.
+        
+        Args:
+            audio_path: Path to audio file (or ZIP/TAR member path)
+            start_time: Start time in seconds
+            end_time: End time in seconds
+            arena: shared_audio.SharedArena to place the samples in (optional)
+        
+        Returns:
+            Tuple of (audio_data, sample_rate)
+        """
+        target_sr = config.DEFAULT_SAMPLE_RATE
+        
+        # Cached full decode: slice it (only at the source rate - a window
+        # resampled on its own differs from a full-file resample in the last bits)
+        cached = audio_cache.get_cache().get(audio_path, target_sr, self.resampler)
+        if cached is not None and cached.source_rate == target_sr:
+            audio_data = self.slice_audio(cached, target_sr, start_time, max(start_time, end_time))
+            if arena is not None:
+                audio_data = AudioBuffer(arena.copy(audio_data), target_sr)
+            self._remember(audio_data, target_sr)
+            return audio_data, target_sr
+        
+        wav = wav_mmap.open_wav(audio_path)
+        
+        with archive_source.open_source(audio_path) as source, sf.SoundFile(source) as f:
+            orig_sr = f.samplerate
+            total_frames = f.frames
+            
+            if orig_sr == target_sr:
+                start = min(max(int(start_time * orig_sr), 0), total_frames)
+                end = min(max(int(end_time * orig_sr), start), total_frames)
+                f.seek(start)
+                audio_data = AudioBuffer(_read_frames(f, end - start, arena, orig_sr, wav), orig_sr)
+            else:
+                print(f"  ℹ Resampling window from {orig_sr} Hz to {target_sr} Hz")
+                
+                # Output range on the resampled timeline (as load_audio would produce)
+                total_out = int(math.ceil(total_frames * target_sr / orig_sr))
+                out_start = min(max(int(start_time * target_sr), 0), total_out)
+                out_end = min(max(int(end_time * target_sr), out_start), total_out)
+                
+                # Read with a margin, starting on a frame that maps exactly onto
+                # an output sample so the window lines up with a full-file resample
+                step = orig_sr // math.gcd(orig_sr, target_sr)
+                pad = int(config.SLICE_RESAMPLE_PAD_SECONDS * orig_sr)
+                read_start = max(int(out_start * orig_sr / target_sr) - pad, 0) // step * step
+                read_end = min(int(math.ceil(out_end * orig_sr / target_sr)) + pad, total_frames)
+                
+                f.seek(read_start)
+                window = _read_frames(f, read_end - read_start, wav=wav)
+                resampled = _resample(window, orig_sr, target_sr, self.resampler)
+                
+                offset = out_start - read_start * target_sr // orig_sr
+                audio_data = resampled[offset:offset + out_end - out_start]
+                if arena is not None:
+                    audio_data = AudioBuffer(arena.copy(audio_data), target_sr, orig_sr)
+        
+        self._remember(audio_data, target_sr)
+        
+        return audio_data, target_sr
+    
     def get_audio_info(self, audio_path: Path) -> AudioInfo:
         """
         Get audio file information without loading full data
         
         Args:
             audio_path: Path to audio file
-            
+        
         Returns:
             AudioInfo object
         """
-        info = sf.info(str(audio_path))
+        with archive_source.open_source(audio_path) as source:
+            info = sf.info(source)
         
         return AudioInfo(
             sample_rate=info.samplerate,
@@ -117,7 +340,7 @@ class AudioProcessor:
         
         Args:
             audio_data: Audio data array
-            
+        
         Returns:
             Mono audio array
         """
@@ -134,7 +357,7 @@ class AudioProcessor:
         Args:
             audio_data: Audio data (mono or stereo)
             sample_rate: Sample rate
-            
+        
         Returns:
             Detected BPM
         """
@@ -160,17 +383,21 @@ class AudioProcessor:
         Slice audio to specific time range (sample-accurate)
         
         Args:
-            audio_data: Audio data array
+            audio_data: Audio data array, or a wav_mmap.WavMap (only the
+                slice's pages are read and converted)
             sample_rate: Sample rate
             start_time: Start time in seconds
             end_time: End time in seconds
-            
+        
         Returns:
             Sliced audio data
         """
         start_sample = int(start_time * sample_rate)
         end_sample = int(end_time * sample_rate)
         
+        if isinstance(audio_data, wav_mmap.WavMap):
+            return audio_data.read(start_sample, max(end_sample, start_sample))
+        
         # Handle mono vs stereo
         if audio_data.ndim == 1:
             return audio_data[start_sample:end_sample]
@@ -183,7 +410,7 @@ class AudioProcessor:
         
         Args:
             audio_data: Audio data array
-            
+        
         Returns:
             Mono audio array
         """
@@ -201,44 +428,33 @@ class AudioProcessor:
         """
         Resample audio to target sample rate (backward-compatible helper)
         
+        An AudioBuffer's own sample_rate takes precedence over orig_sr, so a
+        buffer that load_audio already resampled is returned unchanged.
+        
         Args:
             audio_data: Audio data array
             orig_sr: Original sample rate
             target_sr: Target sample rate
-            
+        
         Returns:
             Resampled audio array
         """
+        if isinstance(audio_data, AudioBuffer) and audio_data.sample_rate:
+            orig_sr = audio_data.sample_rate
+        
         # No-op if already at target rate
         if orig_sr == target_sr:
             return audio_data
         
-        # Handle mono vs stereo/multi-channel
-        if audio_data.ndim == 1:
-            # Mono: resample directly
-            return librosa.resample(
-                audio_data,
-                orig_sr=orig_sr,
-                target_sr=target_sr
-            )
-        else:
-            # Stereo/multi-channel: resample each channel
-            channels = []
-            for c in range(audio_data.shape[1]):
-                ch_resampled = librosa.resample(
-                    audio_data[:, c],
-                    orig_sr=orig_sr,
-                    target_sr=target_sr
-                )
-                channels.append(ch_resampled)
-            return np.column_stack(channels)
+        return _resample(audio_data, orig_sr, target_sr, self.resampler)
     
     def save_audio(
         self,
         audio_data: np.ndarray,
         sample_rate: int,
         output_path: Path,
-        bit_depth: int = 24
+        bit_depth: int = 24,
+        force_mono: bool = False
     ):
         """
         Save audio to file with format standardization
@@ -248,53 +464,204 @@ class AudioProcessor:
         
         Args:
             audio_data: Audio data to save (1D for mono, 2D for stereo)
-            sample_rate: Sample rate (will be resampled to 44.1kHz if needed)
+            sample_rate: Sample rate (will be resampled to 44.1kHz if needed;
+                an AudioBuffer's own rate takes precedence)
             output_path: Output file path
             bit_depth: Bit depth (kept for compatibility, but ignored)
+            force_mono: Downmix to mono (StemValidator.should_force_mono)
         """
         # V2.2: Force standardization to 44.1kHz / 16-bit PCM
         target_sr = config.DEFAULT_SAMPLE_RATE  # 44100
         
         # 1) Resample to 44.1kHz if needed (handle stereo/multi-channel)
-        if sample_rate != target_sr:
-            if audio_data.ndim == 1:
-                # Mono: resample directly
-                audio_data = librosa.resample(
-                    audio_data,
-                    orig_sr=sample_rate,
-                    target_sr=target_sr
-                )
-            else:
-                # Stereo / multi-channel: resample each channel separately
-                channels = []
-                for c in range(audio_data.shape[1]):
-                    ch_resampled = librosa.resample(
-                        audio_data[:, c],
-                        orig_sr=sample_rate,
-                        target_sr=target_sr
-                    )
-                    channels.append(ch_resampled)
-                audio_data = np.column_stack(channels)
-            sample_rate = target_sr
-        
-        # 2) Normalize to [-1, 1] range for safe PCM_16 conversion
-        max_val = float(np.max(np.abs(audio_data))) if audio_data.size > 0 else 0.0
-        if max_val > 0:
-            audio_data = audio_data / (max_val + 1e-8)  # Prevent clipping
+        audio_data = self.resample_audio(audio_data, sample_rate, target_sr)
+        sample_rate = target_sr
+        
+        # 2) Downmix, normalize to [-1, 1] and quantize in one fused pass (pcm.py)
+        pcm16 = pcm.normalize_to_pcm16(audio_data, mono=force_mono)
         
         # 3) Save as 16-bit PCM (forced standardization)
         sf.write(
             str(output_path),
-            audio_data,
+            pcm16,
             sample_rate,
             subtype='PCM_16'  # Always 16-bit PCM for dataset uniformity
         )
+    
+    def is_export_conformant(
+        self,
+        audio_path: Path,
+        force_mono: bool = False,
+        min_peak_dbfs: Optional[float] = config.FAST_PATH_MIN_PEAK_DBFS
+    ) -> bool:
+        """
+        Check whether a file already meets the export spec (samples can be copied as-is)
+        
+        The header must say WAV / 16-bit PCM / 44.1kHz with 1 channel (forced-mono
+        stems) or 1-2 channels. With min_peak_dbfs set, the samples are also
+        scanned as int16 (no float conversion) to make sure the file is
+        already normalized.
+        
+        Args:
+            audio_path: Audio file path (or ZIP/TAR member path)
+            force_mono: StemValidator.should_force_mono for the stem's labels
+            min_peak_dbfs: Minimum peak level in dBFS (None = header check only)
+        
+        Returns:
+            True if the file can be exported without decoding
+        """
+        with archive_source.open_source(audio_path) as source, sf.SoundFile(source) as f:
+            if (f.format != 'WAV' or f.subtype != 'PCM_16'
+                    or f.samplerate != config.DEFAULT_SAMPLE_RATE
+                    or f.channels > (1 if force_mono else 2)):
+                return False
+            if min_peak_dbfs is None:
+                return True
+            
+            threshold = 32768 * 10 ** (min_peak_dbfs / 20)
+            for block in f.blocks(blocksize=config.STREAM_CHUNK_FRAMES, dtype='int16'):
+                if block.size > 0 and np.max(np.abs(block.astype(np.int32))) >= threshold:
+                    return True
+            return False
+    
+    def save_audio_streaming(
+        self,
+        audio_path: Path,
+        output_path: Path,
+        chunk_frames: int = config.STREAM_CHUNK_FRAMES,
+        force_mono: bool = False,
+        dither: bool = config.PCM16_DITHER
+    ) -> AudioInfo:
+        """
+        Convert an audio file to the export format in constant memory
+        
+        Produces the same file as load_audio followed by save_audio
+        (44.1kHz, peak-normalized, 16-bit PCM), but reads, resamples and writes
+        chunk_frames at a time through a stateful resampler stream
+        (resampling.open_stream). Normalizing needs the peak before the first
+        sample is written, so the file is streamed twice: once to measure the
+        peak, once to write. The fft resampler cannot stream; files that need
+        it are converted in memory with load_audio + save_audio.
+        
+        Integer PCM sources already at 44.1kHz (e.g. 24-bit stems) are read as
+        int32 and scaled to int16 with a fixed-point gain, never touching
+        float (config.INTEGER_PCM_PATH); results match the float path to
+        within 1 LSB.
+        
+        Args:
+            audio_path: Source audio file (or ZIP/TAR member path)
+            output_path: Output file path
+            chunk_frames: Frames read per block
+            force_mono: Downmix to mono (StemValidator.should_force_mono)
+            dither: Add TPDF dither on the integer path
+        
+        Returns:
+            AudioInfo of the written file
+        """
+        target_sr = config.DEFAULT_SAMPLE_RATE
+        
+        method = self.resampler
+        if method not in resampling.STREAMING_BACKENDS and self.get_audio_info(audio_path).sample_rate != target_sr:
+            print(f"  ⚠ Resampler '{method}' cannot stream; converting in memory")
+            audio_data, sample_rate = self.load_audio(audio_path)
+            self.save_audio(audio_data, sample_rate, output_path, force_mono=force_mono)
+            return AudioInfo(
+                sample_rate=target_sr,
+                duration=len(audio_data) / target_sr,
+                channels=1 if force_mono or audio_data.ndim == 1 else audio_data.shape[1],
+                samples=len(audio_data)
+            )
+        
+        with archive_source.open_source(audio_path) as source, sf.SoundFile(source) as f:
+            if f.samplerate != target_sr:
+                print(f"  ℹ Streaming resample from {f.samplerate} Hz to {target_sr} Hz ({method})")
+            
+            channels = 1 if force_mono else f.channels
+            integer_path = (config.INTEGER_PCM_PATH and f.samplerate == target_sr
+                            and f.subtype in pcm.INTEGER_SUBTYPES)
+            
+            # Pass 1: peak of the (resampled, downmixed) signal
+            peak = 0
+            if integer_path:
+                f.seek(0)
+                for block in f.blocks(blocksize=chunk_frames, dtype='int32', always_2d=True):
+                    peak = max(peak, pcm.peak_int(block, mono=force_mono))
+                gain = pcm.integer_gain(peak, f.channels if force_mono else 1)
+                rng = np.random.default_rng() if dither else None
+            else:
+                for block in self._stream_blocks(f, target_sr, chunk_frames, method):
+                    peak = max(peak, pcm.peak(block, mono=force_mono))
+                divisor = pcm.normalize_divisor(peak)
+            
+            # Pass 2: downmix / normalize / quantize into one reused int16 buffer
+            buffer = np.empty((chunk_frames, channels), dtype=np.int16)
+            samples = 0
+            with sf.SoundFile(
+                str(output_path), 'w',
+                samplerate=target_sr,
+                channels=channels,
+                subtype='PCM_16'
+            ) as out:
+                if integer_path:
+                    f.seek(0)
+                    for block in f.blocks(blocksize=chunk_frames, dtype='int32', always_2d=True):
+                        out.write(pcm.int32_to_pcm16(block, gain, force_mono, rng,
+                                                     out=buffer[:len(block)]))
+                        samples += len(block)
+                else:
+                    for block in self._stream_blocks(f, target_sr, chunk_frames, method):
+                        # Resampler output can exceed chunk_frames slightly
+                        if len(block) > len(buffer):
+                            buffer = np.empty((len(block), channels), dtype=np.int16)
+                        out.write(pcm.to_pcm16(block, divisor, force_mono, out=buffer[:len(block)]))
+                        samples += len(block)
+        
+        return AudioInfo(
+            sample_rate=target_sr,
+            duration=samples / target_sr,
+            channels=channels,
+            samples=samples
+        )
+    
+    @staticmethod
+    def _stream_blocks(f: sf.SoundFile, target_sr: int, chunk_frames: int, method: str):
+        """
+        Yield float32 (frames, channels) blocks of an open file at target_sr
+        
+        Rewinds the file first. When resampling, the output is trimmed or
+        zero-padded to the length a whole-file resample produces.
+        """
+        f.seek(0)
+        if f.samplerate == target_sr:
+            yield from f.blocks(blocksize=chunk_frames, dtype='float32', always_2d=True)
+            return
+        
+        # Selected backend run as a stream (save_audio_streaming handles fft)
+        _count_resample()
+        resampler = resampling.open_stream(f.samplerate, target_sr, f.channels, method)
+        remaining = int(math.ceil(f.frames * target_sr / f.samplerate))
+        last = False
+        while not last:
+            block = f.read(chunk_frames, dtype='float32', always_2d=True)
+            last = len(block) < chunk_frames
+            out = resampler.resample_chunk(block, last=last)[:remaining]
+            remaining -= len(out)
+            if len(out):
+                yield out
+        if remaining > 0:
+            yield np.zeros((remaining, f.channels), dtype=np.float32)
 
 
 class MIDIProcessor:
-    """Handles MIDI file loading, analysis, and processing"""
+    """
+    Handles MIDI file loading, analysis, and processing
+    
+    Stateless by default like AudioProcessor; retain_last=True keeps the last
+    loaded file on midi_data.
+    """
     
-    def __init__(self):
+    def __init__(self, retain_last: bool = False):
+        self.retain_last = retain_last
         self.midi_data = None
         self.tempo = None
     
@@ -302,46 +669,77 @@ class MIDIProcessor:
         """
         Load MIDI file
         
+        Parsed files come from the process-wide midi_cache and are shared by
+        every caller; don't modify them in place.
+        
         Args:
-            midi_path: Path to MIDI file
-            
+            midi_path: Path to MIDI file (or ZIP/TAR member path)
+        
         Returns:
             PrettyMIDI object
         """
-        midi_data = pretty_midi.PrettyMIDI(str(midi_path))
-        self.midi_data = midi_data
+        midi_data = midi_cache.get_cache().load_midi(midi_path)
+        if self.retain_last:
+            self.midi_data = midi_data
         
         return midi_data
     
+    def load_note_array(self, midi_path: Path) -> NoteArrayMIDI:
+        """
+        Load MIDI file as note arrays (for slicing many windows or writing many slices)
+        
+        Args:
+            midi_path: Path to MIDI file (or ZIP/TAR member path)
+        
+        Returns:
+            NoteArrayMIDI (cached and shared, like load_midi)
+        """
+        return midi_cache.get_cache().load_notes(midi_path)
+    
     def get_midi_info(self, midi_path: Path) -> MIDIInfo:
         """
         Get MIDI file information
         
+        Reads only the meta events (midi_header), so no note objects are built;
+        the values are the ones a full PrettyMIDI parse gives. Files the header
+        scanner rejects fall back to a full parse.
+        
         Args:
             midi_path: Path to MIDI file
-            
+        
         Returns:
             MIDIInfo object
         """
-        midi_data = pretty_midi.PrettyMIDI(str(midi_path))
-        
-        # Get tempo (use first tempo change or estimate)
-        tempo = self.get_tempo(midi_data)
+        try:
+            header = midi_cache.get_cache().load_header(midi_path)
+        except MIDIHeaderError:
+            header = None
         
-        # Get time signature (use first or default to 4/4)
-        time_sig = self.get_time_signature(midi_data)
+        # SMPTE-timed files (no ticks per beat) take the full parse
+        if header is not None and header.ticks_per_beat > 0:
+            tempo = header.tempo
+            time_sig = header.time_signature
+            tempo_count = len(header.tempo_changes)
+            duration = header.end_time
+        else:
+            midi_data = self.load_midi(midi_path)
+            # Get tempo (use first tempo change or estimate)
+            tempo = self.get_tempo(midi_data)
+            # Get time signature (use first or default to 4/4)
+            time_sig = self.get_time_signature(midi_data)
+            tempo_count = len(midi_data.get_tempo_changes()[0])
+            duration = midi_data.get_end_time()
         
         # Check if has tempo map (multiple tempo changes)
-        tempo_times, tempos = midi_data.get_tempo_changes()
-        has_tempo_map = len(tempo_times) > 1
+        has_tempo_map = tempo_count > 1
         
         # Warn if complex tempo map exists
         if has_tempo_map:
-            print(f"  ⚠ MIDI has {len(tempo_times)} tempo changes (using first: {tempo:.1f} BPM)")
+            print(f"  ⚠ MIDI has {tempo_count} tempo changes (using first: {tempo:.1f} BPM)")
             print(f"    Note: Complex tempo maps are currently flattened to single tempo")
         
         return MIDIInfo(
-            duration=midi_data.get_end_time(),
+            duration=duration,
             tempo=tempo,
             time_signature=time_sig,
             has_tempo_map=has_tempo_map
@@ -353,7 +751,7 @@ class MIDIProcessor:
         
         Args:
             midi_data: PrettyMIDI object
-            
+        
         Returns:
             Tempo in BPM
         """
@@ -372,7 +770,7 @@ class MIDIProcessor:
         
         Args:
             midi_data: PrettyMIDI object
-            
+        
         Returns:
             Tuple of (numerator, denominator)
         """
@@ -396,7 +794,7 @@ class MIDIProcessor:
         Args:
             tempo: Tempo in BPM
             time_signature: Time signature (numerator, denominator)
-            
+        
         Returns:
             Bar duration in seconds
         """
@@ -419,7 +817,7 @@ class MIDIProcessor:
             num_bars: Number of bars
             tempo: Tempo in BPM
             time_signature: Time signature
-            
+        
         Returns:
             Duration in seconds
         """
@@ -428,87 +826,73 @@ class MIDIProcessor:
     
     def slice_midi(
         self,
-        midi_data: pretty_midi.PrettyMIDI,
+        midi_data: Union[pretty_midi.PrettyMIDI, NoteArrayMIDI],
         start_time: float,
         end_time: float
-    ) -> pretty_midi.PrettyMIDI:
+    ) -> Union[pretty_midi.PrettyMIDI, NoteArrayMIDI]:
         """
         Slice MIDI to specific time range and shift to start at 0
         
+        Notes overlapping the range are clipped to it; instruments left without
+        notes are dropped. Works on note arrays (NoteArrayMIDI.slice), so
+        PrettyMIDI input is converted once and the result converted back.
+        
         Args:
-            midi_data: PrettyMIDI object
+            midi_data: PrettyMIDI object or NoteArrayMIDI
             start_time: Start time in seconds
             end_time: End time in seconds
-            
+        
         Returns:
-            New PrettyMIDI object with sliced content
-        """
-        # Create new MIDI object
-        sliced_midi = pretty_midi.PrettyMIDI(initial_tempo=self.get_tempo(midi_data))
-        
-        # Copy time signature
-        for ts in midi_data.time_signature_changes:
-            if start_time <= ts.time <= end_time:
-                new_ts = pretty_midi.TimeSignature(
-                    ts.numerator,
-                    ts.denominator,
-                    ts.time - start_time
-                )
-                sliced_midi.time_signature_changes.append(new_ts)
-        
-        # Copy instruments with filtered notes
-        for instrument in midi_data.instruments:
-            new_instrument = pretty_midi.Instrument(
-                program=instrument.program,
-                is_drum=instrument.is_drum,
-                name=instrument.name
-            )
-            
-            # Filter and shift notes (including overlapping notes)
-            for note in instrument.notes:
-                # Skip notes that don't overlap with the time window
-                # A note overlaps if its end is after the start AND its start is before the end
-                if note.end <= start_time or note.start >= end_time:
-                    continue
-                
-                # Clip the note to the time window and shift to start at 0
-                new_start = max(note.start, start_time) - start_time
-                new_end = min(note.end, end_time) - start_time
-                
-                # Skip if clipping resulted in zero-length note
-                if new_end <= new_start:
-                    continue
-                
-                new_note = pretty_midi.Note(
-                    velocity=note.velocity,
-                    pitch=note.pitch,
-                    start=new_start,
-                    end=new_end
-                )
-                new_instrument.notes.append(new_note)
-            
-            # Only add instrument if it has notes
-            if new_instrument.notes:
-                sliced_midi.instruments.append(new_instrument)
+            New sliced MIDI of the same type as midi_data
+        """
+        if isinstance(midi_data, NoteArrayMIDI):
+            return midi_data.slice(start_time, end_time)
+        notes = NoteArrayMIDI.from_pretty_midi(midi_data, self.get_tempo(midi_data))
+        return notes.slice(start_time, end_time).to_pretty_midi()
+    
+    def slice_midi_windows(
+        self,
+        midi_data: Union[pretty_midi.PrettyMIDI, NoteArrayMIDI],
+        windows: Sequence[Tuple[float, float]]
+    ) -> List[Union[pretty_midi.PrettyMIDI, NoteArrayMIDI]]:
+        """
+        Slice MIDI to many time ranges at once (same result as slice_midi per window)
+        
+        Notes are sorted by start once; every window then finds its
+        overlapping notes by binary search (NoteArrayMIDI.slice_windows).
+        
+        Args:
+            midi_data: PrettyMIDI object or NoteArrayMIDI
+            windows: List of (start_time, end_time) in seconds
         
-        return sliced_midi
+        Returns:
+            List of new sliced MIDI of the same type as midi_data, one per window
+        """
+        if isinstance(midi_data, NoteArrayMIDI):
+            return midi_data.slice_windows(windows)
+        notes = NoteArrayMIDI.from_pretty_midi(midi_data, self.get_tempo(midi_data))
+        return [sliced.to_pretty_midi() for sliced in notes.slice_windows(windows)]
     
-    def save_midi(self, midi_data: pretty_midi.PrettyMIDI, output_path: Path):
+    def save_midi(self, midi_data: Union[pretty_midi.PrettyMIDI, NoteArrayMIDI], output_path: Path):
         """
         Save MIDI to file
         
         Args:
-            midi_data: PrettyMIDI object
+            midi_data: PrettyMIDI object or NoteArrayMIDI
             output_path: Output file path
         """
         midi_data.write(str(output_path))
 
 
 class AlignedSlicer:
-    """Handles aligned slicing of audio and MIDI"""
+    """Handles aligned slicing of audio and MIDI (stateless, safe to share between threads)"""
     
-    def __init__(self):
-        self.audio_processor = AudioProcessor()
+    def __init__(self, resampler: Optional[str] = None):
+        """
+        Args:
+            resampler: Resampler backend (None = resampling.get_default_method())
+        """
+        self.audio_processor = AudioProcessor(resampler=resampler)
         self.midi_processor = MIDIProcessor()
     
     def slice_pair(
@@ -519,7 +903,7 @@ class AlignedSlicer:
         end_bars: float,
         tempo: Optional[float] = None,
         time_signature: Tuple[int, int] = (4, 4)
-    ) -> Tuple[np.ndarray, int, Optional[pretty_midi.PrettyMIDI]]:
+    ) -> Tuple[np.ndarray, int, Optional[NoteArrayMIDI]]:
         """
         Slice audio and MIDI to the same bar range
         
@@ -530,20 +914,22 @@ class AlignedSlicer:
             end_bars: End position in bars
             tempo: Tempo in BPM (from MIDI or detected)
             time_signature: Time signature
-            
+        
         Returns:
-            Tuple of (sliced_audio, sample_rate, sliced_midi)
+            Tuple of (sliced_audio, sample_rate, sliced_midi); sliced_midi is
+            written with its write() method like a PrettyMIDI object
         """
-        # Load audio
-        audio_data, sample_rate = self.audio_processor.load_audio(audio_path)
+        audio_data = None
         
         # Get tempo from MIDI if available, otherwise use provided or detect
-        if midi_path and midi_path.exists():
-            midi_data = self.midi_processor.load_midi(midi_path)
-            tempo = self.midi_processor.get_tempo(midi_data)
-            time_signature = self.midi_processor.get_time_signature(midi_data)
+        has_midi = midi_path is not None and archive_source.exists(midi_path)
+        if has_midi:
+            midi_data = self.midi_processor.load_note_array(midi_path)
+            tempo = midi_data.tempo
+            time_signature = midi_data.time_signature
         elif tempo is None:
-            # Detect tempo from audio
+            # Detect tempo from audio (needs the whole file)
+            audio_data, sample_rate = self.audio_processor.load_audio(audio_path)
             tempo = self.audio_processor.detect_bpm(audio_data, sample_rate)
             print(f"Detected BPM: {tempo:.1f}")
         
@@ -553,17 +939,144 @@ class AlignedSlicer:
         
         print(f"Slicing from {start_bars} to {end_bars} bars ({start_time:.2f}s to {end_time:.2f}s)")
         
-        # Slice audio
-        sliced_audio = self.audio_processor.slice_audio(
-            audio_data, sample_rate, start_time, end_time
-        )
+        # Slice audio: decode only the window unless the file is already loaded
+        if audio_data is None:
+            sliced_audio, sample_rate = self.audio_processor.load_audio_window(
+                audio_path, start_time, end_time
+            )
+        else:
+            sliced_audio = self.audio_processor.slice_audio(
+                audio_data, sample_rate, start_time, end_time
+            )
         
         # Slice MIDI if present
         sliced_midi = None
-        if midi_path and midi_path.exists():
+        if has_midi:
             sliced_midi = self.midi_processor.slice_midi(midi_data, start_time, end_time)
         
         return sliced_audio, sample_rate, sliced_midi
+    
+    @staticmethod
+    def stride_windows(
+        start_bars: float,
+        end_bars: float,
+        window_bars: float,
+        stride_bars: Optional[float] = None
+    ) -> List[Tuple[float, float]]:
+        """
+        Every window_bars-long window between start_bars and end_bars
+        
+        Args:
+            start_bars: First window start
+            end_bars: Last window end (windows never extend past it)
+            window_bars: Window length in bars (e.g. 4, 8, 16)
+            stride_bars: Distance between window starts (defaults to window_bars)
+        
+        Returns:
+            List of (start_bars, end_bars)
+        """
+        stride_bars = stride_bars or window_bars
+        count = int(np.floor((end_bars - start_bars - window_bars) / stride_bars + 1e-9)) + 1
+        return [
+            (start_bars + i * stride_bars, start_bars + i * stride_bars + window_bars)
+            for i in range(max(count, 0))
+        ]
+    
+    def slice_windows(
+        self,
+        audio_path: Path,
+        midi_path: Optional[Path],
+        windows: Optional[Sequence[Tuple[float, float]]] = None,
+        window_bars: Optional[float] = None,
+        stride_bars: Optional[float] = None,
+        start_bars: float = 0,
+        end_bars: Optional[float] = None,
+        tempo: Optional[float] = None,
+        time_signature: Tuple[int, int] = (4, 4),
+        arena=None
+    ) -> Tuple[List[SliceWindow], int]:
+        """
+        Cut many bar windows from one stem with a single decode
+        
+        The audio range covering all windows is decoded once and every window
+        is a view into that buffer (no copies); the MIDI is parsed once and
+        sliced for all windows in one pass (MIDIProcessor.slice_midi_windows).
+        Windows are given explicitly or as a stride spec.
+        
+        Args:
+            audio_path: Path to audio file
+            midi_path: Path to MIDI file (optional)
+            windows: List of (start_bars, end_bars); if None, use the stride spec
+            window_bars: Stride spec - window length in bars
+            stride_bars: Stride spec - bars between window starts (default window_bars)
+            start_bars: Stride spec - first window start
+            end_bars: Stride spec - last window end (default: end of the audio)
+            tempo: Tempo in BPM (from MIDI, else detected if None)
+            time_signature: Time signature
+            arena: shared_audio.SharedArena to decode into; the window views can
+                then be sent to worker processes with arena.share (optional)
+        
+        Returns:
+            Tuple of (list of SliceWindow, sample_rate)
+        """
+        full_audio = None
+        midi_data = None
+        
+        # Tempo from MIDI if available, otherwise use provided or detect
+        if midi_path is not None and archive_source.exists(midi_path):
+            midi_data = self.midi_processor.load_note_array(midi_path)
+            tempo = midi_data.tempo
+            time_signature = midi_data.time_signature
+        elif tempo is None:
+            full_audio, sample_rate = self.audio_processor.load_audio(audio_path, arena=arena)
+            tempo = self.audio_processor.detect_bpm(full_audio, sample_rate)
+            print(f"Detected BPM: {tempo:.1f}")
+        
+        if windows is None:
+            if window_bars is None:
+                raise ValueError("Pass windows or a stride spec (window_bars)")
+            if end_bars is None:
+                duration = self.audio_processor.get_audio_info(audio_path).duration
+                end_bars = duration / self.midi_processor.calculate_bar_duration(tempo, time_signature)
+            windows = self.stride_windows(start_bars, end_bars, window_bars, stride_bars)
+        if not windows:
+            return [], config.DEFAULT_SAMPLE_RATE
+        
+        times = [
+            (self.midi_processor.bars_to_seconds(start, tempo, time_signature),
+             self.midi_processor.bars_to_seconds(end, tempo, time_signature))
+            for start, end in windows
+        ]
+        
+        # One decode covering every window
+        first_time = min(start for start, _ in times)
+        last_time = max(end for _, end in times)
+        if full_audio is None:
+            buffer, sample_rate = self.audio_processor.load_audio_window(audio_path, first_time, last_time,
+                                                                         arena=arena)
+            base = int(first_time * sample_rate)
+        else:
+            buffer, base = full_audio, 0
+        print(f"Slicing {len(windows)} window(s) from one decode "
+              f"({first_time:.2f}s to {last_time:.2f}s)")
+        
+        midi_windows = (self.midi_processor.slice_midi_windows(midi_data, times)
+                        if midi_data is not None else [None] * len(windows))
+        
+        results = []
+        for (start_bars_i, end_bars_i), (start_time, end_time), midi in zip(windows, times, midi_windows):
+            start = min(max(int(start_time * sample_rate) - base, 0), len(buffer))
+            end = min(max(int(end_time * sample_rate) - base, start), len(buffer))
+            results.append(SliceWindow(
+                start_bars=start_bars_i,
+                end_bars=end_bars_i,
+                start_time=start_time,
+                end_time=end_time,
+                audio=buffer[start:end],
+                midi=midi
+            ))
+        
+        return results, sample_rate
 
 
 if __name__ == "__main__":
@@ -0,0 +1,255 @@
+"""
+Compact file catalog
+Slotted audio/MIDI file records with interned strings and lazy Paths, plus a
+columnar FileCatalog (string tables + NumPy index arrays) for whole libraries
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+from dataclasses import dataclass, FrozenInstanceError
+import numpy as np
+from midi_header import MIDIHeader
+
+
+@dataclass
+class AudioHeader:
+    """Audio file properties read from the file header (no decoding)"""
+    sample_rate: int
+    channels: int
+    frames: int
+    duration: float
+    subtype: str  # e.g. "PCM_24", "FLOAT"
+
+
+class _FileRecord:
+    """
+    Immutable file record
+    
+    Stores the directory, filename and normalized name as interned strings
+    (shared by every record in the same folder / with the same name) and
+    builds the Path only when .path is accessed. Behaves like the frozen
+    dataclass it replaces: same constructor, equality, hashing and repr
+    (a filename that is not the path's last component is rejected, since
+    the path is rebuilt from directory + filename).
+    """
+    __slots__ = ("directory", "filename", "normalized_name", "header")
+    
+    def __init__(
+        self,
+        path: Union[str, Path],
+        filename: Optional[str] = None,
+        normalized_name: str = "",
+        header: Optional[Union[AudioHeader, MIDIHeader]] = None
+    ):
+        """
+        Create a record
+        
+        Args:
+            path: File path
+            filename: File name (must be the last path component; defaults to it)
+            normalized_name: Ignored; always recomputed from the filename
+            header: Probed header (see FileIngester.probe_files)
+        
+        Raises:
+            ValueError: filename is not the last component of path
+        """
+        directory, base = os.path.split(os.fspath(path))
+        if filename and filename != base:
+            raise ValueError(f"filename {filename!r} does not match path {os.fspath(path)!r}")
+        self._init(directory, base, "", header)
+    
+    @classmethod
+    def from_parts(
+        cls,
+        directory: str,
+        filename: str,
+        normalized_name: str = "",
+        header: Optional[Union[AudioHeader, MIDIHeader]] = None
+    ):
+        """
+        Create a record from a directory and filename without building a Path
+        
+        Unlike the constructor, a non-empty normalized_name is kept as-is
+        (names cached by the scan index, the catalog and pickles).
+        """
+        record = cls.__new__(cls)
+        record._init(directory, filename, normalized_name, header)
+        return record
+    
+    def _init(self, directory: str, filename: str, normalized_name: str, header):
+        # Use object.__setattr__ because records are frozen
+        object.__setattr__(self, 'directory', sys.intern(directory))
+        object.__setattr__(self, 'filename', sys.intern(filename))
+        object.__setattr__(self, 'normalized_name',
+                           sys.intern(normalized_name or self._normalize_filename(filename)))
+        object.__setattr__(self, 'header', header)
+    
+    @property
+    def path(self) -> Path:
+        """Full path (materialized on access)"""
+        return Path(os.path.join(self.directory, self.filename))
+    
+    @staticmethod
+    def _normalize_filename(filename: str) -> str:
+        """Normalize filename for fuzzy matching"""
+        # Remove extension
+        name = os.path.splitext(filename)[0]
+        # Convert to lowercase
+        name = name.lower()
+        # Replace underscores and hyphens with spaces
+        name = name.replace('_', ' ').replace('-', ' ')
+        # Remove extra spaces
+        name = ' '.join(name.split())
+        return name
+    
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+    
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+    
+    def _key(self) -> tuple:
+        return (self.directory, self.filename, self.normalized_name)
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._key() == other._key()
+    
+    def __hash__(self):
+        return hash((self.__class__.__name__,) + self._key())
+    
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(path={self.path!r}, filename={self.filename!r}, "
+                f"normalized_name={self.normalized_name!r})")
+    
+    def __reduce__(self):
+        return (self.__class__.from_parts,
+                (self.directory, self.filename, self.normalized_name, self.header))
+
+
+class AudioFile(_FileRecord):
+    """Represents an audio file with its properties"""
+    __slots__ = ()
+
+
+class MIDIFile(_FileRecord):
+    """Represents a MIDI file with its properties"""
+    __slots__ = ()
+
+
+class FileCatalog:
+    """
+    Columnar catalog of audio and MIDI files
+    
+    Directories, filenames and normalized names are stored once each in
+    string tables and referenced by int32 index arrays, so a whole library
+    pickles to a handful of arrays (cheap to keep in session state or send
+    to worker processes). Records are materialized on access.
+    """
+    
+    KIND_AUDIO = 0
+    KIND_MIDI = 1
+    
+    def __init__(
+        self,
+        directories: List[str],
+        filenames: List[str],
+        normalized_names: List[str],
+        dir_index: np.ndarray,
+        name_index: np.ndarray,
+        normalized_index: np.ndarray,
+        kinds: np.ndarray,
+        headers: Optional[Dict[int, Union[AudioHeader, MIDIHeader]]] = None
+    ):
+        """
+        Initialize from columns (use FileCatalog.from_files to build one)
+        
+        Args:
+            directories: Directory string table
+            filenames: Filename string table
+            normalized_names: Normalized name string table
+            dir_index: Per-file index into directories
+            name_index: Per-file index into filenames
+            normalized_index: Per-file index into normalized_names
+            kinds: Per-file KIND_AUDIO / KIND_MIDI
+            headers: Probed headers by file index (only files that have one)
+        """
+        self.directories = directories
+        self.filenames = filenames
+        self.normalized_names = normalized_names
+        self.dir_index = dir_index
+        self.name_index = name_index
+        self.normalized_index = normalized_index
+        self.kinds = kinds
+        self.headers = headers or {}
+    
+    @classmethod
+    def from_files(cls, files: Sequence[_FileRecord]) -> "FileCatalog":
+        """
+        Build a catalog from file records
+        
+        Args:
+            files: AudioFile / MIDIFile records (order is preserved)
+        
+        Returns:
+            FileCatalog
+        """
+        tables = ({}, {}, {})
+        columns = (
+            np.empty(len(files), dtype=np.int32),
+            np.empty(len(files), dtype=np.int32),
+            np.empty(len(files), dtype=np.int32)
+        )
+        kinds = np.empty(len(files), dtype=np.int8)
+        headers = {}
+        
+        for i, record in enumerate(files):
+            for table, column, value in zip(tables, columns, record._key()):
+                column[i] = table.setdefault(value, len(table))
+            kinds[i] = cls.KIND_MIDI if isinstance(record, MIDIFile) else cls.KIND_AUDIO
+            if record.header is not None:
+                headers[i] = record.header
+        
+        return cls(
+            directories=list(tables[0]),
+            filenames=list(tables[1]),
+            normalized_names=list(tables[2]),
+            dir_index=columns[0],
+            name_index=columns[1],
+            normalized_index=columns[2],
+            kinds=kinds,
+            headers=headers
+        )
+    
+    def __len__(self) -> int:
+        return len(self.kinds)
+    
+    def __getitem__(self, i: int) -> _FileRecord:
+        """Materialize the record at position i"""
+        record_cls = MIDIFile if self.kinds[i] == self.KIND_MIDI else AudioFile
+        return record_cls.from_parts(
+            self.directories[self.dir_index[i]],
+            self.filenames[self.name_index[i]],
+            self.normalized_names[self.normalized_index[i]],
+            self.headers.get(i)
+        )
+    
+    def __iter__(self) -> Iterator[_FileRecord]:
+        for i in range(len(self)):
+            yield self[i]
+    
+    def path(self, i: int) -> Path:
+        """Path of the file at position i"""
+        return Path(os.path.join(self.directories[self.dir_index[i]],
+                                 self.filenames[self.name_index[i]]))
+    
+    def audio_files(self) -> List[AudioFile]:
+        """Materialize the audio records"""
+        return [self[i] for i in np.flatnonzero(self.kinds == self.KIND_AUDIO)]
+    
+    def midi_files(self) -> List[MIDIFile]:
+        """Materialize the MIDI records"""
+        return [self[i] for i in np.flatnonzero(self.kinds == self.KIND_MIDI)]
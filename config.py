@@ -47,8 +47,50 @@ OPTIONAL_MIDI_GROUPS = _TAXONOMY["midi_optional_groups"]
 # AUDIO SPECS
 DEFAULT_SAMPLE_RATE = 44100
 DEFAULT_BIT_DEPTH = 24
+SLICE_RESAMPLE_PAD_SECONDS = 0.1  # Extra audio decoded around a slice window for the resampler
+STREAM_CHUNK_FRAMES = 65536  # Frames per block in streaming Full Track export (memory stays flat)
+INTEGER_PCM_PATH = True  # Same-rate integer sources (e.g. 24-bit) export without a float round trip
+PCM16_DITHER = False  # Add TPDF dither when the integer path reduces bit depth
+RESAMPLER = "soxr_hq"  # Resampler backend (see resampling.BACKENDS): soxr_qq for drafts ... soxr_vhq for finals
+
+# Compliance fast path (opt-in): Full Track sources that already meet the export spec
+# (44.1kHz / 16-bit PCM WAV, mono where StemValidator forces mono) keep their samples
+# unchanged under a fresh header instead of being converted. Files peaking within
+# FAST_PATH_MIN_PEAK_DBFS are not re-normalized, so output can differ from a conversion
+COMPLIANCE_FAST_PATH = False
+FAST_PATH_MIN_PEAK_DBFS = -1.0  # Only copy files already peaking within this of 0 dBFS (None = skip check and normalization)
+FAST_PATH_HARDLINK = False  # Hardlink files that are already header + data only (output shares the source's inode)
+EXPORT_WORKERS = 1  # Stem export processes (1 = serial); run_app.py --workers / Step 3 setting
+SHARED_AUDIO_DIR = None  # Temp dir for shared audio buffers when /dev/shm is too small (None = system temp)
+SHARED_AUDIO_SHM_HEADROOM = 64 * 1024 * 1024  # Bytes left free in /dev/shm before spilling to SHARED_AUDIO_DIR
 SUPPORTED_AUDIO_FORMATS = [".wav", ".wave"]
 SUPPORTED_MIDI_FORMATS = [".mid", ".midi"]
+SUPPORTED_ARCHIVE_FORMATS = [".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz"]
+SCAN_ARCHIVES = True  # Ingest audio/MIDI members of archives found in the source tree (no extraction)
+
+# DECODED AUDIO CACHE (process-wide, see audio_cache.py)
+AUDIO_CACHE_BYTES = 512 * 1024 * 1024  # In-memory budget for decoded stems (0 = off)
+AUDIO_CACHE_SPILL_DIR = None  # e.g. Path.home() / ".edmgp" / "audio_cache" - keep evicted stems as .npy (None = off)
+AUDIO_CACHE_SPILL_BYTES = 8 * 1024 * 1024 * 1024  # Disk budget of the spill directory
+MIDI_CACHE_ENTRIES = 256  # Parsed MIDI files / headers kept in memory (0 = off, see midi_cache.py)
+
+# DIRECTORY SCANNING
+SCAN_WORKERS = 16  # Concurrent directory listings (helps most on SMB/NFS mounts)
+SCAN_INCLUDE_GLOBS = []  # e.g. ["*/Stems/*"] - relative paths a file must match (empty = all)
+SCAN_EXCLUDE_GLOBS = []  # e.g. ["*/Bounces*"] - relative paths to skip (files and folders)
+JUNK_DIR_NAMES = ["__MACOSX", ".Trashes", ".Spotlight-V100", ".fseventsd"]
+JUNK_FILE_NAMES = [".DS_Store", "Thumbs.db", "desktop.ini"]
+JUNK_FILE_PREFIXES = ["._"]  # AppleDouble resource forks
+PROBE_WORKERS = 16  # Concurrent header reads when FileIngester probes files (sf.info / MIDI meta events)
+
+# SCAN INDEX (persistent incremental scan cache)
+SCAN_INDEX_PATH = Path.home() / ".edmgp" / "scan_index.sqlite"
+
+# WATCH FOLDER (run_app.py --watch)
+WATCH_SETTLE_SECONDS = 10.0  # Quiet time before a dropped folder counts as fully copied
+WATCH_POLL_INTERVAL = 2.0  # Event wait / polling interval in seconds
+WATCH_PARTIAL_SUFFIXES = [".part", ".partial", ".tmp", ".crdownload", ".download"]  # In-progress copies
+WATCH_STATE_PATH = Path.home() / ".edmgp" / "watch_state.json"  # Folders already exported
 
 # OUTPUT STRUCTURE
 OUTPUT_ROOT = "Clean_Dataset_Staging"
@@ -64,6 +106,16 @@ METADATA_FILENAME = "{uid}_info.json"
 # FUZZY MATCHING THRESHOLD (0-100)
 FUZZY_MATCH_THRESHOLD = 70
 
+# PAIRING ENGINE
+PAIRING_WORKERS = -1  # Worker threads for batched fuzzy scoring (-1 = all cores)
+PAIRING_DENSE_MAX_CELLS = 25_000_000  # Above audio x MIDI = this, use candidate blocking
+PAIRING_MAX_CANDIDATES = 64  # MIDI candidates scored per audio file when blocking (recall knob)
+PAIRING_DENSE_COMPONENT_CELLS = 4_000_000  # Larger connected components use the sparse solver
+PAIRING_NGRAM = 3  # Character n-gram length for the candidate index
+PAIRING_POSTING_BUDGET = 1000  # Index postings expanded per audio lookup (rarest n-grams first)
+TRACK_PAIRING_WORKERS = 8  # Track folders paired in parallel when FileIngester uses track_scope
+PAIR_ITER_BATCH_SIZE = 64  # Files discovered between refinements in FileIngester.pair_iter
+
 # VOCAL FILTERING (V1.1 - Enhanced for flagging)
 VOCAL_KEYWORDS = [
     "vocal", "vox", "voice", "singer", "lead_vocal", "harmony",
@@ -4,30 +4,73 @@ Handles output directory structure and file organization
 """
 
 import os
+import sys
+import json
 import shutil
+import ctypes
+import struct
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Union
+from dataclasses import dataclass, replace
 from datetime import datetime
 import config
+import archive_source
+from shared_audio import SharedArena, SharedAudio, find_shared
+from wav_mmap import WAVE_FORMAT_PCM, read_wav_layout
 from metadata import TrackMetadata, MetadataGenerator, StemValidator
-from audio_processing import AudioProcessor
+from audio_processing import AlignedSlicer, AudioProcessor, resample_count
+
+
+FICLONE = 0x40049409  # Linux ioctl: share extents with another file (btrfs, XFS, ...)
+
+
+@dataclass
+class StemJob:
+    """One stem for ExportSession.export_stems (picklable, runs in a worker process)"""
+    audio_path: Path
+    midi_path: Optional[Path]
+    group: str
+    instrument: str
+    layer: str
+    start_bars: Optional[float] = None  # None = Full Track (whole file, as export_stem_file)
+    end_bars: Optional[float] = None
+    tempo: Optional[float] = None
+    # Already decoded audio (as export_stem); audio_path is then only a label.
+    # Sent to workers through shared memory, never pickled.
+    audio: Optional[Any] = None  # np.ndarray (ideally SharedArena-backed) or SharedAudio
+    sample_rate: Optional[int] = None
+    midi_data: Optional[Any] = None  # PrettyMIDI or NoteArrayMIDI to write with the decoded audio
+
+
+@dataclass
+class StemResult:
+    """Outcome of a StemJob"""
+    job: StemJob
+    audio_filename: str
+    midi_filename: Optional[str]
+    error: Optional[str] = None  # Set if the stem failed (its filenames were never written)
 
 
 class FileExporter:
     """Handles file export with proper naming and directory structure"""
     
-    def __init__(self, output_root: str = None):
+    def __init__(self, output_root: str = None, resampler: Optional[str] = None):
         """
         Initialize file exporter
         
         Args:
             output_root: Root output directory (defaults to Clean_Dataset_Staging)
+            resampler: Resampler backend for non-44.1kHz audio
+                (None = resampling.get_default_method())
         """
         if output_root is None:
             output_root = config.OUTPUT_ROOT
         
         self.output_root = Path(output_root)
-        self.audio_processor = AudioProcessor()
+        self.audio_processor = AudioProcessor(resampler=resampler)
         self.metadata_generator = MetadataGenerator()
     
     def create_batch_directory(self, date: Optional[str] = None) -> Path:
@@ -168,10 +211,6 @@ class FileExporter:
         Returns:
             Path to exported file
         """
-        # Check if should be mono
-        if force_mono or StemValidator.should_force_mono(group, instrument):
-            audio_data = self.audio_processor.convert_to_mono(audio_data)
-        
         # Generate filename
         filename = self.generate_audio_filename(uid, group, instrument, layer)
         
@@ -181,12 +220,13 @@ class FileExporter:
         else:
             output_path = track_path / "Audio" / filename
         
-        # Save audio
+        # Save audio (downmixed in the fused PCM pass if it should be mono)
         self.audio_processor.save_audio(
             audio_data,
             sample_rate,
             output_path,
-            bit_depth=config.DEFAULT_BIT_DEPTH
+            bit_depth=config.DEFAULT_BIT_DEPTH,
+            force_mono=force_mono or StemValidator.should_force_mono_static(group, instrument)
         )
         
         return output_path
@@ -217,10 +257,9 @@ class FileExporter:
         
         # Handle both PrettyMIDI objects and Path objects (V1.1 - Full Track Mode)
         if isinstance(midi_data, Path):
-            # Copy existing MIDI file
-            import shutil
+            # Copy existing MIDI file (or archive member)
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(midi_data, output_path)
+            archive_source.copy_file(midi_data, output_path)
         else:
             # Save PrettyMIDI object (Loop Slicer Mode)
             midi_data.write(str(output_path))
@@ -229,24 +268,30 @@ class FileExporter:
     
     def export_metadata(
         self,
-        metadata: TrackMetadata,
+        metadata: Union[TrackMetadata, Dict[str, Any]],
         track_path: Path
     ) -> Path:
         """
         Export metadata JSON file
         
         Args:
-            metadata: TrackMetadata object
+            metadata: TrackMetadata object or schema v2 dictionary (create_metadata)
             track_path: Track directory path
             
         Returns:
             Path to exported file
         """
-        filename = config.METADATA_FILENAME.format(uid=metadata.uid)
+        uid = metadata["uid"] if isinstance(metadata, dict) else metadata.uid
+        filename = config.METADATA_FILENAME.format(uid=uid)
         output_path = track_path / "Metadata" / filename
         
         # Save metadata
-        metadata.to_json(output_path)
+        if isinstance(metadata, dict):
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2)
+        else:
+            metadata.to_json(output_path)
         
         return output_path
     
@@ -265,9 +310,9 @@ class FileExporter:
         masters_dir = track_path / "Masters"
         
         for source_file in source_files:
-            if source_file.exists():
+            if archive_source.exists(source_file):
                 dest_file = masters_dir / source_file.name
-                shutil.copy2(source_file, dest_file)
+                archive_source.copy_file(source_file, dest_file)
     
     def get_export_summary(self, track_path: Path) -> Dict[str, int]:
         """
@@ -308,17 +353,32 @@ class FileExporter:
 class ExportSession:
     """Manages a complete export session"""
     
-    def __init__(self, output_root: str = None):
+    def __init__(
+        self,
+        output_root: str = None,
+        fast_path: bool = config.COMPLIANCE_FAST_PATH,
+        resampler: Optional[str] = None
+    ):
         """
         Initialize export session
         
         Args:
             output_root: Root output directory
+            fast_path: Copy already-conformant files in export_stem_file
+                instead of re-encoding them
+            resampler: Resampler backend for non-44.1kHz sources, also used by
+                the export_stems workers (None = resampling.get_default_method())
         """
-        self.exporter = FileExporter(output_root)
+        self.exporter = FileExporter(output_root, resampler)
+        self.fast_path = fast_path
         self.batch_path = None
         self.track_path = None
         self.exported_files = []
+        self._reserved_paths = set()  # Allocated by export_stems, not written yet
+        self._pool = None  # Worker processes, kept between export_stems calls
+        self._pool_workers = 0
+        self._resamples_at_start = resample_count()
+        self._worker_resamples = 0
     
     def start_batch(self, date: Optional[str] = None) -> Path:
         """
@@ -364,9 +424,16 @@ class ExportSession:
             key
         )
         
+        self._resamples_at_start = resample_count()
+        self._worker_resamples = 0
         print(f"✓ Created track directory: {self.track_path.name}")
         return self.track_path
     
+    @property
+    def resample_count(self) -> int:
+        """Resample operations since the current track was started (debug counter)"""
+        return resample_count() - self._resamples_at_start + self._worker_resamples
+    
     def export_stem(
         self,
         audio_data,
@@ -392,6 +459,205 @@ class ExportSession:
         Returns:
             Tuple of (audio_filename, midi_filename)
         """
+        audio_path, counter = self._next_audio_path(uid, group, instrument, layer)
+        
+        # V2.2: Save audio with format standardization (44.1kHz / 16-bit PCM, mono rule)
+        self.exporter.audio_processor.save_audio(
+            audio_data=audio_data,
+            sample_rate=sample_rate,
+            output_path=audio_path,
+            force_mono=StemValidator.should_force_mono_static(group, instrument)
+        )
+        self.exported_files.append(audio_path)
+        print(f"  ✓ Exported audio: {audio_path.name}")
+        
+        midi_filename = self._export_stem_midi(midi_data, uid, group, instrument, counter)
+        return audio_path.name, midi_filename
+    
+    def export_stem_file(
+        self,
+        audio_path: Path,
+        midi_data,
+        uid: str,
+        group: str,
+        instrument: str,
+        layer: str
+    ) -> tuple:
+        """
+        Export a full-length stem straight from its source file (Full Track Mode)
+        
+        Same output as load_audio + export_stem, but the audio is streamed
+        through AudioProcessor.save_audio_streaming in fixed-size chunks, so
+        memory stays flat regardless of the stem's length. With the fast path
+        on, files that already meet the spec keep their samples under a fresh
+        header instead (reflink / copy_file_range when the filesystem supports
+        it).
+        
+        Args:
+            audio_path: Source audio file (or ZIP/TAR member path)
+            midi_data: Original MIDI path, PrettyMIDI object (or None)
+            uid: Unique identifier
+            group: Stem group
+            instrument: Stem instrument
+            layer: Stem layer
+            
+        Returns:
+            Tuple of (audio_filename, midi_filename)
+        """
+        output_path, counter = self._next_audio_path(uid, group, instrument, layer)
+        
+        note = _write_stem_file(
+            self.exporter.audio_processor,
+            audio_path,
+            output_path,
+            StemValidator.should_force_mono_static(group, instrument),
+            self.fast_path
+        )
+        print(f"  ✓ Exported audio: {output_path.name}{note}")
+        self.exported_files.append(output_path)
+        
+        midi_filename = self._export_stem_midi(midi_data, uid, group, instrument, counter)
+        return output_path.name, midi_filename
+    
+    def export_stems(
+        self,
+        jobs: List[StemJob],
+        uid: str,
+        workers: int = config.EXPORT_WORKERS,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[StemResult]:
+        """
+        Export many stems, fanned out to a pool of worker processes
+        
+        Filenames are allocated here, in job order, before anything is written,
+        so they match exporting the jobs one by one with export_stem /
+        export_stem_file. Workers do the per-stem work (decode, resample, mono,
+        normalize, encode, write) with the same code as the serial path. A
+        failed stem is reported in its StemResult, its partly written files
+        are deleted, and the rest carry on. If the call itself is interrupted
+        (Ctrl+C, a progress callback raising), queued stems are cancelled and
+        the files of every unfinished stem are deleted before re-raising.
+        
+        Decoded audio (StemJob.audio) reaches workers through shared memory:
+        arrays from a SharedArena (e.g. slice_windows(arena=...)) are sent as a
+        handle, anything else is copied into a temporary arena once. The pool
+        stays up for later calls until close().
+        
+        Args:
+            jobs: Stems to export
+            uid: Unique identifier
+            workers: Worker processes (1 = export in this process)
+            progress: Called with (finished, total) after each stem
+            
+        Returns:
+            One StemResult per job, in job order
+        """
+        plans = []
+        for job in jobs:
+            audio_path, counter = self._next_audio_path(uid, job.group, job.instrument, job.layer)
+            self._reserved_paths.add(audio_path)
+            midi_path = None
+            if job.midi_path is not None or job.midi_data is not None:
+                midi_path = self._next_midi_path(uid, job.group, job.instrument, counter)
+                self._reserved_paths.add(midi_path)
+            plans.append((job, audio_path, midi_path))
+        
+        results: List[Optional[StemResult]] = [None] * len(plans)
+        
+        def finish(i: int, note: Optional[str], error: Optional[Exception] = None):
+            job, audio_path, midi_path = plans[i]
+            self._reserved_paths.discard(audio_path)
+            self._reserved_paths.discard(midi_path)
+            if error is not None:
+                print(f"  ❌ Error processing stem {Path(job.audio_path).name}: {error}")
+                _remove_partial(audio_path, midi_path)
+                results[i] = StemResult(job, audio_path.name, None, str(error))
+            else:
+                print(f"  ✓ Exported audio: {audio_path.name}{note}")
+                self.exported_files.append(audio_path)
+                if midi_path is not None:
+                    print(f"  ✓ Exported MIDI: {midi_path.name}")
+                    self.exported_files.append(midi_path)
+                results[i] = StemResult(job, audio_path.name, midi_path.name if midi_path else None)
+            if progress is not None:
+                progress(sum(r is not None for r in results), len(results))
+        
+        # Resolved here, so workers use this session's backend whatever their defaults
+        resampler = self.exporter.audio_processor.resampler
+        
+        try:
+            if workers <= 1 or len(plans) <= 1:
+                for i, (job, audio_path, midi_path) in enumerate(plans):
+                    try:
+                        note, _ = _run_stem_job(job, audio_path, midi_path, self.fast_path, resampler)
+                    except Exception as e:
+                        finish(i, None, e)
+                    else:
+                        finish(i, note)
+                return results
+            
+            print(f"  ℹ Exporting {len(plans)} stem(s) with {workers} worker process(es)")
+            pool = self._get_pool(workers)
+            with SharedArena() as staging:
+                futures = {
+                    pool.submit(_run_stem_job, _shareable(job, staging), audio_path, midi_path,
+                                self.fast_path, resampler): i
+                    for i, (job, audio_path, midi_path) in enumerate(plans)
+                }
+                for future in as_completed(futures):
+                    try:
+                        note, resamples = future.result()
+                    except Exception as e:
+                        finish(futures[future], None, e)
+                    else:
+                        self._worker_resamples += resamples
+                        finish(futures[future], note)
+        except BaseException:
+            # Interrupted: drop queued stems, wait for running ones, then delete
+            # the files of every stem that was never reported
+            self.close(cancel=True)
+            for result, (job, audio_path, midi_path) in zip(results, plans):
+                if result is None:
+                    self._reserved_paths.discard(audio_path)
+                    self._reserved_paths.discard(midi_path)
+                    _remove_partial(audio_path, midi_path)
+            raise
+        
+        return results
+    
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Worker pool of the requested size (started on first use, then reused)"""
+        if self._pool is not None and self._pool_workers != workers:
+            self.close()
+        if self._pool is None:
+            # spawn: forking a process that runs threads (Streamlit, numba) is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            self._pool_workers = workers
+        return self._pool
+    
+    def close(self, cancel: bool = False):
+        """
+        Stop the export worker processes (export_stems starts new ones if needed)
+        
+        Args:
+            cancel: Cancel queued stems instead of finishing them (running ones
+                still complete)
+        """
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=cancel)
+            self._pool = None
+            self._pool_workers = 0
+    
+    def _next_audio_path(self, uid: str, group: str, instrument: str, layer: str) -> tuple:
+        """
+        Next free audio path for a stem (V2 auto-increment on duplicates)
+            
+        Returns:
+            Tuple of (audio_path, counter) - counter > 1 means a suffix was added
+        """
         if self.track_path is None:
             raise ValueError("No track started. Call start_track() first.")
         
@@ -409,69 +675,90 @@ class ExportSession:
         audio_path = audio_dir / audio_filename
         
         counter = 1
-        while audio_path.exists():
+        while audio_path.exists() or audio_path in self._reserved_paths:
             audio_filename = f"{base_name}_{counter}.wav"
             audio_path = audio_dir / audio_filename
             counter += 1
         
-        # V2.2: Save audio with format standardization (44.1kHz / 16-bit PCM)
-        self.exporter.audio_processor.save_audio(
-            audio_data=audio_data,
-            sample_rate=sample_rate,
-            output_path=audio_path
-        )
-        self.exported_files.append(audio_path)
-        print(f"  ✓ Exported audio: {audio_filename}")
+        return audio_path, counter
+    
+    def _export_stem_midi(
+        self,
+        midi_data,
+        uid: str,
+        group: str,
+        instrument: str,
+        counter: int
+    ) -> Optional[str]:
+        """
+        Export a stem's MIDI next to its audio
         
-        # Export MIDI if present
-        midi_filename = None
-        if midi_data is not None:
-            midi_dir = self.track_path / "MIDI"
-            midi_dir.mkdir(exist_ok=True, parents=True)
-            
-            # V2: Auto-increment duplicate handling for MIDI
-            midi_base = f"{uid}_midi_{group_lower}_{instrument_lower}"
+        Args:
+            midi_data: Original MIDI path, PrettyMIDI object (or None)
+            uid: Unique identifier
+            group: Stem group
+            instrument: Stem instrument
+            counter: Audio auto-increment counter (mirrored on the MIDI name)
             
-            # If audio was incremented, mirror that on MIDI
-            if counter > 1:
-                midi_filename = f"{midi_base}_{counter - 1}.mid"
-            else:
-                midi_filename = f"{midi_base}.mid"
+        Returns:
+            MIDI filename (None if there is no MIDI)
+        """
+        if midi_data is None:
+            return None
+        
+        midi_path = self._next_midi_path(uid, group, instrument, counter)
+        _write_midi(midi_data, midi_path)
+        
+        self.exported_files.append(midi_path)
+        print(f"  ✓ Exported MIDI: {midi_path.name}")
+        
+        return midi_path.name
+    
+    def _next_midi_path(self, uid: str, group: str, instrument: str, counter: int) -> Path:
+        """
+        Next free MIDI path for a stem, mirroring the audio's auto-increment
+        
+        Args:
+            uid: Unique identifier
+            group: Stem group
+            instrument: Stem instrument
+            counter: Audio auto-increment counter from _next_audio_path
             
+        Returns:
+            MIDI path
+        """
+        group_lower = group.lower()
+        instrument_lower = instrument.lower().replace(' ', '_')
+        
+        midi_dir = self.track_path / "MIDI"
+        midi_dir.mkdir(exist_ok=True, parents=True)
+        
+        # V2: Auto-increment duplicate handling for MIDI
+        midi_base = f"{uid}_midi_{group_lower}_{instrument_lower}"
+        
+        # If audio was incremented, mirror that on MIDI
+        if counter > 1:
+            midi_filename = f"{midi_base}_{counter - 1}.mid"
+        else:
+            midi_filename = f"{midi_base}.mid"
+        
+        midi_path = midi_dir / midi_filename
+        
+        # Additional check for MIDI duplicates
+        midi_counter = counter - 1 if counter > 1 else 0
+        while midi_path.exists() or midi_path in self._reserved_paths:
+            midi_counter += 1
+            midi_filename = f"{midi_base}_{midi_counter}.mid" if midi_counter > 0 else f"{midi_base}.mid"
             midi_path = midi_dir / midi_filename
-            
-            # Additional check for MIDI duplicates
-            midi_counter = counter - 1 if counter > 1 else 0
-            while midi_path.exists():
-                midi_counter += 1
-                midi_filename = f"{midi_base}_{midi_counter}.mid" if midi_counter > 0 else f"{midi_base}.mid"
-                midi_path = midi_dir / midi_filename
-            
-            # V2.1 FIX: Byte-for-byte copy for Full Track Mode (Path objects)
-            # Full Track Mode: midi_data is Path → copy original bytes (no processing)
-            # Loop Slicer Mode: midi_data is PrettyMIDI object → write processed MIDI
-            if isinstance(midi_data, (str, Path)):
-                # Full Track Mode: Byte-for-byte copy (preserves timing perfectly)
-                import shutil
-                src = Path(midi_data)
-                shutil.copy2(src, midi_path)
-            elif hasattr(midi_data, "write"):
-                # Loop Slicer Mode: Write processed MIDI object
-                midi_data.write(str(midi_path))
-            else:
-                raise TypeError(f"Unsupported midi_data type: {type(midi_data)}")
-            
-            self.exported_files.append(midi_path)
-            print(f"  ✓ Exported MIDI: {midi_filename}")
         
-        return audio_filename, midi_filename
+        return midi_path
     
-    def finalize_track(self, metadata: TrackMetadata):
+    def finalize_track(self, metadata: Union[TrackMetadata, Dict[str, Any]]):
         """
         Finalize track export by saving metadata
         
         Args:
-            metadata: TrackMetadata object
+            metadata: TrackMetadata object or schema v2 dictionary
         """
         if self.track_path is None:
             raise ValueError("No track started.")
@@ -486,11 +773,294 @@ class ExportSession:
         print(f"  - {summary['audio']} audio file(s)")
         print(f"  - {summary['midi']} MIDI file(s)")
         print(f"  - {summary['metadata']} metadata file(s)")
+        print(f"  ℹ {self.resample_count} resample operation(s)")
         
         # Reset track
         self.track_path = None
 
 
+_worker_slicers: Dict[str, AlignedSlicer] = {}  # Per-process slicers by resampler (stateless, reused across jobs)
+
+
+def _run_stem_job(
+    job: StemJob,
+    audio_path: Path,
+    midi_path: Optional[Path],
+    fast_path: bool,
+    resampler: str
+) -> tuple:
+    """
+    Export one stem to already-allocated paths (runs in a worker process)
+    
+    Args:
+        job: Stem to export
+        audio_path: Output audio path
+        midi_path: Output MIDI path (None if the stem has no MIDI)
+        fast_path: Copy already-conformant Full Track files as-is
+        resampler: Resampler backend (the session's, passed explicitly)
+    
+    Returns:
+        Tuple of (log note, resample operations performed)
+    """
+    slicer = _worker_slicers.get(resampler)
+    if slicer is None:
+        slicer = _worker_slicers[resampler] = AlignedSlicer(resampler)
+    resamples_before = resample_count()
+    
+    force_mono = StemValidator.should_force_mono_static(job.group, job.instrument)
+    if job.audio is not None:
+        # Already decoded: the same save_audio as export_stem
+        attached = job.audio.attach() if isinstance(job.audio, SharedAudio) else None
+        try:
+            slicer.audio_processor.save_audio(
+                audio_data=attached.array if attached is not None else job.audio,
+                sample_rate=job.sample_rate,
+                output_path=audio_path,
+                force_mono=force_mono
+            )
+        finally:
+            if attached is not None:
+                attached.close()
+        midi_data = job.midi_data
+        note = ""
+    elif job.start_bars is None:
+        # Full Track: streamed (or copied) file to file
+        note = _write_stem_file(slicer.audio_processor, job.audio_path, audio_path,
+                                force_mono, fast_path)
+        midi_data = job.midi_path
+    else:
+        # Loop Slicer: slice, then the same save_audio as export_stem
+        audio_data, sample_rate, midi_data = slicer.slice_pair(
+            job.audio_path, job.midi_path, job.start_bars, job.end_bars, tempo=job.tempo
+        )
+        slicer.audio_processor.save_audio(
+            audio_data=audio_data,
+            sample_rate=sample_rate,
+            output_path=audio_path,
+            force_mono=force_mono
+        )
+        note = ""
+    
+    if midi_path is not None and midi_data is not None:
+        _write_midi(midi_data, midi_path)
+    
+    return note, resample_count() - resamples_before
+
+
+def _remove_partial(*paths: Optional[Path]):
+    """Delete the output files of a stem that failed or was interrupted"""
+    for path in paths:
+        if path is not None:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                print(f"  ⚠ Could not remove partial file {path.name}: {e}")
+
+
+def _shareable(job: StemJob, staging: SharedArena) -> StemJob:
+    """Job with its decoded audio swapped for a shared-memory handle (for pickling)"""
+    if job.audio is None or isinstance(job.audio, SharedAudio):
+        return job
+    handle = find_shared(job.audio)
+    if handle is None:
+        handle = staging.share(staging.copy(job.audio))
+    return replace(job, audio=handle)
+
+
+def _write_stem_file(
+    processor: AudioProcessor,
+    audio_path: Union[str, Path],
+    output_path: Path,
+    force_mono: bool,
+    fast_path: bool
+) -> str:
+    """
+    Write a Full Track stem: copy the samples if already conformant, else stream-convert
+    
+    Returns:
+        Log note appended to the export message ("" when converted)
+    """
+    if fast_path and processor.is_export_conformant(audio_path, force_mono):
+        method = _copy_wav_samples(audio_path, output_path, hardlink=config.FAST_PATH_HARDLINK)
+        return f" (already conformant, {method})"
+    processor.save_audio_streaming(audio_path, output_path, force_mono=force_mono)
+    return ""
+
+
+def _write_midi(midi_data, midi_path: Path):
+    """
+    Write a stem's MIDI
+    
+    Args:
+        midi_data: Original MIDI path (copied byte for byte) or PrettyMIDI / NoteArrayMIDI object
+        midi_path: Output path
+    """
+    # V2.1 FIX: Byte-for-byte copy for Full Track Mode (Path objects)
+    # Full Track Mode: midi_data is Path → copy original bytes (no processing)
+    # Loop Slicer Mode: midi_data is PrettyMIDI or NoteArrayMIDI → write processed MIDI
+    if isinstance(midi_data, (str, Path)):
+        # Full Track Mode: Byte-for-byte copy (preserves timing perfectly)
+        archive_source.copy_file(Path(midi_data), midi_path)
+    elif hasattr(midi_data, "write"):
+        # Loop Slicer Mode: Write processed MIDI object
+        midi_data.write(str(midi_path))
+    else:
+        raise TypeError(f"Unsupported midi_data type: {type(midi_data)}")
+
+
+def _copy_wav_samples(src: Union[str, Path], dst: Path, hardlink: bool = False) -> str:
+    """
+    Write a conformant 16-bit WAV as a fresh fmt+data header plus its samples
+    
+    Only the data chunk is copied, so metadata chunks (LIST, bext, iXML, ...)
+    and WAVE_FORMAT_EXTENSIBLE headers are dropped, as in a converted export.
+    Files that already consist of exactly that header and data are cloned
+    whole with _clone_file.
+    
+    Args:
+        src: Conformant source WAV (or ZIP/TAR member path)
+        dst: Destination path (must not exist yet)
+        hardlink: Allow a hardlink for files that are already canonical
+    
+    Returns:
+        Method used (as _clone_file)
+    """
+    with archive_source.open_source(src) as source:
+        with (open(source, 'rb') if isinstance(source, str) else nullcontext(source)) as f:
+            layout = read_wav_layout(f)
+            header = _pcm16_wav_header(layout.channels, layout.sample_rate, layout.frames)
+            file_size = f.seek(0, 2)
+            f.seek(0)
+            canonical = (file_size == len(header) + layout.data_bytes
+                         and f.read(len(header)) == header)
+            if not canonical:
+                with open(dst, 'wb') as f_out:
+                    f_out.write(header)
+                    return _copy_range(f, f_out, layout.data_offset, layout.data_bytes,
+                                       kernel_copy=isinstance(source, str))
+    return _clone_file(src, dst, hardlink=hardlink)
+
+
+def _pcm16_wav_header(channels: int, sample_rate: int, frames: int) -> bytes:
+    """44-byte RIFF/fmt/data header of a 16-bit PCM WAV (as soundfile writes it)"""
+    block_align = channels * 2
+    data_bytes = frames * block_align
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_bytes, b'WAVE',
+        b'fmt ', 16, WAVE_FORMAT_PCM, channels, sample_rate, sample_rate * block_align, block_align, 16,
+        b'data', data_bytes
+    )
+
+
+def _copy_range(f_in: BinaryIO, f_out: BinaryIO, offset: int, size: int, kernel_copy: bool) -> str:
+    """
+    Append size bytes of f_in, starting at offset, to f_out
+    
+    Args:
+        f_in: Source file
+        f_out: Destination file (positioned at its end)
+        offset: First byte to copy
+        size: Bytes to copy
+        kernel_copy: Try os.copy_file_range (f_in must be a file on disk)
+    
+    Returns:
+        "copy_file_range" or "copy"
+    """
+    done = 0
+    if kernel_copy and hasattr(os, "copy_file_range"):
+        f_out.flush()
+        try:
+            while done < size:
+                copied = os.copy_file_range(f_in.fileno(), f_out.fileno(), size - done, offset + done)
+                if copied == 0:
+                    break
+                done += copied
+        except OSError:
+            pass  # e.g. cross-device on older kernels; copy the rest below
+        f_out.seek(0, 2)
+        if done == size:
+            return "copy_file_range"
+    
+    f_in.seek(offset + done)
+    remaining = size - done
+    while remaining > 0:
+        block = f_in.read(min(remaining, 1024 * 1024))
+        if not block:
+            raise OSError("Unexpected end of file while copying audio data")
+        f_out.write(block)
+        remaining -= len(block)
+    return "copy"
+
+
+def _clone_file(src: Union[str, Path], dst: Path, hardlink: bool = False) -> str:
+    """
+    Copy a file without passing its bytes through Python where possible
+    
+    Tries a hardlink (if enabled), a copy-on-write clone (FICLONE on Linux,
+    clonefile on macOS), os.copy_file_range, then a regular copy. Archive
+    members are streamed with archive_source.copy_file.
+    
+    Args:
+        src: Source file (or ZIP/TAR member path)
+        dst: Destination path (must not exist yet)
+        hardlink: Try os.link first
+    
+    Returns:
+        Method used: "hardlink", "reflink", "copy_file_range" or "copy"
+    """
+    if archive_source.split_archive_path(src) is not None:
+        archive_source.copy_file(src, dst)
+        return "copy"
+    
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+    
+    if _reflink(src, dst):
+        return "reflink"
+    
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, 'rb') as f_in, open(dst, 'wb') as f_out:
+                remaining = os.fstat(f_in.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(f_in.fileno(), f_out.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return "copy_file_range"
+        except OSError:
+            pass  # e.g. cross-device on older kernels; fall back below
+    
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+def _reflink(src: Union[str, Path], dst: Path) -> bool:
+    """Copy-on-write clone of src at dst; False if the filesystem cannot do it"""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        try:
+            with open(src, 'rb') as f_in, open(dst, 'wb') as f_out:
+                fcntl.ioctl(f_out.fileno(), FICLONE, f_in.fileno())
+            return True
+        except OSError:
+            return False  # dst is left empty and overwritten by the fallback
+    
+    if sys.platform == "darwin":
+        # APFS clonefile(2); dst must not exist
+        clonefile = getattr(ctypes.CDLL(None, use_errno=True), "clonefile", None)
+        if clonefile is not None:
+            return clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+    
+    return False
+
+
 if __name__ == "__main__":
     # Test export system
     exporter = FileExporter()
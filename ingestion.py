@@ -5,56 +5,18 @@ Handles file discovery, fuzzy matching, and vocal filtering
 
 import os
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
-from rapidfuzz import fuzz
+from typing import List, Dict, Tuple, Optional, Sequence, Iterator, Union
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+import soundfile as sf
+from rapidfuzz import fuzz, process
 import config
-
-
-@dataclass(frozen=True)
-class AudioFile:
-    """Represents an audio file with its properties"""
-    path: Path
-    filename: str
-    normalized_name: str = ""
-    
-    def __post_init__(self):
-        # Use object.__setattr__ because dataclass is frozen
-        object.__setattr__(self, 'normalized_name', self._normalize_filename(self.filename))
-    
-    @staticmethod
-    def _normalize_filename(filename: str) -> str:
-        """Normalize filename for fuzzy matching"""
-        # Remove extension
-        name = Path(filename).stem
-        # Convert to lowercase
-        name = name.lower()
-        # Replace underscores and hyphens with spaces
-        name = name.replace('_', ' ').replace('-', ' ')
-        # Remove extra spaces
-        name = ' '.join(name.split())
-        return name
-
-
-@dataclass(frozen=True)
-class MIDIFile:
-    """Represents a MIDI file with its properties"""
-    path: Path
-    filename: str
-    normalized_name: str = ""
-    
-    def __post_init__(self):
-        # Use object.__setattr__ because dataclass is frozen
-        object.__setattr__(self, 'normalized_name', self._normalize_filename(self.filename))
-    
-    @staticmethod
-    def _normalize_filename(filename: str) -> str:
-        """Normalize filename for fuzzy matching"""
-        name = Path(filename).stem
-        name = name.lower()
-        name = name.replace('_', ' ').replace('-', ' ')
-        name = ' '.join(name.split())
-        return name
+import archive_source
+from catalog import AudioHeader, AudioFile, MIDIFile, FileCatalog
+from midi_header import read_midi_header
+from pairing import PairingEngine, IncrementalPairer
+from scan_index import ScanIndex
+from scanner import DirectoryScanner
 
 
 @dataclass
@@ -65,21 +27,62 @@ class FilePair:
     match_score: float = 0.0
     is_vocal: bool = False
     group: Optional[str] = None
+    track: str = ""  # Track folder under the source directory ("" = top level)
+
+
+@dataclass
+class _PairingScope:
+    """Progressive pairing state of one scope in FileIngester.pair_iter"""
+    pairer: IncrementalPairer
+    pairs: List[FilePair] = field(default_factory=list)
+    midi_files: List[MIDIFile] = field(default_factory=list)
+    new_audio: List[FilePair] = field(default_factory=list)
+    new_midi: List[MIDIFile] = field(default_factory=list)
 
 
 class FileIngester:
     """Handles file ingestion and auto-pairing"""
     
-    def __init__(self, source_directory: str, vocal_rights: str = "Exclusive"):
+    def __init__(
+        self,
+        source_directory: str,
+        vocal_rights: str = "Exclusive",
+        index_path: Optional[str] = None,
+        include: Optional[Sequence[str]] = None,
+        exclude: Optional[Sequence[str]] = None,
+        scan_workers: int = config.SCAN_WORKERS,
+        probe_headers: bool = False,
+        probe_workers: int = config.PROBE_WORKERS,
+        track_scope: bool = False
+    ):
         """
         Initialize the file ingester
         
         Args:
             source_directory: Path to the source directory containing audio/MIDI files
+                (or a single ZIP/TAR sample pack)
             vocal_rights: "Exclusive" or "Royalty_Free" (affects vocal filtering)
+            index_path: Optional SQLite scan index; rescans then only list changed directories
+            include: Glob patterns (relative to source) files must match; None = config default
+            exclude: Glob patterns (relative to source) to skip; None = config default
+            scan_workers: Concurrent directory listings
+            probe_headers: Read every file's header while scanning (sets .header on records)
+            probe_workers: Concurrent header reads
+            track_scope: Treat each top-level folder of the source directory as its
+                own track: files are only paired within their track folder
         """
         self.source_dir = Path(source_directory)
         self.vocal_rights = vocal_rights
+        self.index_path = index_path
+        self.probe_headers = probe_headers
+        self.probe_workers = probe_workers
+        self.track_scope = track_scope
+        self._scan_index: Optional[ScanIndex] = None  # Set when a scan goes through index_path
+        self.scanner = DirectoryScanner(
+            max_workers=scan_workers,
+            include=include,
+            exclude=exclude
+        )
         self.audio_files: List[AudioFile] = []
         self.midi_files: List[MIDIFile] = []
         self.pairs: List[FilePair] = []
@@ -88,42 +91,214 @@ class FileIngester:
         """
         Scan the source directory for audio and MIDI files (recursive and case-insensitive)
         V1.1: Now fully recursive with case-insensitive extension matching
+        Directories are listed concurrently; __MACOSX, ._* resource forks and
+        .DS_Store are skipped, and include/exclude globs are applied.
         
         Returns:
-            Tuple of (audio_files, midi_files)
+            Tuple of (audio_files, midi_files), sorted by path
+        """
+        for _ in self.scan_iter():
+            pass
+        
+        print(f"✓ Found {len(self.audio_files)} audio file(s)")
+        print(f"✓ Found {len(self.midi_files)} MIDI file(s)")
+        if self._scan_index is not None:
+            print(f"  ℹ Scan index: {self._scan_index.last_stats.summary()}")
+        if self.probe_headers:
+            self._print_probe_summary()
+        
+        return self.audio_files, self.midi_files
+    
+    def scan_iter(self) -> Iterator[Union[AudioFile, MIDIFile]]:
+        """
+        Scan the source directory, yielding files as soon as their folder is listed
+        
+        When the walk completes, self.audio_files and self.midi_files hold the
+        full catalog sorted by path (same result as scan_files). With
+        probe_headers enabled, header reads run on a thread pool alongside
+        the walk and every record has its .header set once this returns
+        (yielded records may not have it yet).
+        
+        Yields:
+            AudioFile and MIDIFile objects in discovery order
         """
         audio_files = []
         midi_files = []
         
+        if self.probe_headers:
+            with ThreadPoolExecutor(max_workers=max(1, self.probe_workers),
+                                    thread_name_prefix="probe") as pool:
+                for file_obj in self._discover_files():
+                    if isinstance(file_obj, AudioFile):
+                        audio_files.append(file_obj)
+                    else:
+                        midi_files.append(file_obj)
+                    pool.submit(self._probe_file, file_obj)
+                    yield file_obj
+        else:
+            for file_obj in self._discover_files():
+                if isinstance(file_obj, AudioFile):
+                    audio_files.append(file_obj)
+                else:
+                    midi_files.append(file_obj)
+                yield file_obj
+        
+        # Listings complete in any order; sort for deterministic results
+        audio_files.sort(key=_path_key)
+        midi_files.sort(key=_path_key)
+        
+        self.audio_files = audio_files
+        self.midi_files = midi_files
+    
+    def _discover_files(self) -> Iterator[Union[AudioFile, MIDIFile]]:
+        """Yield AudioFile/MIDIFile objects from the scan index or a fresh walk"""
+        source = os.path.abspath(str(self.source_dir))
+        if os.path.isfile(source) and archive_source.is_archive(source):
+            # The source itself is a sample pack archive
+            yield from self._archive_files(source, "")
+            return
+        
+        if self.index_path is not None:
+            # Rescans only list changed directories
+            self._scan_index = ScanIndex(self.index_path)
+            for record in self._scan_index.iter_scan(self.source_dir, scanner=self.scanner):
+                if record.kind == "archive":
+                    rel_path = os.path.relpath(record.path, source).replace(os.sep, "/")
+                    yield from self._archive_files(record.path, rel_path + "/")
+                    continue
+                file_cls = AudioFile if record.kind == "audio" else MIDIFile
+                yield file_cls.from_parts(record.directory, record.filename, record.normalized_name)
+            return
+        
         # Walk through directory recursively (including all subfolders)
-        for root, dirs, files in os.walk(self.source_dir):
-            for file in files:
-                file_path = Path(root) / file
-                ext = file_path.suffix.lower()  # Case-insensitive extension check
+        for listing in self.scanner.walk(str(self.source_dir)):
+            for file in listing.files:
+                if not self.scanner.accepts(listing, file):
+                    continue
+                
+                # Archive members are listed in place, without extracting
+                if archive_source.is_archive(file):
+                    yield from self._archive_files(os.path.join(listing.path, file),
+                                                   listing.rel_dir + file + "/")
+                    continue
+                
+                ext = os.path.splitext(file)[1].lower()  # Case-insensitive extension check
                 
                 # Check for audio files
                 if ext in config.SUPPORTED_AUDIO_FORMATS:
-                    audio_file = AudioFile(
-                        path=file_path,
-                        filename=file
-                    )
-                    audio_files.append(audio_file)
+                    yield AudioFile.from_parts(listing.path, file)
                 
                 # Check for MIDI files (case-insensitive: .mid, .MID, .midi, .MIDI)
                 elif ext in config.SUPPORTED_MIDI_FORMATS:
-                    midi_file = MIDIFile(
-                        path=file_path,
-                        filename=file
-                    )
-                    midi_files.append(midi_file)
+                    yield MIDIFile.from_parts(listing.path, file)
+    
+    def _archive_files(self, archive_path: str, rel_prefix: str) -> Iterator[Union[AudioFile, MIDIFile]]:
+        """
+        Yield records for the audio/MIDI members of one ZIP/TAR archive
         
-        self.audio_files = audio_files
-        self.midi_files = midi_files
+        Members get virtual paths (archive path + member name); __MACOSX and
+        ._* entries are skipped and include/exclude globs see rel_prefix + member.
+        
+        Args:
+            archive_path: Archive file path
+            rel_prefix: Archive path relative to the source directory, ending in "/"
+        """
+        try:
+            members = archive_source.list_members(archive_path)
+        except OSError as e:
+            print(f"⚠ Skipping unreadable archive: {e}")
+            return
+        
+        for member, _ in members:
+            filename = member.rsplit("/", 1)[-1]
+            if not self.scanner.keep_file(rel_prefix + member, filename):
+                continue
+            
+            ext = os.path.splitext(filename)[1].lower()
+            if ext in config.SUPPORTED_AUDIO_FORMATS:
+                file_cls = AudioFile
+            elif ext in config.SUPPORTED_MIDI_FORMATS:
+                file_cls = MIDIFile
+            else:
+                continue
+            
+            directory = os.path.dirname(archive_source.member_path(archive_path, member))
+            yield file_cls.from_parts(directory, filename)
+    
+    def catalog(self) -> FileCatalog:
+        """
+        Columnar copy of the scanned files (compact to store or send to workers)
+        
+        Returns:
+            FileCatalog of audio files followed by MIDI files
+        """
+        return FileCatalog.from_files(self.audio_files + self.midi_files)
+    
+    def load_catalog(self, catalog: FileCatalog):
+        """
+        Restore scanned files from a catalog instead of scanning
+        
+        Args:
+            catalog: FileCatalog (e.g. from catalog() in another process)
+        """
+        self.audio_files = catalog.audio_files()
+        self.midi_files = catalog.midi_files()
+    
+    def probe_files(self, max_workers: Optional[int] = None) -> int:
+        """
+        Read the header of every scanned file that has not been probed yet
+        
+        Audio headers come from sf.info and MIDI headers from a meta-event
+        scan (midi_header.read_midi_header); no audio is decoded and no note
+        objects are built. Results are stored on the records' .header
+        attribute; files that cannot be read keep header=None.
+        
+        Args:
+            max_workers: Concurrent header reads (defaults to self.probe_workers)
+        
+        Returns:
+            Number of files probed
+        """
+        pending = [f for f in self.audio_files + self.midi_files if f.header is None]
+        workers = max(1, max_workers if max_workers is not None else self.probe_workers)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe") as pool:
+            list(pool.map(self._probe_file, pending))
         
-        print(f"✓ Found {len(audio_files)} audio file(s)")
-        print(f"✓ Found {len(midi_files)} MIDI file(s)")
+        self._print_probe_summary()
+        return len(pending)
+    
+    @staticmethod
+    def _probe_file(file_obj: Union[AudioFile, MIDIFile]):
+        """Read one file's header and attach it to the record (header stays None on failure)"""
+        try:
+            with archive_source.open_source(file_obj.path) as source:
+                if isinstance(file_obj, AudioFile):
+                    info = sf.info(source)
+                    header = AudioHeader(
+                        sample_rate=info.samplerate,
+                        channels=info.channels,
+                        frames=info.frames,
+                        duration=info.duration,
+                        subtype=info.subtype
+                    )
+                else:
+                    header = read_midi_header(source)
+        except Exception:
+            return
         
-        return audio_files, midi_files
+        # Records are immutable (catalog._FileRecord rejects __setattr__); the
+        # header is filled in once by the probe
+        object.__setattr__(file_obj, 'header', header)
+    
+    def _print_probe_summary(self):
+        """Print header probe results"""
+        files = self.audio_files + self.midi_files
+        unreadable = [f.filename for f in files if f.header is None]
+        print(f"✓ Probed {len(files) - len(unreadable)} file header(s)")
+        if unreadable:
+            print(f"  ⚠ {len(unreadable)} unreadable file(s): {', '.join(unreadable[:5])}"
+                  + (" …" if len(unreadable) > 5 else ""))
     
     def is_vocal_file(self, audio_file: AudioFile) -> bool:
         """
@@ -171,6 +346,42 @@ class FileIngester:
             return True
         return False
     
+    def track_of(self, path: Path) -> str:
+        """
+        Track folder a file belongs to: its first folder (or archive) under the source directory
+        
+        Args:
+            path: File path inside the source directory
+            
+        Returns:
+            Folder name, or "" for files at the top level
+        """
+        rel = os.path.relpath(str(path), os.path.abspath(str(self.source_dir)))
+        parts = rel.split(os.sep)
+        if len(parts) < 2:
+            return ""
+        # A pack archive is a track folder too: "Fall Down.zip" -> "Fall Down"
+        for ext in config.SUPPORTED_ARCHIVE_FORMATS:
+            if parts[0].lower().endswith(ext):
+                return parts[0][:-len(ext)]
+        return parts[0]
+    
+    def _scope_of(self, path: Path) -> str:
+        """Pairing scope of a file (a single scope unless track_scope is enabled)"""
+        return self.track_of(path) if self.track_scope else ""
+    
+    def tracks(self) -> Dict[str, List[FilePair]]:
+        """
+        Group the current pairs by track folder
+        
+        Returns:
+            Dictionary of track folder -> pairs, in track name order
+        """
+        grouped: Dict[str, List[FilePair]] = {}
+        for pair in sorted(self.pairs, key=lambda p: p.track):
+            grouped.setdefault(pair.track, []).append(pair)
+        return grouped
+    
     def find_best_midi_match(self, audio_file: AudioFile) -> Optional[Tuple[MIDIFile, float]]:
         """
         Find the best MIDI match for an audio file using fuzzy matching
@@ -181,26 +392,23 @@ class FileIngester:
         Returns:
             Tuple of (best_match, score) or None if no good match found
         """
-        if not self.midi_files:
+        scope = self._scope_of(audio_file.path)
+        midi_files = [m for m in self.midi_files if self._scope_of(m.path) == scope]
+        if not midi_files:
             return None
         
-        best_match = None
-        best_score = 0.0
-        
-        for midi_file in self.midi_files:
-            # Use token sort ratio for better matching with reordered words
-            score = fuzz.token_sort_ratio(
-                audio_file.normalized_name,
-                midi_file.normalized_name
-            )
-            
-            if score > best_score:
-                best_score = score
-                best_match = midi_file
+        # Use token sort ratio for better matching with reordered words
+        result = process.extractOne(
+            audio_file.normalized_name,
+            [midi_file.normalized_name for midi_file in midi_files],
+            scorer=fuzz.token_sort_ratio,
+            score_cutoff=config.FUZZY_MATCH_THRESHOLD
+        )
         
         # Only return if score meets threshold
-        if best_score >= config.FUZZY_MATCH_THRESHOLD:
-            return (best_match, best_score)
+        if result is not None:
+            _, best_score, best_index = result
+            return (midi_files[best_index], best_score)
         
         return None
     
@@ -208,11 +416,17 @@ class FileIngester:
         """
         Automatically pair audio and MIDI files using fuzzy matching
         
+        All audio/MIDI scores are computed in one batched call and MIDI files
+        are assigned globally (Hungarian method), so each MIDI goes to the audio
+        file it matches best and results do not depend on scan order. With
+        track_scope enabled, every track folder is an independent pairing
+        problem and the folders are paired in parallel.
+        
         Returns:
             List of FilePair objects
         """
-        pairs = []
-        used_midi_files = set()
+        candidates = []
+        vocal_flags = []
         
         for audio_file in self.audio_files:
             # Check if it's a vocal file
@@ -223,23 +437,50 @@ class FileIngester:
                 print(f"⚠ Skipping vocal file (Royalty_Free mode): {audio_file.filename}")
                 continue
             
-            # Try to find matching MIDI
+            candidates.append(audio_file)
+            vocal_flags.append(is_vocal)
+        
+        # Split into pairing scopes: (audio indices, MIDI indices)
+        scopes: Dict[str, Tuple[List[int], List[int]]] = {}
+        for idx, audio_file in enumerate(candidates):
+            scopes.setdefault(self._scope_of(audio_file.path), ([], []))[0].append(idx)
+        for idx, midi_file in enumerate(self.midi_files):
+            scopes.setdefault(self._scope_of(midi_file.path), ([], []))[1].append(idx)
+        
+        def pair_scope(scope: Tuple[List[int], List[int]]):
+            audio_idx, midi_idx = scope
+            # Scopes already run in parallel; keep each engine single-threaded then
+            engine = PairingEngine(workers=1 if len(scopes) > 1 else config.PAIRING_WORKERS)
+            local = engine.pair(
+                [candidates[i].normalized_name for i in audio_idx],
+                [self.midi_files[i].normalized_name for i in midi_idx]
+            )
+            assignment = {audio_idx[a]: (midi_idx[m], score) for a, (m, score) in local.items()}
+            return assignment, engine.last_stats
+        
+        # Globally optimal MIDI assignment within each scope
+        assignment = {}
+        for scope_assignment, stats in _map_scopes(pair_scope, list(scopes.values())):
+            assignment.update(scope_assignment)
+            if stats is not None:
+                print(f"ℹ Candidate blocking: {stats.summary()}")
+        
+        pairs = []
+        for idx, (audio_file, is_vocal) in enumerate(zip(candidates, vocal_flags)):
             midi_match = None
             match_score = 0.0
             
-            match_result = self.find_best_midi_match(audio_file)
-            if match_result:
-                midi_file, match_score = match_result
-                if midi_file not in used_midi_files:
-                    midi_match = midi_file
-                    used_midi_files.add(midi_file)
+            if idx in assignment:
+                midi_idx, match_score = assignment[idx]
+                midi_match = self.midi_files[midi_idx]
             
             # Create pair
             pair = FilePair(
                 audio=audio_file,
                 midi=midi_match,
                 match_score=match_score,
-                is_vocal=is_vocal
+                is_vocal=is_vocal,
+                track=self.track_of(audio_file.path)
             )
             
             pairs.append(pair)
@@ -248,12 +489,127 @@ class FileIngester:
         
         # Print pairing results
         print(f"\n✓ Created {len(pairs)} file pair(s)")
+        if self.track_scope:
+            print(f"  - {len(self.tracks())} track folder(s)")
         paired_count = sum(1 for p in pairs if p.midi is not None)
         print(f"  - {paired_count} with MIDI")
         print(f"  - {len(pairs) - paired_count} without MIDI")
         
         return pairs
     
+    def pair_iter(self, batch_size: int = config.PAIR_ITER_BATCH_SIZE) -> Iterator[FilePair]:
+        """
+        Scan and pair progressively, yielding pairs while the walk is still running
+        
+        Every batch of newly discovered files is scored against everything
+        found so far in its scope and that scope's assignment is re-solved
+        (scopes touched by a batch are refined in parallel). A FilePair is
+        yielded when its audio file is first found and again whenever its MIDI
+        assignment changes (the same object is updated in place), so callers
+        can key on the object or on pair.audio.path and render partial results.
+        Once the walk ends, every scope is solved again with its files in path
+        order (score ties would otherwise depend on discovery order) and the
+        pairs that change are yielded, so self.pairs then holds the same
+        pairs as auto_pair_files, in audio path order.
+        
+        Args:
+            batch_size: Files discovered between pairing refinements
+        
+        Yields:
+            New or updated FilePair objects
+        """
+        scopes: Dict[str, _PairingScope] = {}
+        pending = 0
+        
+        def get_scope(path: Path) -> _PairingScope:
+            key = self._scope_of(path)
+            if key not in scopes:
+                # Scopes are refined in parallel; keep each engine single-threaded then
+                workers = 1 if self.track_scope else config.PAIRING_WORKERS
+                scopes[key] = _PairingScope(IncrementalPairer(PairingEngine(workers=workers)))
+            return scopes[key]
+        
+        def refine_scope(scope: _PairingScope) -> List[FilePair]:
+            scope.pairer.add(
+                [pair.audio.normalized_name for pair in scope.new_audio],
+                [midi_file.normalized_name for midi_file in scope.new_midi]
+            )
+            scope.pairs.extend(scope.new_audio)
+            scope.midi_files.extend(scope.new_midi)
+            changed = list(scope.new_audio)
+            scope.new_audio.clear()
+            scope.new_midi.clear()
+            
+            return apply_assignment(scope, scope.pairer.solve(), changed)
+        
+        def finalize_scope(scope: _PairingScope) -> List[FilePair]:
+            audio_order = sorted(range(len(scope.pairs)), key=lambda i: _path_key(scope.pairs[i].audio))
+            midi_order = sorted(range(len(scope.midi_files)), key=lambda i: _path_key(scope.midi_files[i]))
+            return apply_assignment(scope, scope.pairer.solve_ordered(audio_order, midi_order), [])
+        
+        def apply_assignment(
+            scope: _PairingScope,
+            assignment: Dict[int, Tuple[int, float]],
+            changed: List[FilePair]
+        ) -> List[FilePair]:
+            changed_ids = {id(pair) for pair in changed}
+            for idx, pair in enumerate(scope.pairs):
+                midi_idx, score = assignment.get(idx, (None, 0.0))
+                midi_match = scope.midi_files[midi_idx] if midi_idx is not None else None
+                if pair.midi is not midi_match or pair.match_score != score:
+                    pair.midi = midi_match
+                    pair.match_score = score
+                    if id(pair) not in changed_ids:
+                        changed.append(pair)
+            return changed
+        
+        def refine() -> List[FilePair]:
+            dirty = [s for s in scopes.values() if s.new_audio or s.new_midi]
+            return [pair for changed in _map_scopes(refine_scope, dirty) for pair in changed]
+        
+        for file_obj in self.scan_iter():
+            if isinstance(file_obj, AudioFile):
+                is_vocal = self.is_vocal_file(file_obj)
+                
+                # If Royalty_Free vocals, skip vocal stems
+                if self.vocal_rights == "Royalty_Free" and is_vocal:
+                    print(f"⚠ Skipping vocal file (Royalty_Free mode): {file_obj.filename}")
+                    continue
+                
+                get_scope(file_obj.path).new_audio.append(FilePair(
+                    audio=file_obj,
+                    is_vocal=is_vocal,
+                    track=self.track_of(file_obj.path)
+                ))
+            else:
+                get_scope(file_obj.path).new_midi.append(file_obj)
+            
+            pending += 1
+            if pending >= batch_size:
+                pending = 0
+                yield from refine()
+        
+        yield from refine()
+        
+        # Same order as auto_pair_files, so the final pairs match it exactly
+        final = _map_scopes(finalize_scope, list(scopes.values()))
+        yield from [pair for changed in final for pair in changed]
+        
+        pairs = [pair for scope in scopes.values() for pair in scope.pairs]
+        pairs.sort(key=lambda p: _path_key(p.audio))
+        self.pairs = pairs
+        
+        print(f"✓ Found {len(self.audio_files)} audio file(s)")
+        print(f"✓ Found {len(self.midi_files)} MIDI file(s)")
+        if self.probe_headers:
+            self._print_probe_summary()
+        print(f"\n✓ Created {len(pairs)} file pair(s)")
+        if self.track_scope:
+            print(f"  - {len(self.tracks())} track folder(s)")
+        paired_count = sum(1 for p in pairs if p.midi is not None)
+        print(f"  - {paired_count} with MIDI")
+        print(f"  - {len(pairs) - paired_count} without MIDI")
+    
     def validate_pairs(self) -> List[str]:
         """
         Validate pairs according to grouping rules
@@ -284,8 +640,15 @@ class FileIngester:
         
         for i, pair in enumerate(self.pairs, 1):
             report.append(f"\n{i}. {pair.audio.filename}")
+            if pair.audio.header:
+                h = pair.audio.header
+                report.append(f"   ↳ {h.sample_rate} Hz, {h.channels} ch, {h.subtype}, {h.duration:.1f}s")
             if pair.midi:
                 report.append(f"   ↳ MIDI: {pair.midi.filename} (Match: {pair.match_score:.0f}%)")
+                if pair.midi.header:
+                    h = pair.midi.header
+                    tempo_map = " (tempo map)" if h.has_tempo_map else ""
+                    report.append(f"     {h.tempo:.1f} BPM, {h.time_signature[0]}/{h.time_signature[1]}{tempo_map}")
             else:
                 report.append(f"   ↳ MIDI: None")
             
@@ -297,6 +660,20 @@ class FileIngester:
         return "\n".join(report)
 
 
+def _path_key(file_obj: Union[AudioFile, MIDIFile]) -> str:
+    """Sort key equal to str(file_obj.path), without building the Path"""
+    return os.path.join(file_obj.directory, file_obj.filename)
+
+
+def _map_scopes(func, scopes: list) -> list:
+    """Run func over pairing scopes, in parallel when there is more than one"""
+    if len(scopes) <= 1:
+        return [func(scope) for scope in scopes]
+    with ThreadPoolExecutor(max_workers=config.TRACK_PAIRING_WORKERS,
+                            thread_name_prefix="pair") as pool:
+        return list(pool.map(func, scopes))
+
+
 if __name__ == "__main__":
     # Test with sample data
     import sys
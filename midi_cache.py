@@ -0,0 +1,144 @@
+"""
+Parsed MIDI cache
+Process-wide LRU cache of parsed MIDI files, so the info panel, piano roll,
+slicing and export parse each .mid once. Entries are keyed by (path, size,
+mtime) like audio_cache, so edited files are parsed again. Header-only
+metadata (midi_header.MIDIHeader) and note arrays (note_array.NoteArrayMIDI)
+are cached the same way.
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+import pretty_midi
+import config
+import archive_source
+from midi_header import MIDIHeader, read_midi_header
+from note_array import NoteArrayMIDI
+
+
+CacheKey = Tuple[str, str, int, int]  # (kind, path, size, mtime_ns)
+
+
+class MIDICache:
+    """
+    LRU cache of PrettyMIDI objects, MIDI headers and note arrays
+    
+    Cached objects are shared by every caller; treat them as read-only
+    (slice_midi and friends build new objects). Thread-safe.
+    """
+    
+    def __init__(self, max_entries: int = config.MIDI_CACHE_ENTRIES):
+        """
+        Args:
+            max_entries: Parsed files and headers kept (0 disables the cache)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def load_midi(self, midi_path: Union[str, Path]) -> pretty_midi.PrettyMIDI:
+        """
+        Parsed MIDI file (parsed on the first call, then from the cache)
+        
+        Args:
+            midi_path: Path to MIDI file (or ZIP/TAR member path)
+        
+        Returns:
+            PrettyMIDI object
+        """
+        return self._get("midi", midi_path, _parse_midi)
+    
+    def load_notes(self, midi_path: Union[str, Path]) -> NoteArrayMIDI:
+        """
+        Note arrays of a MIDI file (converted from the cached parse once)
+        
+        Args:
+            midi_path: Path to MIDI file (or ZIP/TAR member path)
+        
+        Returns:
+            NoteArrayMIDI
+        """
+        return self._get("notes", midi_path, lambda path: NoteArrayMIDI.from_pretty_midi(self.load_midi(path)))
+    
+    def load_header(self, midi_path: Union[str, Path]) -> MIDIHeader:
+        """
+        Tempo, time signature and length from the meta events only
+        
+        Args:
+            midi_path: Path to MIDI file (or ZIP/TAR member path)
+        
+        Returns:
+            MIDIHeader
+        
+        Raises:
+            midi_header.MIDIHeaderError: Not a readable Standard MIDI File
+        """
+        return self._get("header", midi_path, _read_header)
+    
+    def _get(self, kind: str, midi_path: Union[str, Path], loader: Callable[[Union[str, Path]], Any]) -> Any:
+        content_key = archive_source.content_key(midi_path)
+        if self.max_entries <= 0 or content_key is None:
+            return loader(midi_path)
+        key = (kind,) + content_key
+        
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        
+        # Parse outside the lock (two threads may both parse a new file once)
+        value = loader(midi_path)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Entry count and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _parse_midi(midi_path: Union[str, Path]) -> pretty_midi.PrettyMIDI:
+    with archive_source.open_source(midi_path) as source:
+        return pretty_midi.PrettyMIDI(source)
+
+
+def _read_header(midi_path: Union[str, Path]) -> MIDIHeader:
+    with archive_source.open_source(midi_path) as source:
+        return read_midi_header(source)
+
+
+_cache: Optional[MIDICache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> MIDICache:
+    """The process-wide cache (created from config on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MIDICache()
+        return _cache
@@ -0,0 +1,282 @@
+"""
+Header-only MIDI metadata reader
+Minimal Standard MIDI File scanner: reads tempo, time signature and length
+from meta events without building note objects
+"""
+
+import struct
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
+
+
+DEFAULT_TEMPO_US = 500000  # 120 BPM, the SMF default when no tempo event is present
+
+
+@dataclass
+class MIDIHeader:
+    """MIDI file metadata gathered from the header and meta events only"""
+    format: int
+    num_tracks: int
+    ticks_per_beat: int
+    tempo: float  # BPM in effect at time 0 (from the first track, like PrettyMIDI)
+    time_signature: Tuple[int, int]  # First time signature (4/4 if none)
+    has_tempo_map: bool  # More than one tempo in effect over the file
+    end_tick: int  # Last end-of-track tick across all tracks
+    duration: float  # end_tick converted to seconds with the tempo map
+    note_count: int
+    end_time: float = 0.0  # Time of the last note-off/controller/meta event (PrettyMIDI.get_end_time)
+    tempo_changes: List[Tuple[int, int]] = field(default_factory=list, repr=False)
+
+
+class MIDIHeaderError(ValueError):
+    """Raised when a file is not a readable Standard MIDI File"""
+
+
+def read_midi_header(source: Union[str, Path, BinaryIO]) -> MIDIHeader:
+    """
+    Scan a Standard MIDI File for its meta events
+    
+    Channel and SysEx events are skipped by length; only tempo (FF 51), time
+    signature (FF 58) and end-of-track positions are recorded. Note-on events
+    are counted but no note objects are created. As in PrettyMIDI, tempo and
+    time signature events are only read from the first track, so the tempo
+    matches the timeline slicing uses.
+    
+    Args:
+        source: Path to a .mid file or a binary file object
+    
+    Returns:
+        MIDIHeader
+    
+    Raises:
+        MIDIHeaderError: Not an SMF, truncated, or an invalid tempo
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            data = f.read()
+    else:
+        data = source.read()
+    
+    if len(data) < 14 or data[:4] != b"MThd":
+        raise MIDIHeaderError("Not a Standard MIDI File (missing MThd)")
+    
+    header_len = struct.unpack(">I", data[4:8])[0]
+    fmt, num_tracks, division = struct.unpack(">HHH", data[8:14])
+    pos = 8 + header_len
+    
+    tempo_events: List[Tuple[int, int]] = []
+    time_signatures: List[Tuple[int, int, int]] = []
+    end_tick = 0
+    last_event_tick = 0
+    note_count = 0
+    tracks_read = 0
+    
+    while pos + 8 <= len(data) and tracks_read < num_tracks:
+        chunk_type = data[pos:pos + 4]
+        chunk_len = struct.unpack(">I", data[pos + 4:pos + 8])[0]
+        start = pos + 8
+        end = start + chunk_len
+        if end > len(data):
+            raise MIDIHeaderError("Truncated chunk (file ends inside it)")
+        pos = end
+        
+        if chunk_type != b"MTrk":
+            continue
+        tracks_read += 1
+        
+        track_end, notes, last_event = _scan_track(data, start, end, tempo_events, time_signatures,
+                                                   first_track=tracks_read == 1)
+        end_tick = max(end_tick, track_end)
+        last_event_tick = max(last_event_tick, last_event)
+        note_count += notes
+    
+    tempo_changes = _tempo_map(tempo_events)
+    last_event_tick = max(last_event_tick, tempo_changes[-1][0])  # Repeated tempos don't count
+    time_signatures.sort()
+    
+    if division & 0x8000:
+        # SMPTE timing: ticks are frames * subframes per second
+        fps = 256 - (division >> 8)
+        ticks_per_second = fps * (division & 0xFF)
+        ticks_per_beat = 0
+        duration = end_tick / ticks_per_second if ticks_per_second else 0.0
+        end_time = last_event_tick / ticks_per_second if ticks_per_second else 0.0
+        tempo = 60_000_000 / tempo_changes[0][1]
+    else:
+        ticks_per_beat = division
+        duration = _ticks_to_seconds(end_tick, tempo_changes, ticks_per_beat)
+        end_time = _ticks_to_seconds(last_event_tick, tempo_changes, ticks_per_beat)
+        # Same float steps as PrettyMIDI (BPM -> seconds per tick -> BPM)
+        tick_scale = 60.0 / ((6e7 / tempo_changes[0][1]) * ticks_per_beat)
+        tempo = 60.0 / (tick_scale * ticks_per_beat)
+    
+    return MIDIHeader(
+        format=fmt,
+        num_tracks=num_tracks,
+        ticks_per_beat=ticks_per_beat,
+        tempo=tempo,
+        time_signature=(time_signatures[0][1], time_signatures[0][2]) if time_signatures else (4, 4),
+        has_tempo_map=len(tempo_changes) > 1,
+        end_tick=end_tick,
+        duration=duration,
+        note_count=note_count,
+        end_time=end_time,
+        tempo_changes=tempo_changes
+    )
+
+
+def _read_varlen(data: bytes, pos: int) -> Tuple[int, int]:
+    """Read a variable-length quantity; returns (value, new position)"""
+    value = 0
+    for _ in range(4):
+        if pos >= len(data):
+            raise MIDIHeaderError("Truncated variable-length value")
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return value, pos
+
+
+def _scan_track(
+    data: bytes,
+    pos: int,
+    end: int,
+    tempo_events: List[Tuple[int, int]],
+    time_signatures: List[Tuple[int, int, int]],
+    first_track: bool = True
+) -> Tuple[int, int, int]:
+    """
+    Scan one MTrk chunk; returns (last tick, note-on count, last event tick)
+    
+    Tempo and time signatures are recorded for the first track only. The
+    last event tick covers what PrettyMIDI.get_end_time counts: note-offs
+    that close a note, controllers and pitch bends that end up in an
+    instrument, text/lyrics, and the first track's time and key signature
+    events (tempo changes are added by the caller).
+    """
+    tick = 0
+    status = 0
+    notes = 0
+    last_event = 0
+    
+    # Enough of PrettyMIDI's instrument bookkeeping to know which events it keeps
+    programs = [0] * 16
+    open_notes: Dict[Tuple[int, int], List[int]] = {}  # (channel, pitch) -> note-on ticks
+    instruments = set()  # (program, channel) with at least one note
+    stragglers: Dict[int, Optional[int]] = {}  # channel -> last controller tick before any note (None once kept)
+    
+    while pos < end:
+        delta, pos = _read_varlen(data, pos)
+        tick += delta
+        if pos >= end:
+            break
+        
+        byte = data[pos]
+        if byte & 0x80:
+            status = byte
+            pos += 1
+        elif status == 0:
+            raise MIDIHeaderError("Running status without a previous status byte")
+        
+        if status == 0xFF:
+            # Meta event
+            if pos >= end:
+                raise MIDIHeaderError("Meta event without a type byte")
+            meta_type = data[pos]
+            length, pos = _read_varlen(data, pos + 1)
+            payload = data[pos:pos + length]
+            if len(payload) != length or pos + length > end:
+                raise MIDIHeaderError("Truncated meta event")
+            pos += length
+            if meta_type == 0x51 and length == 3:
+                tempo = int.from_bytes(payload, "big")
+                if tempo == 0:
+                    raise MIDIHeaderError("Tempo event of 0 microseconds per beat")
+                if first_track:
+                    tempo_events.append((tick, tempo))
+            elif meta_type == 0x58 and length >= 2:
+                if first_track:
+                    time_signatures.append((tick, payload[0], 2 ** payload[1]))
+                    last_event = tick
+            elif meta_type == 0x59 and first_track:
+                last_event = tick  # Key signature
+            elif meta_type in (0x01, 0x05):
+                last_event = tick  # Text / lyrics (read from every track)
+            elif meta_type == 0x2F:
+                break
+            status = 0  # Meta events cancel running status
+        elif status in (0xF0, 0xF7):
+            # SysEx
+            length, pos = _read_varlen(data, pos)
+            pos += length
+            status = 0
+        else:
+            kind = status & 0xF0
+            channel = status & 0x0F
+            size = 1 if kind in (0xC0, 0xD0) else 2
+            if pos + size > end:
+                raise MIDIHeaderError("Truncated channel event")
+            
+            if kind == 0xC0:
+                programs[channel] = data[pos]
+            elif kind == 0x90 and data[pos + 1] > 0:
+                notes += 1
+                open_notes.setdefault((channel, data[pos]), []).append(tick)
+            elif kind in (0x80, 0x90):
+                # Note-off: closes the notes started on earlier ticks
+                started = open_notes.pop((channel, data[pos]), None)
+                if started is not None and any(start != tick for start in started):
+                    last_event = tick
+                    if tick in started:
+                        open_notes[(channel, data[pos])] = [start for start in started if start == tick]
+                    if (programs[channel], channel) not in instruments:
+                        instruments.add((programs[channel], channel))
+                        if stragglers.get(channel) is not None:
+                            last_event = max(last_event, stragglers[channel])
+                        if channel in stragglers:
+                            stragglers[channel] = None
+            elif kind in (0xB0, 0xE0):
+                # Controllers before the channel's first note are only kept if
+                # a note follows on that channel
+                if (programs[channel], channel) in instruments or (
+                        channel in stragglers and stragglers[channel] is None):
+                    last_event = tick
+                else:
+                    stragglers[channel] = tick
+            pos += size
+    
+    return tick, notes, last_event
+
+
+def _tempo_map(tempo_events: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sorted (tick, microseconds per beat) list starting at tick 0, duplicates removed"""
+    tempo_events = sorted(tempo_events, key=lambda e: e[0])
+    changes = [(0, DEFAULT_TEMPO_US)]
+    for tick, tempo in tempo_events:
+        if tick == changes[-1][0]:
+            changes[-1] = (tick, tempo)
+        elif tempo != changes[-1][1]:
+            changes.append((tick, tempo))
+    return changes
+
+
+def _ticks_to_seconds(
+    tick: int,
+    tempo_changes: List[Tuple[int, int]],
+    ticks_per_beat: int
+) -> float:
+    """Convert an absolute tick to seconds using a tempo map (same float steps as PrettyMIDI)"""
+    if ticks_per_beat <= 0:
+        return 0.0
+    
+    seconds = 0.0
+    for i, (change_tick, tempo) in enumerate(tempo_changes):
+        tick_scale = 60.0 / ((6e7 / tempo) * ticks_per_beat)
+        next_tick = tempo_changes[i + 1][0] if i + 1 < len(tempo_changes) else None
+        if next_tick is None or tick <= next_tick:
+            return seconds + tick_scale * (tick - change_tick)
+        seconds += tick_scale * (next_tick - change_tick)
+    return seconds
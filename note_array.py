@@ -0,0 +1,351 @@
+"""
+Note-array MIDI model
+Notes of each instrument as one structured NumPy array (start, end, pitch,
+velocity), so slicing is a few mask operations instead of a loop over
+pretty_midi.Note objects, and sliced MIDI is written straight to a Standard
+MIDI File. PrettyMIDI is only used at the edges (parsing, and callers that
+need PrettyMIDI objects). Files written here are byte-identical to
+to_pretty_midi().write().
+"""
+
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pretty_midi
+
+
+NOTE_DTYPE = np.dtype([
+    ("start", np.float64),  # Seconds
+    ("end", np.float64),  # Seconds
+    ("pitch", np.uint8),
+    ("velocity", np.uint8),
+])
+
+DEFAULT_RESOLUTION = 220  # Ticks per beat of a new PrettyMIDI (what sliced files are written with)
+DEFAULT_TEMPO = 120.0  # BPM when a file has no tempo event
+
+# Event order at equal ticks, as in PrettyMIDI.write
+_ORDER_TEMPO = 1
+_ORDER_TIME_SIGNATURE = 2
+
+
+@dataclass
+class InstrumentNotes:
+    """One instrument's notes (file order) and its program"""
+    program: int
+    is_drum: bool
+    name: str
+    notes: np.ndarray  # NOTE_DTYPE
+    
+    @property
+    def note_count(self) -> int:
+        return len(self.notes)
+
+
+@dataclass
+class NoteArrayMIDI:
+    """
+    Single-tempo MIDI as note arrays
+    
+    Holds what slicing keeps (tempo, time signatures, notes per instrument);
+    pitch bends, control changes and tempo maps are not represented.
+    Treat instances as read-only: they are cached and shared (midi_cache).
+    """
+    tempo: float
+    time_signatures: List[Tuple[int, int, float]] = field(default_factory=list)  # (numerator, denominator, time)
+    instruments: List[InstrumentNotes] = field(default_factory=list)
+    resolution: int = DEFAULT_RESOLUTION
+    
+    @classmethod
+    def from_pretty_midi(cls, midi_data: pretty_midi.PrettyMIDI, tempo: Optional[float] = None) -> "NoteArrayMIDI":
+        """
+        Convert a parsed file (one pass over its notes)
+        
+        Args:
+            midi_data: PrettyMIDI object
+            tempo: Tempo in BPM (default: first tempo of the file, as MIDIProcessor.get_tempo)
+        
+        Returns:
+            NoteArrayMIDI
+        """
+        if tempo is None:
+            tempo_times, tempos = midi_data.get_tempo_changes()
+            tempo = float(tempos[0]) if len(tempo_times) > 0 else DEFAULT_TEMPO
+        
+        instruments = []
+        for instrument in midi_data.instruments:
+            notes = np.array(
+                [(note.start, note.end, note.pitch, note.velocity) for note in instrument.notes],
+                dtype=NOTE_DTYPE
+            )
+            instruments.append(InstrumentNotes(instrument.program, instrument.is_drum, instrument.name, notes))
+        
+        return cls(
+            tempo=tempo,
+            time_signatures=[(ts.numerator, ts.denominator, ts.time) for ts in midi_data.time_signature_changes],
+            instruments=instruments,
+            resolution=midi_data.resolution
+        )
+    
+    @property
+    def time_signature(self) -> Tuple[int, int]:
+        """First time signature (4/4 if none)"""
+        if self.time_signatures:
+            return self.time_signatures[0][:2]
+        return (4, 4)
+    
+    @property
+    def note_count(self) -> int:
+        return sum(instrument.note_count for instrument in self.instruments)
+    
+    def slice(self, start_time: float, end_time: float) -> "NoteArrayMIDI":
+        """
+        Notes overlapping [start_time, end_time), clipped to it and shifted to start at 0
+        
+        Same result as MIDIProcessor.slice_midi on the PrettyMIDI object.
+        
+        Args:
+            start_time: Start time in seconds
+            end_time: End time in seconds
+        
+        Returns:
+            New NoteArrayMIDI (instruments without notes in the range are dropped)
+        """
+        sliced = self._empty_slice(start_time, end_time)
+        for instrument in self.instruments:
+            notes = instrument.notes
+            overlaps = (notes["end"] > start_time) & (notes["start"] < end_time)
+            notes = _clip(notes[overlaps], start_time, end_time)
+            if len(notes):
+                sliced.instruments.append(InstrumentNotes(instrument.program, instrument.is_drum,
+                                                          instrument.name, notes))
+        return sliced
+    
+    def slice_windows(self, windows: Sequence[Tuple[float, float]]) -> List["NoteArrayMIDI"]:
+        """
+        slice() for many time ranges at once
+        
+        Each instrument's notes are sorted by start once; every window then
+        finds its overlapping notes by binary search.
+        
+        Args:
+            windows: List of (start_time, end_time) in seconds
+        
+        Returns:
+            List of new NoteArrayMIDI, one per window
+        """
+        results = [self._empty_slice(start_time, end_time) for start_time, end_time in windows]
+        
+        for instrument in self.instruments:
+            notes = instrument.notes
+            if not len(notes):
+                continue
+            
+            order = np.argsort(notes["start"], kind="stable")
+            sorted_starts = notes["start"][order]
+            # A note can only reach a window if it starts less than this before it
+            max_length = max(float(np.max(notes["end"] - notes["start"])), 0.0)
+            
+            for sliced, (start_time, end_time) in zip(results, windows):
+                lo = np.searchsorted(sorted_starts, start_time - max_length, side="right")
+                hi = np.searchsorted(sorted_starts, end_time, side="left")
+                candidates = notes[np.sort(order[lo:hi])]  # Keep the original note order
+                window_notes = _clip(candidates[candidates["end"] > start_time], start_time, end_time)
+                if len(window_notes):
+                    sliced.instruments.append(InstrumentNotes(instrument.program, instrument.is_drum,
+                                                              instrument.name, window_notes))
+        
+        return results
+    
+    def _empty_slice(self, start_time: float, end_time: float) -> "NoteArrayMIDI":
+        """Tempo and the time signatures inside the range, shifted; no notes yet"""
+        return NoteArrayMIDI(
+            tempo=self.tempo,
+            time_signatures=[(numerator, denominator, time - start_time)
+                             for numerator, denominator, time in self.time_signatures
+                             if start_time <= time <= end_time]
+        )
+    
+    def to_pretty_midi(self) -> pretty_midi.PrettyMIDI:
+        """
+        Build a PrettyMIDI object (for callers that need one)
+        
+        Returns:
+            New PrettyMIDI object
+        """
+        midi_data = pretty_midi.PrettyMIDI(resolution=self.resolution, initial_tempo=self.tempo)
+        for numerator, denominator, time in self.time_signatures:
+            midi_data.time_signature_changes.append(pretty_midi.TimeSignature(numerator, denominator, time))
+        for instrument in self.instruments:
+            new_instrument = pretty_midi.Instrument(
+                program=instrument.program,
+                is_drum=instrument.is_drum,
+                name=instrument.name
+            )
+            new_instrument.notes = [
+                pretty_midi.Note(velocity=int(velocity), pitch=int(pitch), start=float(start), end=float(end))
+                for start, end, pitch, velocity in instrument.notes.tolist()
+            ]
+            midi_data.instruments.append(new_instrument)
+        return midi_data
+    
+    def piano_roll(self, fs: int = 100, include_drums: bool = False) -> np.ndarray:
+        """
+        Velocity piano roll summed over instruments
+        
+        Same frames as PrettyMIDI.get_piano_roll for notes (int(time * fs));
+        sustain pedal and pitch bends are not applied.
+        
+        Args:
+            fs: Columns per second
+            include_drums: Draw drum notes too (PrettyMIDI leaves them empty)
+        
+        Returns:
+            float array of shape (128, frames)
+        """
+        instruments = [instrument for instrument in self.instruments
+                       if instrument.note_count and (include_drums or not instrument.is_drum)]
+        end_time = max((float(instrument.notes["end"].max()) for instrument in self.instruments
+                        if instrument.note_count), default=0.0)
+        frames = int(fs * end_time)
+        
+        # Velocity added at each note's first frame and removed after its last
+        delta = np.zeros((128, frames + 1))
+        for instrument in instruments:
+            notes = instrument.notes
+            starts = np.minimum((notes["start"] * fs).astype(np.int64), frames)
+            ends = np.minimum((notes["end"] * fs).astype(np.int64), frames)
+            audible = ends > starts
+            np.add.at(delta, (notes["pitch"][audible], starts[audible]), notes["velocity"][audible])
+            np.subtract.at(delta, (notes["pitch"][audible], ends[audible]), notes["velocity"][audible])
+        return np.cumsum(delta, axis=1)[:, :frames]
+    
+    def write(self, output: Union[str, Path, BinaryIO]):
+        """
+        Write a format 1 Standard MIDI File (same bytes as to_pretty_midi().write)
+        
+        Args:
+            output: Output file path or binary file object
+        """
+        tick_scale = 60.0 / (self.tempo * self.resolution)
+        tracks = [self._timing_track(tick_scale)]
+        
+        # Channel per instrument as PrettyMIDI assigns them (9 is reserved for drums)
+        channels = [channel for channel in range(16) if channel != 9]
+        for n, instrument in enumerate(self.instruments):
+            channel = 9 if instrument.is_drum else channels[n % len(channels)]
+            tracks.append(_note_track(instrument, channel, tick_scale))
+        
+        data = bytearray(b"MThd" + struct.pack(">IHHH", 6, 1, len(tracks), self.resolution))
+        for track in tracks:
+            data += b"MTrk" + struct.pack(">I", len(track)) + track
+        
+        if isinstance(output, (str, Path)):
+            with open(output, "wb") as f:
+                f.write(data)
+        else:
+            output.write(data)
+    
+    def _timing_track(self, tick_scale: float) -> bytes:
+        """Track 0: tempo and time signatures"""
+        events = []  # (tick, order, event bytes without delta)
+        if not self.time_signatures or min(time for _, _, time in self.time_signatures) > 0.0:
+            events.append((0, _ORDER_TIME_SIGNATURE, _time_signature_event(4, 4)))
+        tempo_us = int(6e7 / (60. / (tick_scale * self.resolution)))
+        events.append((0, _ORDER_TEMPO, b"\xff\x51\x03" + tempo_us.to_bytes(3, "big")))
+        for numerator, denominator, time in self.time_signatures:
+            events.append((_to_tick(time, tick_scale), _ORDER_TIME_SIGNATURE,
+                           _time_signature_event(numerator, denominator)))
+        events.sort(key=lambda event: event[:2])
+        
+        track = bytearray()
+        tick = 0
+        for event_tick, _, event in events:
+            track += _varlen(event_tick - tick) + event
+            tick = event_tick
+        track += _END_OF_TRACK
+        return bytes(track)
+
+
+def _clip(notes: np.ndarray, start_time: float, end_time: float) -> np.ndarray:
+    """Clip notes to the range, shift to start at 0 and drop zero-length results"""
+    clipped = notes.copy()
+    clipped["start"] = np.maximum(notes["start"], start_time) - start_time
+    clipped["end"] = np.minimum(notes["end"], end_time) - start_time
+    return clipped[clipped["end"] > clipped["start"]]
+
+
+def _to_tick(time, tick_scale: float):
+    """PrettyMIDI.time_to_tick for a single-tempo file (round half to even)"""
+    return int(round(time / tick_scale)) if np.isscalar(time) else np.rint(time / tick_scale).astype(np.int64)
+
+
+def _varlen(value: int) -> bytes:
+    """MIDI variable-length quantity"""
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def _time_signature_event(numerator: int, denominator: int) -> bytes:
+    # 24 MIDI clocks per metronome click, 8 32nd notes per beat (mido defaults)
+    return bytes([0xFF, 0x58, 0x04, numerator, denominator.bit_length() - 1, 24, 8])
+
+
+_END_OF_TRACK = b"\x01\xff\x2f\x00"  # One tick after the last event, like PrettyMIDI
+
+
+def _note_track(instrument: InstrumentNotes, channel: int, tick_scale: float) -> bytes:
+    """Track name, program change and notes of one instrument"""
+    track = bytearray()
+    if instrument.name:
+        name = instrument.name.encode("latin1")
+        track += b"\x00\xff\x03" + _varlen(len(name)) + name
+    track += bytes([0x00, 0xC0 | channel, instrument.program])
+    
+    notes = instrument.notes
+    count = len(notes)
+    if count:
+        # Note-on / note-off (velocity 0) pairs in file order, then sorted by
+        # tick with note-offs before note-ons of the same pitch (PrettyMIDI order)
+        ticks = np.empty(2 * count, dtype=np.int64)
+        ticks[0::2] = _to_tick(notes["start"], tick_scale)
+        ticks[1::2] = _to_tick(notes["end"], tick_scale)
+        pitches = np.repeat(notes["pitch"], 2)
+        velocities = np.zeros(2 * count, dtype=np.uint8)
+        velocities[0::2] = notes["velocity"]
+        order = np.lexsort((pitches.astype(np.int64) * 256 + velocities, ticks))
+        ticks, pitches, velocities = ticks[order], pitches[order], velocities[order]
+        
+        # Running status: only the first note-on carries the status byte
+        deltas = np.diff(ticks, prepend=0)
+        track += _varlen(int(deltas[0])) + bytes([0x90 | channel, pitches[0], velocities[0]])
+        track += _encode_events(deltas[1:], pitches[1:], velocities[1:])
+    
+    track += _END_OF_TRACK
+    return bytes(track)
+
+
+def _encode_events(deltas: np.ndarray, data1: np.ndarray, data2: np.ndarray) -> bytes:
+    """Delta time + two data bytes per event, vectorized"""
+    if not len(deltas):
+        return b""
+    # Bytes of each variable-length delta (deltas are below 2^28)
+    lengths = 1 + (deltas >= 1 << 7) + (deltas >= 1 << 14) + (deltas >= 1 << 21)
+    sizes = lengths + 2
+    offsets = np.cumsum(sizes) - sizes
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for k in range(4):
+        # Byte k of the delta: 7-bit groups, most significant first, high bit on all but the last
+        has_byte = lengths > k
+        shift = 7 * (lengths[has_byte] - 1 - k)
+        more = np.where(k < lengths[has_byte] - 1, 0x80, 0)
+        out[offsets[has_byte] + k] = ((deltas[has_byte] >> shift) & 0x7F) | more
+    out[offsets + lengths] = data1
+    out[offsets + lengths + 1] = data2
+    return out.tobytes()
@@ -0,0 +1,583 @@
+"""
+Audio/MIDI pairing engine
+Scores all audio/MIDI name combinations in batch and solves the assignment globally
+Large catalogs are pruned with an n-gram candidate index before scoring
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from rapidfuzz import fuzz, process
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components, min_weight_full_bipartite_matching
+import config
+
+
+# (audio_indices, midi_indices, scores) - one entry per candidate pair above threshold
+ScoreEdges = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+@dataclass
+class BlockingStats:
+    """Pruning statistics for one candidate-blocked scoring run"""
+    audio_count: int
+    midi_count: int
+    total_pairs: int
+    candidate_pairs: int
+    matched_pairs: int
+    elapsed_seconds: float
+    
+    @property
+    def pruned_ratio(self) -> float:
+        """Fraction of all audio/MIDI combinations that were never scored"""
+        if self.total_pairs == 0:
+            return 0.0
+        return 1.0 - self.candidate_pairs / self.total_pairs
+    
+    def summary(self) -> str:
+        """Human-readable one-line summary"""
+        return (
+            f"scored {self.candidate_pairs:,} of {self.total_pairs:,} pairs "
+            f"({self.pruned_ratio:.1%} pruned), {self.matched_pairs:,} above threshold "
+            f"in {self.elapsed_seconds:.2f}s"
+        )
+
+
+class CandidateIndex:
+    """
+    Inverted character n-gram index over MIDI normalized names
+    
+    Each audio name is only scored against the MIDI names that share the most
+    n-grams with it. Grams are taken from the sorted-token form of the name,
+    which is what token sort ratio compares. Lookups use the rarest grams
+    first and stop once a posting budget is spent, so common grams such as
+    "bas" never expand into the whole catalog.
+    """
+    
+    def __init__(
+        self,
+        midi_names: Sequence[str],
+        ngram: int = config.PAIRING_NGRAM,
+        posting_budget: int = config.PAIRING_POSTING_BUDGET
+    ):
+        """
+        Build the index
+        
+        Args:
+            midi_names: Normalized MIDI filenames
+            ngram: N-gram length in characters
+            posting_budget: Approximate number of postings expanded per audio
+                lookup; the rarest grams are used first until it is spent
+        """
+        self.ngram = ngram
+        self.posting_budget = posting_budget
+        self.midi_count = len(midi_names)
+        
+        # gram -> sorted array of MIDI indices (CSR layout)
+        postings: Dict[str, List[int]] = {}
+        for midi_idx, name in enumerate(midi_names):
+            for gram in _ngrams(name, ngram):
+                postings.setdefault(gram, []).append(midi_idx)
+        
+        self.gram_ids = {gram: gid for gid, gram in enumerate(postings)}
+        lengths = np.fromiter((len(p) for p in postings.values()), dtype=np.int64,
+                              count=len(postings))
+        self.indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        self.indices = np.fromiter(
+            (m for p in postings.values() for m in p),
+            dtype=np.int64,
+            count=int(self.indptr[-1])
+        )
+        self.doc_freq = lengths
+        self.idf = np.log1p(self.midi_count / np.maximum(lengths, 1))
+    
+    def _query_grams(self, name: str, min_grams: int = 2) -> List[int]:
+        """Rarest gram ids of one audio name, within the posting budget"""
+        ids = [self.gram_ids[g] for g in _ngrams(name, self.ngram) if g in self.gram_ids]
+        ids.sort(key=lambda gid: self.doc_freq[gid])
+        
+        selected = []
+        spent = 0
+        for gid in ids:
+            if spent >= self.posting_budget and len(selected) >= min_grams:
+                break
+            selected.append(gid)
+            spent += int(self.doc_freq[gid])
+        return selected
+    
+    def candidates(
+        self,
+        audio_names: Sequence[str],
+        max_candidates: int = config.PAIRING_MAX_CANDIDATES,
+        chunk_size: int = 4096
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate candidate (audio, MIDI) pairs
+        
+        Args:
+            audio_names: Normalized audio filenames
+            max_candidates: Keep at most this many MIDI candidates per audio file,
+                ranked by IDF-weighted shared n-grams (higher = better recall, slower)
+            chunk_size: Audio files processed per vectorized block (bounds memory)
+        
+        Returns:
+            Tuple of (audio_indices, midi_indices)
+        """
+        all_rows = []
+        all_cols = []
+        
+        for chunk_start in range(0, len(audio_names), chunk_size):
+            chunk = audio_names[chunk_start:chunk_start + chunk_size]
+            
+            # (audio, gram) lookups for the whole chunk
+            query_audio = []
+            query_grams = []
+            for offset, name in enumerate(chunk):
+                grams = self._query_grams(name)
+                query_audio.extend([chunk_start + offset] * len(grams))
+                query_grams.extend(grams)
+            
+            if not query_grams:
+                continue
+            
+            query_audio = np.asarray(query_audio, dtype=np.int64)
+            query_grams = np.asarray(query_grams, dtype=np.int64)
+            
+            # Expand every lookup into its posting list
+            starts = self.indptr[query_grams]
+            lengths = self.indptr[query_grams + 1] - starts
+            total = int(lengths.sum())
+            if total == 0:
+                continue
+            
+            rows = np.repeat(query_audio, lengths)
+            run_starts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            cols = self.indices[run_starts + np.arange(total)]
+            
+            # IDF-weighted shared-gram score per (audio, MIDI) pair
+            keys, inverse = np.unique(rows * self.midi_count + cols, return_inverse=True)
+            shared = np.bincount(
+                inverse, weights=np.repeat(self.idf[query_grams], lengths)
+            )
+            pair_rows = keys // self.midi_count
+            pair_cols = keys % self.midi_count
+            
+            # Top-k per audio file: sort by audio, then by shared score (descending)
+            order = np.lexsort((-shared, pair_rows))
+            pair_rows = pair_rows[order]
+            pair_cols = pair_cols[order]
+            group_start = np.flatnonzero(np.r_[True, pair_rows[1:] != pair_rows[:-1]])
+            rank = np.arange(len(pair_rows)) - np.repeat(
+                group_start, np.diff(np.r_[group_start, len(pair_rows)])
+            )
+            keep = rank < max_candidates
+            
+            all_rows.append(pair_rows[keep])
+            all_cols.append(pair_cols[keep])
+        
+        if not all_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        return np.concatenate(all_rows), np.concatenate(all_cols)
+
+
+class PairingEngine:
+    """
+    Globally optimal audio -> MIDI assignment
+    
+    Scores are computed with rapidfuzz's token sort ratio in one batched call
+    (or, for very large catalogs, only for pairs proposed by a CandidateIndex),
+    thresholded, and the resulting bipartite graph is split into connected
+    components. Each component is solved with the Hungarian method, so the
+    result maximizes the total match score and does not depend on file order.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = config.FUZZY_MATCH_THRESHOLD,
+        workers: int = config.PAIRING_WORKERS,
+        max_candidates: int = config.PAIRING_MAX_CANDIDATES,
+        dense_max_cells: int = config.PAIRING_DENSE_MAX_CELLS
+    ):
+        """
+        Initialize the pairing engine
+        
+        Args:
+            threshold: Minimum fuzzy score (0-100) for a pair to be considered
+            workers: Worker threads for batched scoring (-1 = all cores)
+            max_candidates: MIDI candidates per audio file when blocking is used
+                (recall vs speed knob)
+            dense_max_cells: Largest audio x MIDI matrix scored in full; bigger
+                catalogs go through the candidate index
+        """
+        self.threshold = threshold
+        self.workers = workers
+        self.max_candidates = max_candidates
+        self.dense_max_cells = dense_max_cells
+        self.dense_component_cells = config.PAIRING_DENSE_COMPONENT_CELLS
+        self.last_stats: Optional[BlockingStats] = None
+    
+    def score_matrix(
+        self,
+        audio_names: Sequence[str],
+        midi_names: Sequence[str]
+    ) -> np.ndarray:
+        """
+        Score every audio name against every MIDI name in one batched call
+        
+        Args:
+            audio_names: Normalized audio filenames
+            midi_names: Normalized MIDI filenames
+        
+        Returns:
+            (len(audio_names), len(midi_names)) float32 matrix, 0 below threshold
+        """
+        return process.cdist(
+            audio_names,
+            midi_names,
+            scorer=fuzz.token_sort_ratio,
+            score_cutoff=self.threshold,
+            dtype=np.float32,
+            workers=self.workers
+        )
+    
+    def score_edges(
+        self,
+        audio_names: Sequence[str],
+        midi_names: Sequence[str]
+    ) -> ScoreEdges:
+        """
+        Score all pairs and keep only those that meet the threshold
+        
+        Args:
+            audio_names: Normalized audio filenames
+            midi_names: Normalized MIDI filenames
+        
+        Returns:
+            Tuple of (audio_indices, midi_indices, scores)
+        """
+        self.last_stats = None
+        if len(audio_names) == 0 or len(midi_names) == 0:
+            return _empty_edges()
+        
+        if len(audio_names) * len(midi_names) > self.dense_max_cells:
+            return self.score_blocked(audio_names, midi_names)
+        
+        matrix = self.score_matrix(audio_names, midi_names)
+        rows, cols = np.nonzero(matrix)
+        return rows, cols, matrix[rows, cols]
+    
+    def score_blocked(
+        self,
+        audio_names: Sequence[str],
+        midi_names: Sequence[str]
+    ) -> ScoreEdges:
+        """
+        Score only the candidate pairs proposed by a CandidateIndex
+        
+        Pruning statistics are stored on self.last_stats.
+        
+        Args:
+            audio_names: Normalized audio filenames
+            midi_names: Normalized MIDI filenames
+        
+        Returns:
+            Tuple of (audio_indices, midi_indices, scores)
+        """
+        start = time.perf_counter()
+        
+        index = CandidateIndex(midi_names)
+        rows, cols = index.candidates(audio_names, max_candidates=self.max_candidates)
+        
+        scores = np.empty(0, dtype=np.float32)
+        if len(rows) > 0:
+            audio_arr = np.asarray(audio_names, dtype=object)
+            midi_arr = np.asarray(midi_names, dtype=object)
+            scores = process.cpdist(
+                audio_arr[rows].tolist(),
+                midi_arr[cols].tolist(),
+                scorer=fuzz.token_sort_ratio,
+                score_cutoff=self.threshold,
+                dtype=np.float32,
+                workers=self.workers
+            )
+        
+        keep = scores > 0
+        self.last_stats = BlockingStats(
+            audio_count=len(audio_names),
+            midi_count=len(midi_names),
+            total_pairs=len(audio_names) * len(midi_names),
+            candidate_pairs=len(rows),
+            matched_pairs=int(keep.sum()),
+            elapsed_seconds=time.perf_counter() - start
+        )
+        
+        return rows[keep], cols[keep], scores[keep]
+    
+    def assign(
+        self,
+        n_audio: int,
+        n_midi: int,
+        edges: ScoreEdges
+    ) -> Dict[int, Tuple[int, float]]:
+        """
+        Solve the maximum-score one-to-one assignment over thresholded edges
+        
+        Args:
+            n_audio: Number of audio files
+            n_midi: Number of MIDI files
+            edges: Tuple of (audio_indices, midi_indices, scores)
+        
+        Returns:
+            Dictionary mapping audio index to (midi index, score)
+        """
+        rows, cols, scores = edges
+        if len(rows) == 0:
+            return {}
+        
+        # Connected components of the bipartite graph (MIDI nodes offset by n_audio)
+        n_nodes = n_audio + n_midi
+        graph = coo_matrix(
+            (np.ones(len(rows), dtype=np.int8), (rows, cols + n_audio)),
+            shape=(n_nodes, n_nodes)
+        )
+        _, labels = connected_components(graph, directed=False)
+        edge_labels = labels[rows]
+        
+        assignment = {}
+        
+        # Components made of a single edge need no solving
+        edge_counts = np.bincount(edge_labels)
+        single = edge_counts[edge_labels] == 1
+        for r, c, s in zip(rows[single], cols[single], scores[single]):
+            assignment[int(r)] = (int(c), float(s))
+        
+        # Solve the remaining components independently
+        multi = ~single
+        if not np.any(multi):
+            return assignment
+        
+        m_rows, m_cols, m_scores = rows[multi], cols[multi], scores[multi]
+        m_labels = edge_labels[multi]
+        order = np.argsort(m_labels, kind="stable")
+        m_rows, m_cols, m_scores, m_labels = (
+            m_rows[order], m_cols[order], m_scores[order], m_labels[order]
+        )
+        boundaries = np.flatnonzero(np.diff(m_labels)) + 1
+        
+        for comp_rows, comp_cols, comp_scores in zip(
+            np.split(m_rows, boundaries),
+            np.split(m_cols, boundaries),
+            np.split(m_scores, boundaries)
+        ):
+            audio_ids, local_rows = np.unique(comp_rows, return_inverse=True)
+            midi_ids, local_cols = np.unique(comp_cols, return_inverse=True)
+            
+            if len(audio_ids) * len(midi_ids) <= self.dense_component_cells:
+                matches = _solve_dense(local_rows, local_cols, comp_scores,
+                                       len(audio_ids), len(midi_ids))
+            else:
+                matches = _solve_sparse(local_rows, local_cols, comp_scores,
+                                        len(audio_ids), len(midi_ids))
+            
+            for r, c, score in matches:
+                assignment[int(audio_ids[r])] = (int(midi_ids[c]), score)
+        
+        return assignment
+    
+    def pair(
+        self,
+        audio_names: Sequence[str],
+        midi_names: Sequence[str]
+    ) -> Dict[int, Tuple[int, float]]:
+        """
+        Score and assign in one step
+        
+        Args:
+            audio_names: Normalized audio filenames
+            midi_names: Normalized MIDI filenames
+        
+        Returns:
+            Dictionary mapping audio index to (midi index, score)
+        """
+        edges = self.score_edges(audio_names, midi_names)
+        return self.assign(len(audio_names), len(midi_names), edges)
+
+
+class IncrementalPairer:
+    """
+    Keeps pairing state while files are still being discovered
+    
+    New audio is scored against all MIDI seen so far, and new MIDI against all
+    audio seen so far, so every audio/MIDI combination is scored exactly once.
+    solve() re-runs the global assignment over all edges collected so far;
+    earlier assignments can change as better-matching MIDI arrives.
+    """
+    
+    def __init__(self, engine: Optional[PairingEngine] = None):
+        """
+        Initialize the incremental pairer
+        
+        Args:
+            engine: PairingEngine used for scoring and assignment
+        """
+        self.engine = engine if engine is not None else PairingEngine()
+        self.audio_names: List[str] = []
+        self.midi_names: List[str] = []
+        self._edges: List[ScoreEdges] = []
+    
+    def add(self, audio_names: Sequence[str], midi_names: Sequence[str]):
+        """
+        Add newly discovered files and score them against everything seen so far
+        
+        Args:
+            audio_names: Normalized names of new audio files
+            midi_names: Normalized names of new MIDI files
+        """
+        n_audio_before = len(self.audio_names)
+        n_midi_before = len(self.midi_names)
+        self.audio_names.extend(audio_names)
+        self.midi_names.extend(midi_names)
+        
+        # New audio x all MIDI (including the new MIDI)
+        if audio_names and self.midi_names:
+            rows, cols, scores = self.engine.score_edges(list(audio_names), self.midi_names)
+            self._edges.append((rows + n_audio_before, cols, scores))
+        
+        # Existing audio x new MIDI
+        if midi_names and n_audio_before:
+            rows, cols, scores = self.engine.score_edges(
+                self.audio_names[:n_audio_before], list(midi_names)
+            )
+            self._edges.append((rows, cols + n_midi_before, scores))
+    
+    def solve(self) -> Dict[int, Tuple[int, float]]:
+        """
+        Assign MIDI globally over everything added so far
+        
+        Returns:
+            Dictionary mapping audio index (in order added) to (midi index, score)
+        """
+        if not self._edges:
+            return {}
+        
+        edges = tuple(np.concatenate(parts) for parts in zip(*self._edges))
+        # Keep the concatenated arrays so later solves do not re-concatenate
+        self._edges = [edges]
+        return self.engine.assign(len(self.audio_names), len(self.midi_names), edges)
+    
+    def solve_ordered(
+        self,
+        audio_order: Sequence[int],
+        midi_order: Sequence[int]
+    ) -> Dict[int, Tuple[int, float]]:
+        """
+        Assign MIDI as PairingEngine.pair would with the files in the given order
+        
+        The assignment breaks score ties by file order, so solving in a fixed
+        order (e.g. by path) gives the same result however the files were
+        discovered. Cached edges are reused unless the full problem is big
+        enough for candidate blocking, whose candidates depend on batching;
+        then the files are scored again in one pass.
+        
+        Args:
+            audio_order: Audio indices (in order added) in the order to solve
+            midi_order: MIDI indices (in order added) in the order to solve
+        
+        Returns:
+            Dictionary mapping audio index (in order added) to (midi index, score)
+        """
+        audio_order = np.asarray(audio_order, dtype=np.intp)
+        midi_order = np.asarray(midi_order, dtype=np.intp)
+        n_audio, n_midi = len(self.audio_names), len(self.midi_names)
+        
+        if n_audio * n_midi > self.engine.dense_max_cells:
+            local = self.engine.pair(
+                [self.audio_names[i] for i in audio_order],
+                [self.midi_names[i] for i in midi_order]
+            )
+        else:
+            if not self._edges:
+                return {}
+            rows, cols, scores = tuple(np.concatenate(parts) for parts in zip(*self._edges))
+            self._edges = [(rows, cols, scores)]
+            # Position of every file in the requested order
+            audio_pos = np.empty(n_audio, dtype=np.intp)
+            audio_pos[audio_order] = np.arange(n_audio)
+            midi_pos = np.empty(n_midi, dtype=np.intp)
+            midi_pos[midi_order] = np.arange(n_midi)
+            local = self.engine.assign(n_audio, n_midi, (audio_pos[rows], midi_pos[cols], scores))
+        
+        return {int(audio_order[a]): (int(midi_order[m]), score) for a, (m, score) in local.items()}
+
+
+def _solve_dense(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    scores: np.ndarray,
+    n_rows: int,
+    n_cols: int
+) -> List[Tuple[int, int, float]]:
+    """Hungarian method on a small dense score block"""
+    block = np.zeros((n_rows, n_cols), dtype=np.float32)
+    block[rows, cols] = scores
+    
+    matches = []
+    row_ind, col_ind = linear_sum_assignment(block, maximize=True)
+    for r, c in zip(row_ind, col_ind):
+        # Zero entries are below threshold (no real edge)
+        if block[r, c] > 0:
+            matches.append((int(r), int(c), float(block[r, c])))
+    return matches
+
+
+def _solve_sparse(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    scores: np.ndarray,
+    n_rows: int,
+    n_cols: int
+) -> List[Tuple[int, int, float]]:
+    """
+    Maximum-score assignment on a large sparse component
+    
+    Every row gets a private "unmatched" column so a full matching always
+    exists; costs are (101 - score) for real edges and 101 for staying
+    unmatched, so minimizing cost maximizes the total score.
+    """
+    dummy_cols = n_cols + np.arange(n_rows)
+    cost = csr_matrix(
+        (
+            np.concatenate([101.0 - scores.astype(np.float64), np.full(n_rows, 101.0)]),
+            (np.concatenate([rows, np.arange(n_rows)]), np.concatenate([cols, dummy_cols]))
+        ),
+        shape=(n_rows, n_cols + n_rows)
+    )
+    row_ind, col_ind = min_weight_full_bipartite_matching(cost)
+    
+    lookup = {(int(r), int(c)): float(s) for r, c, s in zip(rows, cols, scores)}
+    return [
+        (int(r), int(c), lookup[(int(r), int(c))])
+        for r, c in zip(row_ind, col_ind)
+        if c < n_cols
+    ]
+
+
+def _ngrams(name: str, n: int) -> set:
+    """Character n-grams of the sorted-token form of a name (space padded)"""
+    padded = " " + " ".join(sorted(name.split())) + " "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def _empty_edges() -> ScoreEdges:
+    """Empty edge arrays with the engine's dtypes"""
+    return (
+        np.empty(0, dtype=np.intp),
+        np.empty(0, dtype=np.intp),
+        np.empty(0, dtype=np.float32)
+    )
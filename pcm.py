@@ -0,0 +1,311 @@
+"""
+PCM conversion kernels
+Fused mono-downmix / peak-normalize / 16-bit quantize for export: one pass to
+find the peak, one pass to write int16 samples into a preallocated buffer, no
+float temporaries. Integer sources (e.g. 24-bit) that need no resampling can
+stay in the integer domain end to end, with optional TPDF dither. Compiled
+with Numba when available (it ships with librosa), otherwise a NumPy
+fallback with the same results.
+"""
+
+from typing import Optional
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+NORMALIZE_EPSILON = 1e-8  # Added to the peak before dividing (prevents clipping)
+INT32_FULL_SCALE = 2 ** 31  # soundfile returns integer PCM left-aligned in int32
+# Float to PCM_16 as libsndfile 1.2 (sf.write) does it: round x * 2^31 to int32, keep the top 16 bits
+PCM32_SCALE = np.float32(INT32_FULL_SCALE)
+PCM16_STEP = np.float32(1 << 16)
+FIXED_SHIFT = 46  # Fraction bits of the integer-path gain (|sample * gain| stays within 2^61)
+ROUND_BIAS = 1 << (FIXED_SHIFT - 17)  # Half an int32 step: the float path's rounding to int32
+INTEGER_SUBTYPES = ("PCM_16", "PCM_24", "PCM_32")  # Sources the integer path can read
+
+
+def _peak_kernel(x: np.ndarray, mono: bool) -> float:
+    frames, channels = x.shape
+    peak = np.float32(0.0)
+    for i in range(frames):
+        if mono:
+            s = x[i, 0]
+            for j in range(1, channels):
+                s += x[i, j]
+            v = abs(s / np.float32(channels))
+            if v > peak:
+                peak = v
+        else:
+            for j in range(channels):
+                v = abs(x[i, j])
+                if v > peak:
+                    peak = v
+    return peak
+
+
+def _quantize(v: np.float32) -> np.int16:
+    q = np.floor(np.rint(v * PCM32_SCALE) / PCM16_STEP)
+    if q > 32767:
+        q = 32767
+    elif q < -32768:
+        q = -32768
+    return np.int16(q)
+
+
+def _quantize_kernel(x: np.ndarray, divisor: np.float32, mono: bool, out: np.ndarray):
+    frames, channels = x.shape
+    for i in range(frames):
+        if mono:
+            s = x[i, 0]
+            for j in range(1, channels):
+                s += x[i, j]
+            out[i, 0] = _quantize(s / np.float32(channels) / divisor)
+        else:
+            for j in range(channels):
+                out[i, j] = _quantize(x[i, j] / divisor)
+
+
+def _peak_int_kernel(x: np.ndarray, mono: bool) -> int:
+    frames, channels = x.shape
+    peak = 0
+    for i in range(frames):
+        if mono:
+            s = 0
+            for j in range(channels):
+                s += np.int64(x[i, j])
+            if abs(s) > peak:
+                peak = abs(s)
+        else:
+            for j in range(channels):
+                v = abs(np.int64(x[i, j]))
+                if v > peak:
+                    peak = v
+    return peak
+
+
+def _shift_clip(v: np.int64) -> np.int16:
+    q = v >> FIXED_SHIFT
+    if q > 32767:
+        q = 32767
+    elif q < -32768:
+        q = -32768
+    return np.int16(q)
+
+
+def _int_quantize_kernel(x: np.ndarray, gain: np.int64, mono: bool, dither: np.ndarray, out: np.ndarray):
+    frames, channels = x.shape
+    bias = np.int64(ROUND_BIAS)
+    use_dither = dither.shape[0] > 0
+    for i in range(frames):
+        if mono:
+            s = np.int64(0)
+            for j in range(channels):
+                s += np.int64(x[i, j])
+            v = s * gain + bias
+            if use_dither:
+                v += dither[i, 0]
+            out[i, 0] = _shift_clip(v)
+        else:
+            for j in range(channels):
+                v = np.int64(x[i, j]) * gain + bias
+                if use_dither:
+                    v += dither[i, j]
+                out[i, j] = _shift_clip(v)
+
+
+if numba is not None:
+    _quantize = numba.njit(cache=True, nogil=True)(_quantize)
+    _peak_kernel = numba.njit(cache=True, nogil=True)(_peak_kernel)
+    _quantize_kernel = numba.njit(cache=True, nogil=True)(_quantize_kernel)
+    _shift_clip = numba.njit(cache=True, nogil=True)(_shift_clip)
+    _peak_int_kernel = numba.njit(cache=True, nogil=True)(_peak_int_kernel)
+    _int_quantize_kernel = numba.njit(cache=True, nogil=True)(_int_quantize_kernel)
+else:
+    def _peak_kernel(x: np.ndarray, mono: bool) -> float:
+        mixed = x.mean(axis=1) if mono else x
+        return float(np.max(np.abs(mixed))) if mixed.size else 0.0
+    
+    def _quantize_kernel(x: np.ndarray, divisor: np.float32, mono: bool, out: np.ndarray):
+        mixed = x.mean(axis=1, keepdims=True) if mono else x
+        scaled = np.floor(np.rint(mixed / divisor * PCM32_SCALE) / PCM16_STEP)
+        np.clip(scaled, -32768, 32767, out=scaled)
+        out[...] = scaled
+    
+    def _peak_int_kernel(x: np.ndarray, mono: bool) -> int:
+        mixed = x.sum(axis=1, dtype=np.int64) if mono else x.astype(np.int64)
+        return int(np.max(np.abs(mixed))) if mixed.size else 0
+    
+    def _int_quantize_kernel(x: np.ndarray, gain: np.int64, mono: bool, dither: np.ndarray, out: np.ndarray):
+        acc = x.sum(axis=1, dtype=np.int64, keepdims=True) if mono else x.astype(np.int64)
+        acc *= gain
+        acc += ROUND_BIAS
+        if dither.shape[0] > 0:
+            acc += dither
+        acc >>= FIXED_SHIFT
+        np.clip(acc, -32768, 32767, out=acc)
+        out[...] = acc
+
+
+def _as_frames(audio_data: np.ndarray) -> np.ndarray:
+    """float32 (frames, channels) view of mono or multi-channel audio"""
+    audio_data = np.asarray(audio_data, dtype=np.float32)
+    return audio_data[:, None] if audio_data.ndim == 1 else audio_data
+
+
+def peak(audio_data: np.ndarray, mono: bool = False) -> float:
+    """
+    Absolute peak of the audio (of its mono downmix if mono=True)
+    
+    Args:
+        audio_data: Audio data (1D mono or 2D frames x channels)
+        mono: Measure the channel average instead of the channels
+    
+    Returns:
+        Peak value
+    """
+    x = _as_frames(audio_data)
+    return float(_peak_kernel(x, mono)) if x.size else 0.0
+
+
+def normalize_divisor(peak_value: float) -> np.float32:
+    """Divisor peak normalization uses (1 for silence, i.e. no scaling)"""
+    return np.float32(peak_value + NORMALIZE_EPSILON) if peak_value > 0 else np.float32(1.0)
+
+
+def to_pcm16(
+    audio_data: np.ndarray,
+    divisor: np.float32 = np.float32(1.0),
+    mono: bool = False,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Downmix (optional), divide and quantize to 16-bit PCM in one pass
+    
+    Same math as np.mean(axis=1) -> audio / divisor, then the conversion
+    sf.write applies with libsndfile 1.2 (round to int32, clip, keep the top
+    16 bits), so the samples are identical to writing the float result with
+    soundfile.
+    
+    Args:
+        audio_data: Audio data (1D mono or 2D frames x channels)
+        divisor: Value every sample is divided by (see normalize_divisor)
+        mono: Average the channels into one
+        out: Preallocated int16 (frames, channels) buffer to fill (optional)
+    
+    Returns:
+        int16 array: (frames,) for mono output, (frames, channels) otherwise
+    """
+    x = _as_frames(audio_data)
+    channels = 1 if mono else x.shape[1]
+    if out is None:
+        out = np.empty((x.shape[0], channels), dtype=np.int16)
+    if x.size:
+        _quantize_kernel(x, np.float32(divisor), mono, out)
+    return out[:, 0] if channels == 1 else out
+
+
+def normalize_to_pcm16(audio_data: np.ndarray, mono: bool = False) -> np.ndarray:
+    """
+    Peak-normalize and quantize to 16-bit PCM (optionally downmixed to mono)
+    
+    Replaces convert_to_mono + peak normalization + soundfile's float to
+    PCM_16 conversion: two passes over the input and the int16 output as
+    the only allocation.
+    
+    Args:
+        audio_data: Audio data (1D mono or 2D frames x channels)
+        mono: Downmix to mono
+    
+    Returns:
+        int16 samples ready for sf.write(..., subtype='PCM_16')
+    """
+    return to_pcm16(audio_data, normalize_divisor(peak(audio_data, mono)), mono)
+
+
+def peak_int(audio_data: np.ndarray, mono: bool = False) -> int:
+    """
+    Absolute peak of int32 PCM (of the channel sum if mono=True)
+    
+    Args:
+        audio_data: int32 samples, 1D or 2D frames x channels (sf.read dtype='int32')
+        mono: Measure the sum of the channels
+    
+    Returns:
+        Peak value in int32 units (channel-sum units for mono)
+    """
+    x = audio_data[:, None] if audio_data.ndim == 1 else audio_data
+    return int(_peak_int_kernel(x, mono)) if x.size else 0
+
+
+def integer_gain(peak_value: int, channels_summed: int = 1) -> int:
+    """
+    Fixed-point gain (FIXED_SHIFT fraction bits) that normalizes peak_value
+    
+    The integer counterpart of normalize_divisor, for int32 samples (or
+    channel sums): built from the same float32 divisor as the float path and
+    rounded like it (ROUND_BIAS, then the shift), so a source already
+    peaking at full scale keeps its samples exactly.
+    
+    Args:
+        peak_value: Peak from peak_int
+        channels_summed: Channels added per sample (mono downmix), else 1
+    
+    Returns:
+        Gain; int16 = (sample * gain) >> FIXED_SHIFT
+    """
+    full_scale = INT32_FULL_SCALE * channels_summed
+    # Silence gets divisor 1: plain conversion without normalization
+    divisor = float(normalize_divisor(peak_value / full_scale))
+    return int(round(0x8000 * (1 << FIXED_SHIFT) / (divisor * full_scale)))
+
+
+def tpdf_dither(shape: tuple, rng: np.random.Generator) -> np.ndarray:
+    """
+    Triangular (TPDF) dither of +-1 output LSB in the integer path's fixed-point units
+    
+    Args:
+        shape: Output (frames, channels)
+        rng: NumPy random generator
+    
+    Returns:
+        int64 array to add before the final shift
+    """
+    one = np.int64(1) << FIXED_SHIFT
+    dither = rng.integers(0, one, size=shape, dtype=np.int64)
+    dither += rng.integers(0, one, size=shape, dtype=np.int64)
+    dither -= one
+    return dither
+
+
+def int32_to_pcm16(
+    audio_data: np.ndarray,
+    gain: int,
+    mono: bool = False,
+    dither_rng: Optional[np.random.Generator] = None,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Scale, round and narrow int32 PCM to int16 without leaving the integer domain
+    
+    Args:
+        audio_data: int32 samples, 1D or 2D frames x channels
+        gain: Fixed-point gain from integer_gain
+        mono: Sum the channels (gain must account for it)
+        dither_rng: Add TPDF dither drawn from this generator (None = no dither)
+        out: Preallocated int16 (frames, channels) buffer to fill (optional)
+    
+    Returns:
+        int16 array: (frames,) for mono output, (frames, channels) otherwise
+    """
+    x = audio_data[:, None] if audio_data.ndim == 1 else audio_data
+    channels = 1 if mono else x.shape[1]
+    if out is None:
+        out = np.empty((x.shape[0], channels), dtype=np.int16)
+    if x.size:
+        dither = (tpdf_dither(out.shape, dither_rng) if dither_rng is not None
+                  else np.empty((0, channels), dtype=np.int64))
+        _int_quantize_kernel(x, np.int64(gain), mono, dither, out)
+    return out[:, 0] if channels == 1 else out
@@ -0,0 +1,317 @@
+"""
+Resampling backends
+One entry point for sample-rate conversion with selectable backends and
+quality tiers (soxr QQ/LQ/MQ/HQ/VHQ, scipy polyphase, FFT). All channels are
+converted in a single call. Run this module to benchmark the backends.
+"""
+
+import math
+import time
+import argparse
+from typing import Callable, Dict, Optional
+import numpy as np
+import soxr
+import config
+
+
+def _soxr_backend(quality: str) -> Callable[[np.ndarray, int, int], np.ndarray]:
+    def resample(audio_data: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        # soxr takes (frames, channels) directly; channels are independent
+        return soxr.resample(audio_data, orig_sr, target_sr, quality=quality)
+    return resample
+
+
+def _polyphase(audio_data: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    import scipy.signal  # Slow to import; only needed by the scipy backends
+    gcd = math.gcd(orig_sr, target_sr)
+    return scipy.signal.resample_poly(audio_data, target_sr // gcd, orig_sr // gcd, axis=0)
+
+
+def _fft(audio_data: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    import scipy.signal
+    num = int(math.ceil(audio_data.shape[0] * target_sr / orig_sr))
+    return scipy.signal.resample(audio_data, num, axis=0)
+
+
+# name -> (function, description); soxr_hq is what librosa.resample uses by default
+BACKENDS: Dict[str, tuple] = {
+    "soxr_qq": (_soxr_backend("QQ"), "soxr quick (cubic) - drafts only, audible aliasing"),
+    "soxr_lq": (_soxr_backend("LQ"), "soxr low quality (16-bit)"),
+    "soxr_mq": (_soxr_backend("MQ"), "soxr medium quality (16-bit)"),
+    "soxr_hq": (_soxr_backend("HQ"), "soxr high quality (20-bit) - librosa default"),
+    "soxr_vhq": (_soxr_backend("VHQ"), "soxr very high quality (28-bit)"),
+    "polyphase": (_polyphase, "scipy polyphase FIR (resample_poly)"),
+    "fft": (_fft, "scipy FFT (band-limited; whole-signal, so slices differ slightly from full decodes)"),
+}
+
+_default_method = config.RESAMPLER
+
+
+def set_default_method(method: str):
+    """
+    Select the backend used when no method is passed (e.g. from --resampler)
+    
+    Args:
+        method: Backend name (see BACKENDS)
+    """
+    global _default_method
+    if method not in BACKENDS:
+        raise ValueError(f"Unknown resampler '{method}' (choose from {', '.join(BACKENDS)})")
+    _default_method = method
+
+
+def get_default_method() -> str:
+    """Currently selected backend name"""
+    return _default_method
+
+
+def resample(
+    audio_data: np.ndarray,
+    orig_sr: int,
+    target_sr: int,
+    method: Optional[str] = None
+) -> np.ndarray:
+    """
+    Resample audio with the selected backend
+    
+    The output always has ceil(frames * target_sr / orig_sr) frames (as
+    librosa.resample produces) and the input's dtype.
+    
+    Args:
+        audio_data: Audio data (1D mono or 2D frames x channels)
+        orig_sr: Original sample rate
+        target_sr: Target sample rate
+        method: Backend name (defaults to get_default_method())
+    
+    Returns:
+        Resampled audio array
+    """
+    method = method or _default_method
+    if method not in BACKENDS:
+        raise ValueError(f"Unknown resampler '{method}' (choose from {', '.join(BACKENDS)})")
+    
+    audio_data = np.asarray(audio_data)
+    if orig_sr == target_sr:
+        return audio_data
+    
+    resampled = BACKENDS[method][0](audio_data, orig_sr, target_sr)
+    
+    # Fix the length so every backend lines up sample for sample
+    num = int(math.ceil(audio_data.shape[0] * target_sr / orig_sr))
+    if resampled.shape[0] > num:
+        resampled = resampled[:num]
+    elif resampled.shape[0] < num:
+        pad = [(0, num - resampled.shape[0])] + [(0, 0)] * (resampled.ndim - 1)
+        resampled = np.pad(resampled, pad)
+    
+    return resampled.astype(audio_data.dtype, copy=False)
+
+
+class PolyphaseStream:
+    """
+    scipy.signal.resample_poly run chunk by chunk (soxr.ResampleStream interface)
+    
+    Each chunk is filtered with upfirdn together with the input history its
+    outputs reach back to, so the concatenated output is the whole-signal
+    resample_poly result sample for sample, in constant memory.
+    """
+    
+    def __init__(self, orig_sr: int, target_sr: int, channels: int, dtype: str = 'float32'):
+        """
+        Args:
+            orig_sr: Original sample rate
+            target_sr: Target sample rate
+            channels: Number of channels
+            dtype: Sample dtype (the filter is designed in it, as resample_poly does)
+        """
+        import scipy.signal
+        self._upfirdn = scipy.signal.upfirdn
+        gcd = math.gcd(orig_sr, target_sr)
+        self.up = target_sr // gcd
+        self.down = orig_sr // gcd
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        
+        # Same filter and delay compensation as resample_poly (default Kaiser window)
+        max_rate = max(self.up, self.down)
+        half_len = 10 * max_rate
+        h = scipy.signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0)).astype(self.dtype)
+        h *= self.up
+        pre_pad = self.down - half_len % self.down
+        self._h = np.concatenate((np.zeros(pre_pad, dtype=self.dtype), h))
+        self._pre_remove = (half_len + pre_pad) // self.down
+        
+        self._buffer = np.zeros((0, channels), dtype=self.dtype)
+        self._buffer_start = 0  # Input frame of _buffer[0] (a multiple of down)
+        self._frames_in = 0
+        self._frames_out = 0
+    
+    def _first_input(self, out_frame: int) -> int:
+        """First input frame output frame out_frame depends on, rounded down to a multiple of down"""
+        m = out_frame + self._pre_remove
+        first = max(0, -(-(m * self.down - (len(self._h) - 1)) // self.up))
+        return first - first % self.down
+    
+    def resample_chunk(self, x: np.ndarray, last: bool = False) -> np.ndarray:
+        """
+        Resample the next block of input
+        
+        Args:
+            x: (frames, channels) block (1D allowed for mono)
+            last: No more input follows (flushes the remaining output)
+        
+        Returns:
+            (frames, channels) output, ceil(total_in * target / orig) frames in total
+        """
+        x = np.asarray(x, dtype=self.dtype).reshape(-1, self.channels)
+        self._buffer = np.concatenate((self._buffer, x))
+        self._frames_in += len(x)
+        
+        # Outputs whose taps only reach input that has arrived (all of them at the end)
+        end = -(-self._frames_in * self.up // self.down)
+        if not last:
+            end -= self._pre_remove
+        start = self._frames_out
+        if end <= start:
+            return np.zeros((0, self.channels), dtype=self.dtype)
+        
+        m0, m1 = start + self._pre_remove, end + self._pre_remove  # upfirdn output frames
+        lo = self._first_input(start)
+        hi = min(self._frames_in, (m1 - 1) * self.down // self.up + 1)
+        segment = self._buffer[lo - self._buffer_start:hi - self._buffer_start]
+        offset = lo * self.up // self.down  # upfirdn frame of the segment's first output
+        y = self._upfirdn(self._h, segment, self.up, self.down, axis=0)[m0 - offset:m1 - offset]
+        if len(y) < end - start:
+            # Past the end of the input the filter output is zero (resample_poly pads the same)
+            y = np.concatenate((y, np.zeros((end - start - len(y), self.channels), dtype=y.dtype)))
+        
+        self._frames_out = end
+        keep = self._first_input(end)
+        self._buffer = self._buffer[keep - self._buffer_start:]
+        self._buffer_start = keep
+        return y.astype(self.dtype, copy=False)
+
+
+# Backends open_stream can run chunk by chunk (fft transforms the whole signal at once)
+STREAMING_BACKENDS = ("soxr_qq", "soxr_lq", "soxr_mq", "soxr_hq", "soxr_vhq", "polyphase")
+
+
+def open_stream(
+    orig_sr: int,
+    target_sr: int,
+    channels: int,
+    method: Optional[str] = None,
+    dtype: str = 'float32'
+):
+    """
+    Stateful chunk-by-chunk resampler for streaming export
+    
+    soxr backends stream at their own quality tier; polyphase streams through
+    PolyphaseStream with the same output as resample. fft has no streaming
+    form (see STREAMING_BACKENDS).
+    
+    Args:
+        orig_sr: Original sample rate
+        target_sr: Target sample rate
+        channels: Number of channels
+        method: Backend name (defaults to get_default_method())
+        dtype: Sample dtype
+    
+    Returns:
+        soxr.ResampleStream or PolyphaseStream (call resample_chunk(block, last=...))
+    
+    Raises:
+        ValueError: Unknown backend, or one that cannot stream
+    """
+    method = method or _default_method
+    if method not in STREAMING_BACKENDS:
+        raise ValueError(f"Resampler '{method}' cannot stream (choose from {', '.join(STREAMING_BACKENDS)})")
+    if method == "polyphase":
+        return PolyphaseStream(orig_sr, target_sr, channels, dtype=dtype)
+    return soxr.ResampleStream(orig_sr, target_sr, channels, dtype=dtype, quality=method[len("soxr_"):].upper())
+
+
+def _tone(freq: float, sample_rate: int, seconds: float, channels: int) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    return np.repeat(tone[:, None], channels, axis=1)
+
+
+def _level_db(x: np.ndarray) -> float:
+    """RMS level in dB relative to the 0.5-amplitude test tone"""
+    rms = float(np.sqrt(np.mean(np.square(x, dtype=np.float64))))
+    return 20 * math.log10(max(rms / (0.5 / math.sqrt(2)), 1e-12))
+
+
+def benchmark(
+    orig_sr: int,
+    target_sr: int = config.DEFAULT_SAMPLE_RATE,
+    seconds: float = 10.0,
+    channels: int = 2
+) -> Dict[str, dict]:
+    """
+    Measure speed and quality of every backend for one rate conversion
+    
+    Metrics:
+        speed: Realtime factor (seconds of audio converted per second)
+        passband_snr: SNR of a 1 kHz tone against the ideal output tone (dB)
+        hf_level: Level of a tone at 90% of the output Nyquist (dB, 0 = flat)
+        alias_level: Level left from a tone above the output Nyquist (dB, lower is better)
+    
+    Args:
+        orig_sr: Source sample rate
+        target_sr: Target sample rate
+        seconds: Test signal length
+        channels: Test signal channels
+    
+    Returns:
+        Dict of backend name -> metrics
+    """
+    nyquist = min(orig_sr, target_sr) / 2
+    edge = int(0.1 * target_sr)  # Skip filter warm-up at both ends
+    
+    passband = _tone(1000.0, orig_sr, seconds, channels)
+    ideal = _tone(1000.0, target_sr, seconds, channels)
+    high = _tone(0.9 * nyquist, orig_sr, seconds, channels)
+    # Between the output and input Nyquist: must be filtered out when downsampling
+    alias_freq = (target_sr / 2 + orig_sr / 2) / 2
+    aliasing = _tone(alias_freq, orig_sr, seconds, channels) if orig_sr > target_sr else None
+    
+    results = {}
+    for name in BACKENDS:
+        start = time.perf_counter()
+        out = resample(passband, orig_sr, target_sr, name)
+        elapsed = time.perf_counter() - start
+        
+        n = min(len(out), len(ideal))
+        error = out[edge:n - edge] - ideal[edge:n - edge]
+        results[name] = {
+            "speed": seconds / max(elapsed, 1e-9),
+            "passband_snr": -_level_db(error),
+            "hf_level": _level_db(resample(high, orig_sr, target_sr, name)[edge:-edge]),
+            "alias_level": (_level_db(resample(aliasing, orig_sr, target_sr, name)[edge:-edge])
+                            if aliasing is not None else None),
+        }
+    return results
+
+
+def main():
+    """Benchmark CLI: python resampling.py [--rates 48000 96000 22050]"""
+    parser = argparse.ArgumentParser(description="Benchmark resampler backends")
+    parser.add_argument("--rates", type=int, nargs="+", default=[48000, 96000, 22050],
+                        help="Source sample rates to convert to 44.1kHz")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Test signal length")
+    parser.add_argument("--channels", type=int, default=2, help="Test signal channels")
+    args = parser.parse_args()
+    
+    for orig_sr in args.rates:
+        print(f"\n{orig_sr} Hz -> {config.DEFAULT_SAMPLE_RATE} Hz "
+              f"({args.seconds:.0f}s, {args.channels} ch)")
+        print(f"{'backend':<11}{'speed (x rt)':>14}{'1k SNR dB':>11}{'HF dB':>9}{'alias dB':>10}")
+        for name, m in benchmark(orig_sr, seconds=args.seconds, channels=args.channels).items():
+            alias = f"{m['alias_level']:>10.1f}" if m['alias_level'] is not None else f"{'-':>10}"
+            print(f"{name:<11}{m['speed']:>14.0f}{m['passband_snr']:>11.1f}{m['hf_level']:>9.2f}{alias}")
+
+
+if __name__ == "__main__":
+    main()
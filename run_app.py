@@ -6,15 +6,17 @@ Test interface for the core processing logic (before Streamlit UI)
 import sys
 import argparse
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 import numpy as np
 
 # Import our modules
 from ingestion import FileIngester, FilePair
 from audio_processing import AlignedSlicer, AudioProcessor, MIDIProcessor
 from metadata import MetadataGenerator, TrackMetadata
-from export import ExportSession
+from export import ExportSession, StemJob
+from shared_audio import SharedArena
 import config
+import resampling
 
 
 class DataRefineryApp:
@@ -29,7 +31,13 @@ class DataRefineryApp:
     def ingest_directory(
         self,
         source_dir: str,
-        vocal_rights: str = "Exclusive"
+        vocal_rights: str = "Exclusive",
+        index_path: Optional[str] = None,
+        include: Optional[list] = None,
+        exclude: Optional[list] = None,
+        scan_workers: int = config.SCAN_WORKERS,
+        probe_headers: bool = False,
+        track_scope: bool = False
     ):
         """
         Ingest and pair files from source directory
@@ -37,14 +45,35 @@ class DataRefineryApp:
         Args:
             source_dir: Source directory path
             vocal_rights: Vocal rights setting
+            index_path: Optional persistent scan index (SQLite file)
+            include: Glob patterns files must match (relative to source_dir)
+            exclude: Glob patterns of files/folders to skip
+            scan_workers: Concurrent directory listings
+            probe_headers: Read audio/MIDI headers while scanning
+            track_scope: Pair each top-level folder of source_dir as its own track
         """
         print("\n" + "="*60)
         print("STEP 1: INGESTION & AUTO-PAIRING")
         print("="*60)
         
-        self.ingester = FileIngester(source_dir, vocal_rights)
-        self.ingester.scan_files()
-        self.ingester.auto_pair_files()
+        self.ingester = FileIngester(
+            source_dir,
+            vocal_rights,
+            index_path=index_path,
+            include=include,
+            exclude=exclude,
+            scan_workers=scan_workers,
+            probe_headers=probe_headers,
+            track_scope=track_scope
+        )
+        
+        # Pairs are refined while the walk is still running
+        seen = set()
+        for pair in self.ingester.pair_iter():
+            if id(pair) not in seen:
+                seen.add(id(pair))
+                if len(seen) % 100 == 0:
+                    print(f"  … {len(seen)} stem(s) found so far")
         
         print(self.ingester.get_pairing_report())
     
@@ -60,7 +89,13 @@ class DataRefineryApp:
         mood: list,
         start_bars: float = 0,
         end_bars: Optional[float] = None,
-        stem_labels: Optional[dict] = None
+        stem_labels: Optional[dict] = None,
+        sub_genre: Optional[str] = None,
+        pairs: Optional[List[FilePair]] = None,
+        original_folder: Optional[str] = None,
+        window_bars: Optional[float] = None,
+        stride_bars: Optional[float] = None,
+        workers: int = config.EXPORT_WORKERS
     ):
         """
         Process a complete track with all stems
@@ -68,7 +103,7 @@ class DataRefineryApp:
         Args:
             output_dir: Output directory
             track_title: Original track name
-            genre: Genre tag
+            genre: Parent genre (taxonomy key, e.g. "house")
             bpm: BPM (None to auto-detect)
             key: Musical key
             vocal_rights: Vocal rights setting
@@ -77,11 +112,25 @@ class DataRefineryApp:
             start_bars: Start position in bars
             end_bars: End position in bars (None = full duration)
             stem_labels: Dictionary mapping audio filenames to (group, instrument, layer)
+            sub_genre: Sub-genre (defaults to the parent genre)
+            pairs: Pairs to export (defaults to every ingested pair)
+            original_folder: Source folder name recorded in metadata
+            window_bars: Export every window_bars-long loop between start_bars and
+                end_bars instead of one slice (one decode per stem)
+            stride_bars: Bars between window starts (defaults to window_bars)
+            workers: Stem export processes (1 = serial)
         """
         if self.ingester is None or not self.ingester.pairs:
             print("❌ No files ingested. Run ingest_directory() first.")
             return
         
+        if pairs is None:
+            pairs = self.ingester.pairs
+        if sub_genre is None:
+            sub_genre = genre
+        if original_folder is None:
+            original_folder = self.ingester.source_dir.name
+        
         print("\n" + "="*60)
         print("STEP 2: PROCESSING & EXPORT")
         print("="*60)
@@ -95,109 +144,212 @@ class DataRefineryApp:
         
         # Get BPM from first MIDI if not provided
         if bpm is None:
-            for pair in self.ingester.pairs:
+            for pair in pairs:
                 if pair.midi:
-                    midi_proc = MIDIProcessor()
-                    midi_info = midi_proc.get_midi_info(pair.midi.path)
-                    bpm = midi_info.tempo
+                    if pair.midi.header is not None:
+                        # Already read by the header probe
+                        bpm = pair.midi.header.tempo
+                    else:
+                        midi_proc = MIDIProcessor()
+                        midi_info = midi_proc.get_midi_info(pair.midi.path)
+                        bpm = midi_info.tempo
                     print(f"✓ Using BPM from MIDI: {bpm:.1f}")
                     break
             
             # Still no BPM? Detect from first audio
             if bpm is None:
                 audio_proc = AudioProcessor()
-                first_pair = self.ingester.pairs[0]
+                first_pair = pairs[0]
                 audio, sr = audio_proc.load_audio(first_pair.audio.path)
                 bpm = audio_proc.detect_bpm(audio, sr)
                 print(f"✓ Detected BPM from audio: {bpm:.1f}")
         
         # Create track directory
-        track_path = self.export_session.start_track(uid, genre, bpm, key)
-        
-        # Process each stem
-        audio_count = 0
-        midi_count = 0
+        track_path = self.export_session.start_track(uid, sub_genre.replace(" ", ""), bpm, key)
         
-        for i, pair in enumerate(self.ingester.pairs):
-            print(f"\nProcessing stem {i+1}/{len(self.ingester.pairs)}: {pair.audio.filename}")
-            
-            # Get stem labels (from provided dict or use defaults)
-            if stem_labels and pair.audio.filename in stem_labels:
-                group, instrument, layer = stem_labels[pair.audio.filename]
-            else:
-                # Default labels (would come from UI in full app)
-                group = "Drums"  # Default (using taxonomy format)
-                instrument = "Kick"
-                layer = "Main"
-                print(f"  ⚠ Using default labels: {group}/{instrument}/{layer}")
-            
-            # Normalize labels to match taxonomy format
-            group = config.normalize_group(group)
-            instrument = config.normalize_instrument(instrument)
-            layer = config.normalize_layer(layer)
-            
-            # Determine end bars if not specified
-            if end_bars is None:
-                # Default to 16 bars for demo
-                current_end_bars = 16
-            else:
-                current_end_bars = end_bars
+        # Workers and shared buffers are released even if a stem or the metadata step fails
+        try:
+            # Process each stem
+            audio_count = 0
+            midi_count = 0
+            jobs = []
             
-            # Slice audio and MIDI
-            try:
-                sliced_audio, sample_rate, sliced_midi = self.slicer.slice_pair(
+            for i, pair in enumerate(pairs):
+                print(f"\nProcessing stem {i+1}/{len(pairs)}: {pair.audio.filename}")
+                
+                # Get stem labels (from provided dict or use defaults)
+                if stem_labels and pair.audio.filename in stem_labels:
+                    group, instrument, layer = stem_labels[pair.audio.filename]
+                else:
+                    # Default labels (would come from UI in full app)
+                    group = "Drums"  # Default (using taxonomy format)
+                    instrument = "Kick"
+                    layer = "Main"
+                    print(f"  ⚠ Using default labels: {group}/{instrument}/{layer}")
+                
+                # Normalize labels to match taxonomy format
+                group = config.normalize_group(group)
+                instrument = config.normalize_instrument(instrument)
+                layer = config.normalize_layer(layer)
+                
+                # Determine end bars if not specified
+                if end_bars is None:
+                    # Default to 16 bars for demo
+                    current_end_bars = 16
+                else:
+                    current_end_bars = end_bars
+                
+                # Batch mode: every window from one decode (in shared memory, so
+                # export workers read the windows without copies)
+                if window_bars:
+                    try:
+                        with SharedArena() as arena:
+                            windows, sample_rate = self.slicer.slice_windows(
+                                pair.audio.path,
+                                pair.midi.path if pair.midi else None,
+                                window_bars=window_bars,
+                                stride_bars=stride_bars,
+                                start_bars=start_bars,
+                                end_bars=end_bars,
+                                tempo=bpm,
+                                arena=arena if workers > 1 else None
+                            )
+                            window_jobs = [
+                                StemJob(pair.audio.path, None, group, instrument, layer,
+                                        audio=window.audio, sample_rate=sample_rate, midi_data=window.midi)
+                                for window in windows
+                            ]
+                            results = self.export_session.export_stems(window_jobs, uid, workers=workers)
+                            audio_count += sum(1 for r in results if r.error is None)
+                            midi_count += sum(1 for r in results if r.error is None and r.midi_filename)
+                            del windows, window_jobs, results  # Drop the views so the arena unmaps right away
+                    except Exception as e:
+                        print(f"  ❌ Error processing stem: {e}")
+                    continue
+                
+                # Slice and export audio and MIDI (queued; see export_stems below)
+                jobs.append(StemJob(
                     pair.audio.path,
                     pair.midi.path if pair.midi else None,
-                    start_bars,
-                    current_end_bars,
-                    tempo=bpm
-                )
-                
-                # Export stem
-                self.export_session.export_stem(
-                    sliced_audio,
-                    sample_rate,
-                    sliced_midi,
-                    uid,
                     group,
                     instrument,
-                    layer
-                )
-                
-                audio_count += 1
-                if sliced_midi:
-                    midi_count += 1
-                    
-            except Exception as e:
-                print(f"  ❌ Error processing stem: {e}")
-                continue
+                    layer,
+                    start_bars=start_bars,
+                    end_bars=current_end_bars,
+                    tempo=bpm
+                ))
+            
+            # Export queued stems (filenames allocated in stem order, work spread over workers)
+            if jobs:
+                print(f"\nExporting {len(jobs)} stem(s)")
+                for result in self.export_session.export_stems(jobs, uid, workers=workers):
+                    if result.error is None:
+                        audio_count += 1
+                        if result.midi_filename:
+                            midi_count += 1
+            
+            # Generate and export metadata
+            metadata = self.metadata_gen.create_metadata(
+                uid=uid,
+                original_title=track_title,
+                original_folder=original_folder,
+                bpm=bpm,
+                key=key,
+                genre_parent=genre,
+                genre_sub=sub_genre,
+                audio_count=audio_count,
+                midi_count=midi_count,
+                vocal_rights=vocal_rights,
+                energy_level=energy_level,
+                mood=mood
+            )
+            
+            # Validate metadata
+            errors = self.metadata_gen.validate_metadata_v2(metadata)
+            if errors:
+                print("\n⚠ Metadata validation warnings:")
+                for error in errors:
+                    print(f"  - {error}")
+            
+            # Finalize track
+            self.export_session.finalize_track(metadata)
+        finally:
+            self.export_session.close()
+        
+        print(f"\n✅ TRACK EXPORT COMPLETE")
+        print(f"Output location: {track_path}")
+    
+    def watch_inbox(
+        self,
+        inbox: str,
+        output_dir: str,
+        vocal_rights: str = "Exclusive",
+        use_inotify: bool = True,
+        ingester_options: Optional[dict] = None,
+        **track_options
+    ):
+        """
+        Watch an inbox and export every track folder dropped into it
+        
+        Runs until interrupted (Ctrl+C). Each folder is exported as its own
+        track once it has finished copying; see watcher.InboxWatcher.
         
-        # Generate and export metadata
-        metadata = self.metadata_gen.create_metadata(
-            uid=uid,
-            original_title=track_title,
-            bpm=bpm,
-            key=key,
-            genre=genre,
-            audio_count=audio_count,
-            midi_count=midi_count,
+        Args:
+            inbox: Inbox directory
+            output_dir: Output directory
+            vocal_rights: Vocal rights setting
+            use_inotify: Use inotify when available (polling otherwise)
+            ingester_options: Extra FileIngester keyword arguments
+            **track_options: Remaining process_track arguments (genre, key, ...)
+        """
+        from watcher import InboxWatcher, TrackJob
+        
+        def export_job(job: TrackJob):
+            self.ingester = job.ingester
+            self.process_track(
+                output_dir=output_dir,
+                track_title=job.name,
+                vocal_rights=vocal_rights,
+                pairs=job.pairs,
+                original_folder=job.name,
+                **track_options
+            )
+        
+        watcher = InboxWatcher(
+            inbox,
+            export_job,
             vocal_rights=vocal_rights,
-            energy_level=energy_level,
-            mood=mood
+            use_inotify=use_inotify,
+            ingester_options=ingester_options
         )
+        watcher.run()
+    
+    def process_tracks(self, output_dir: str, **track_options):
+        """
+        Process every track folder of a track-scoped ingestion as its own track
         
-        # Validate metadata
-        errors = self.metadata_gen.validate_metadata(metadata)
-        if errors:
-            print("\n⚠ Metadata validation warnings:")
-            for error in errors:
-                print(f"  - {error}")
+        Each folder gets its own UID, BPM discovery and metadata; the folder
+        name is used as the track title.
         
-        # Finalize track
-        self.export_session.finalize_track(metadata)
+        Args:
+            output_dir: Output directory
+            **track_options: Remaining process_track arguments (genre, key, ...)
+        """
+        if self.ingester is None or not self.ingester.pairs:
+            print("❌ No files ingested. Run ingest_directory() first.")
+            return
         
-        print(f"\n✅ TRACK EXPORT COMPLETE")
-        print(f"Output location: {track_path}")
+        tracks = self.ingester.tracks()
+        for i, (track, pairs) in enumerate(tracks.items(), 1):
+            title = track or self.ingester.source_dir.name
+            print(f"\n▶ Track {i}/{len(tracks)}: {title} ({len(pairs)} stem(s))")
+            self.process_track(
+                output_dir=output_dir,
+                track_title=title,
+                pairs=pairs,
+                original_folder=title,
+                **track_options
+            )
 
 
 def main():
@@ -225,9 +377,15 @@ def main():
     
     parser.add_argument(
         "-g", "--genre",
-        default="trap",
-        choices=[g.lower() for g in config.GENRES],
-        help="Genre"
+        default="bass_music",
+        choices=list(config.PARENT_GENRES),
+        help="Parent genre"
+    )
+    
+    parser.add_argument(
+        "--sub-genre",
+        default=None,
+        help="Sub-genre (e.g. \"Trap Festival\"; defaults to the parent genre)"
     )
     
     parser.add_argument(
@@ -278,27 +436,151 @@ def main():
         help="End position in bars"
     )
     
+    parser.add_argument(
+        "--window-bars",
+        type=float,
+        default=None,
+        help="Export every N-bar loop between --start-bars and --end-bars "
+             "(use --end-bars 0 for the whole stem) instead of a single slice"
+    )
+    
+    parser.add_argument(
+        "--stride-bars",
+        type=float,
+        default=None,
+        help="With --window-bars: bars between loop starts (default: window length)"
+    )
+    
+    parser.add_argument(
+        "--resampler",
+        default=config.RESAMPLER,
+        choices=list(resampling.BACKENDS),
+        help=f"Resampler backend for non-44.1kHz sources: soxr_qq for drafts, soxr_vhq for finals "
+             f"(default: {config.RESAMPLER}; benchmark with python resampling.py)"
+    )
+    
+    parser.add_argument(
+        "--scan-index",
+        nargs="?",
+        const=str(config.SCAN_INDEX_PATH),
+        default=None,
+        help=f"Use a persistent scan index so rescans only read changed folders "
+             f"(default path: {config.SCAN_INDEX_PATH})"
+    )
+    
+    parser.add_argument(
+        "--include",
+        nargs="+",
+        default=None,
+        help="Only ingest files whose path (relative to source_dir) matches one of these globs"
+    )
+    
+    parser.add_argument(
+        "--exclude",
+        nargs="+",
+        default=None,
+        help="Skip files/folders whose relative path matches one of these globs"
+    )
+    
+    parser.add_argument(
+        "--scan-workers",
+        type=int,
+        default=config.SCAN_WORKERS,
+        help=f"Concurrent directory listings (default: {config.SCAN_WORKERS})"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.EXPORT_WORKERS,
+        help=f"Processes exporting stems in parallel (default: {config.EXPORT_WORKERS} = serial)"
+    )
+    
+    parser.add_argument(
+        "--probe",
+        action="store_true",
+        help="Read sample rate/channels/length and MIDI tempo from file headers while scanning"
+    )
+    
+    parser.add_argument(
+        "--tracks",
+        action="store_true",
+        help="Batch mode: every top-level folder of source_dir is a separate track "
+             "(paired within the folder, exported with its own UID)"
+    )
+    
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Daemon mode: watch source_dir as an inbox and export each new track folder "
+             "once it has finished copying (Ctrl+C to stop)"
+    )
+    
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="With --watch: poll for changes instead of using inotify"
+    )
+    
     args = parser.parse_args()
+    resampling.set_default_method(args.resampler)
     
     # Create app instance
     app = DataRefineryApp()
     
-    # Ingest files
-    app.ingest_directory(args.source_dir, args.vocal_rights)
-    
-    # Process track
-    app.process_track(
-        output_dir=args.output,
-        track_title=args.title,
+    track_options = dict(
         genre=args.genre,
+        sub_genre=args.sub_genre,
         bpm=args.bpm,
         key=args.key,
-        vocal_rights=args.vocal_rights,
         energy_level=args.energy,
         mood=args.mood[:2],  # Max 2 moods
         start_bars=args.start_bars,
-        end_bars=args.end_bars
+        end_bars=args.end_bars if not args.window_bars else (args.end_bars or None),
+        window_bars=args.window_bars,
+        stride_bars=args.stride_bars,
+        workers=args.workers
+    )
+    
+    if args.watch:
+        app.watch_inbox(
+            args.source_dir,
+            args.output,
+            vocal_rights=args.vocal_rights,
+            use_inotify=not args.poll,
+            ingester_options=dict(
+                index_path=args.scan_index,
+                include=args.include,
+                exclude=args.exclude,
+                scan_workers=args.scan_workers,
+                probe_headers=args.probe
+            ),
+            **track_options
+        )
+        return
+    
+    # Ingest files
+    app.ingest_directory(
+        args.source_dir,
+        args.vocal_rights,
+        index_path=args.scan_index,
+        include=args.include,
+        exclude=args.exclude,
+        scan_workers=args.scan_workers,
+        probe_headers=args.probe,
+        track_scope=args.tracks
     )
+    
+    # Process track(s)
+    if args.tracks:
+        app.process_tracks(args.output, vocal_rights=args.vocal_rights, **track_options)
+    else:
+        app.process_track(
+            output_dir=args.output,
+            track_title=args.title,
+            vocal_rights=args.vocal_rights,
+            **track_options
+        )
 
 
 if __name__ == "__main__":
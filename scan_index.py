@@ -0,0 +1,289 @@
+"""
+Persistent incremental scan index
+Caches the source tree in SQLite so rescans only list directories that changed
+"""
+
+import os
+import sqlite3
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass
+import config
+from scanner import DirectoryScanner
+
+
+@dataclass
+class IndexedFile:
+    """One audio/MIDI file row from the scan index"""
+    path: str
+    directory: str
+    filename: str
+    kind: str  # "audio", "midi" or "archive"
+    size: int
+    mtime_ns: int
+    inode: int
+    normalized_name: str
+
+
+@dataclass
+class ScanStats:
+    """Counters for one incremental scan"""
+    directories: int = 0
+    directories_listed: int = 0
+    files: int = 0
+    files_updated: int = 0
+    
+    def summary(self) -> str:
+        """Human-readable one-line summary"""
+        return (
+            f"listed {self.directories_listed} of {self.directories} directories, "
+            f"{self.files_updated} of {self.files} files updated"
+        )
+
+
+class ScanIndex:
+    """
+    On-disk index of a source tree keyed by path
+    
+    Directories are stored with their mtime and subdirectory names; files with
+    size, mtime, inode and their cached normalized name. A directory whose
+    mtime is unchanged is not listed again: its files and subdirectories come
+    straight from the index. Listing itself goes through DirectoryScanner
+    (parallel, junk-pruned). Note that editing a file in place does not change
+    its directory's mtime; pass verify_files=True to re-stat every file.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS directories (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            subdirs TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            directory TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            normalized_name TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS files_directory ON files(directory);
+    """
+    
+    def __init__(self, index_path: Optional[str] = None):
+        """
+        Initialize the scan index
+        
+        Args:
+            index_path: SQLite file path (defaults to config.SCAN_INDEX_PATH)
+        """
+        if index_path is None:
+            index_path = config.SCAN_INDEX_PATH
+        self.index_path = Path(index_path)
+        self.last_stats = ScanStats()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection (one per scan, so the index is safe across UI threads)"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.index_path))
+        conn.executescript(self.SCHEMA)
+        return conn
+    
+    @staticmethod
+    def file_kind(filename: str) -> Optional[str]:
+        """Return "audio", "midi", "archive" or None based on the (case-insensitive) extension"""
+        ext = os.path.splitext(filename)[1].lower()
+        if ext in config.SUPPORTED_AUDIO_FORMATS:
+            return "audio"
+        if ext in config.SUPPORTED_MIDI_FORMATS:
+            return "midi"
+        if filename.lower().endswith(tuple(config.SUPPORTED_ARCHIVE_FORMATS)):
+            return "archive"
+        return None
+    
+    @staticmethod
+    def normalize_filename(filename: str) -> str:
+        """Normalize filename for fuzzy matching (same rules as AudioFile/MIDIFile)"""
+        name = os.path.splitext(filename)[0].lower()
+        name = name.replace('_', ' ').replace('-', ' ')
+        return ' '.join(name.split())
+    
+    def scan(
+        self,
+        root: Path,
+        scanner: Optional[DirectoryScanner] = None,
+        verify_files: bool = False
+    ) -> List[IndexedFile]:
+        """
+        Incrementally scan a source tree and update the index
+        
+        Args:
+            root: Source directory
+            scanner: DirectoryScanner to use (junk pruning, globs, concurrency)
+            verify_files: Re-stat files even in directories whose mtime is unchanged
+        
+        Returns:
+            List of IndexedFile rows for every audio/MIDI file under root, sorted by path
+        """
+        results = list(self.iter_scan(root, scanner, verify_files))
+        results.sort(key=lambda f: f.path)
+        return results
+    
+    def iter_scan(
+        self,
+        root: Path,
+        scanner: Optional[DirectoryScanner] = None,
+        verify_files: bool = False
+    ) -> Iterator[IndexedFile]:
+        """
+        Incrementally scan a source tree, yielding files as directories complete
+        
+        The index is committed once the walk finishes (stats in self.last_stats).
+        
+        Args:
+            root: Source directory
+            scanner: DirectoryScanner to use (junk pruning, globs, concurrency)
+            verify_files: Re-stat files even in directories whose mtime is unchanged
+        
+        Yields:
+            IndexedFile rows in discovery order
+        """
+        if scanner is None:
+            scanner = DirectoryScanner()
+        root_str = os.path.abspath(str(root))
+        prefix = root_str.rstrip(os.sep) + os.sep
+        stats = ScanStats()
+        
+        conn = self._connect()
+        try:
+            # Load the cached tree under root in two queries (case-sensitive prefix
+            # test: LIKE would also match /lib/songs when scanning /lib/Songs)
+            cached_dirs: Dict[str, Tuple[int, List[str]]] = {}
+            for path, mtime_ns, subdirs in conn.execute(
+                "SELECT path, mtime_ns, subdirs FROM directories "
+                "WHERE path = ? OR substr(path, 1, ?) = ?",
+                (root_str, len(prefix), prefix)
+            ):
+                cached_dirs[path] = (mtime_ns, json.loads(subdirs))
+            
+            cached_files: Dict[str, Dict[str, IndexedFile]] = {}
+            for row in conn.execute(
+                "SELECT path, directory, filename, kind, size, mtime_ns, inode, normalized_name "
+                "FROM files WHERE directory = ? OR substr(directory, 1, ?) = ?",
+                (root_str, len(prefix), prefix)
+            ):
+                record = IndexedFile(*row)
+                cached_files.setdefault(record.directory, {})[record.filename] = record
+            
+            file_count = 0
+            visited = set()
+            
+            for listing in scanner.walk(root_str, cached=cached_dirs, stat_files=True):
+                directory = listing.path
+                visited.add(directory)
+                stats.directories += 1
+                old_files = cached_files.get(directory, {})
+                
+                if listing.from_cache:
+                    # Unchanged directory: reuse listing
+                    files = list(old_files.values())
+                    if verify_files:
+                        files = self._restat(conn, files, stats)
+                else:
+                    stats.directories_listed += 1
+                    files = [
+                        self._record(directory, name, self.file_kind(name),
+                                     listing.stats[name], old_files.get(name), stats)
+                        for name in listing.files if name in listing.stats
+                    ]
+                    conn.execute("DELETE FROM files WHERE directory = ?", (directory,))
+                    conn.executemany(
+                        "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [_as_row(f) for f in files]
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO directories VALUES (?, ?, ?)",
+                        (directory, listing.mtime_ns, json.dumps(listing.subdirs))
+                    )
+                
+                for record in files:
+                    if scanner.accepts(listing, record.filename):
+                        file_count += 1
+                        yield record
+            
+            # Forget directories that no longer exist under root
+            stale = [d for d in cached_dirs if d not in visited]
+            conn.executemany("DELETE FROM directories WHERE path = ?", [(d,) for d in stale])
+            conn.executemany("DELETE FROM files WHERE directory = ?", [(d,) for d in stale])
+            conn.commit()
+        finally:
+            conn.close()
+        
+        stats.files = file_count
+        self.last_stats = stats
+    
+    def _restat(
+        self,
+        conn: sqlite3.Connection,
+        files: List[IndexedFile],
+        stats: ScanStats
+    ) -> List[IndexedFile]:
+        """Re-stat cached files of an unchanged directory"""
+        refreshed = []
+        for old in files:
+            try:
+                st = os.stat(old.path)
+            except OSError:
+                conn.execute("DELETE FROM files WHERE path = ?", (old.path,))
+                continue
+            record = self._record(old.directory, old.filename, old.kind, st, old, stats)
+            if record is not old:
+                conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             _as_row(record))
+            refreshed.append(record)
+        return refreshed
+    
+    def _record(
+        self,
+        directory: str,
+        filename: str,
+        kind: str,
+        st: os.stat_result,
+        old: Optional[IndexedFile],
+        stats: ScanStats
+    ) -> IndexedFile:
+        """Build a file record, returning the cached one if size/mtime/inode match"""
+        if (old is not None and old.size == st.st_size
+                and old.mtime_ns == st.st_mtime_ns and old.inode == st.st_ino):
+            return old
+        
+        stats.files_updated += 1
+        return IndexedFile(
+            path=os.path.join(directory, filename),
+            directory=directory,
+            filename=filename,
+            kind=kind,
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            inode=st.st_ino,
+            normalized_name=old.normalized_name if old is not None else self.normalize_filename(filename)
+        )
+    
+    def clear(self):
+        """Delete every cached entry"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM directories")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def _as_row(record: IndexedFile) -> tuple:
+    """Tuple in files-table column order"""
+    return (record.path, record.directory, record.filename, record.kind,
+            record.size, record.mtime_ns, record.inode, record.normalized_name)
@@ -0,0 +1,190 @@
+"""
+Parallel directory scanner
+Walks source trees with os.scandir on a bounded thread pool and prunes junk early
+"""
+
+import os
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import config
+from archive_source import is_archive
+
+
+@dataclass
+class DirectoryListing:
+    """Result of listing one directory"""
+    path: str
+    mtime_ns: int
+    rel_dir: str = ""  # Path relative to the scan root ("" or "a/b/")
+    subdirs: List[str] = field(default_factory=list)
+    files: List[str] = field(default_factory=list)
+    stats: Dict[str, os.stat_result] = field(default_factory=dict)
+    from_cache: bool = False
+
+
+class DirectoryScanner:
+    """
+    Concurrent os.scandir walker
+    
+    Each directory listing is one task on a bounded thread pool, so on SMB/NFS
+    mounts many round trips are in flight at once instead of one at a time.
+    Resource forks and OS junk (__MACOSX, ._* AppleDouble files, .DS_Store)
+    are pruned before they are listed or returned, and optional include /
+    exclude globs are matched against paths relative to the scan root.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = config.SCAN_WORKERS,
+        include: Optional[Sequence[str]] = None,
+        exclude: Optional[Sequence[str]] = None,
+        extensions: Optional[Sequence[str]] = None
+    ):
+        """
+        Initialize the scanner
+        
+        Args:
+            max_workers: Maximum concurrent directory listings
+            include: Glob patterns a file's relative path must match (any); None = all
+            exclude: Glob patterns that drop matching files and prune matching directories
+            extensions: Lowercase file extensions to list (defaults to audio + MIDI
+                formats, plus archives when config.SCAN_ARCHIVES is on)
+        """
+        self.max_workers = max(1, max_workers)
+        self.include = list(include if include is not None else config.SCAN_INCLUDE_GLOBS)
+        self.exclude = list(exclude if exclude is not None else config.SCAN_EXCLUDE_GLOBS)
+        if extensions is None:
+            extensions = config.SUPPORTED_AUDIO_FORMATS + config.SUPPORTED_MIDI_FORMATS
+            if config.SCAN_ARCHIVES:
+                extensions = extensions + config.SUPPORTED_ARCHIVE_FORMATS
+        # Suffix match, so multi-part extensions like .tar.gz work
+        self.extensions = tuple(ext.lower() for ext in extensions)
+    
+    @staticmethod
+    def is_junk_dir(name: str) -> bool:
+        """True for OS/archive junk directories (e.g. __MACOSX)"""
+        return name in config.JUNK_DIR_NAMES
+    
+    @staticmethod
+    def is_junk_file(name: str) -> bool:
+        """True for resource forks and OS metadata files (e.g. ._Bass.wav, .DS_Store)"""
+        return name in config.JUNK_FILE_NAMES or name.startswith(tuple(config.JUNK_FILE_PREFIXES))
+    
+    def keep_dir(self, rel_path: str, name: str) -> bool:
+        """Whether a subdirectory should be descended into"""
+        if self.is_junk_dir(name):
+            return False
+        return not any(fnmatch.fnmatch(rel_path, pattern) for pattern in self.exclude)
+    
+    def keep_file(self, rel_path: str, name: str) -> bool:
+        """Whether a file should be returned"""
+        if self.is_junk_file(name):
+            return False
+        if self.include and not any(fnmatch.fnmatch(rel_path, p) for p in self.include):
+            return False
+        return not any(fnmatch.fnmatch(rel_path, pattern) for pattern in self.exclude)
+    
+    def list_directory(
+        self,
+        path: str,
+        cached: Optional[Tuple[int, List[str]]] = None,
+        stat_files: bool = False
+    ) -> DirectoryListing:
+        """
+        List one directory
+        
+        Args:
+            path: Directory path
+            cached: Optional (mtime_ns, subdirs) from a previous scan; if the
+                directory mtime still matches, the listing is skipped
+            stat_files: Also stat every listed file (size/mtime/inode)
+        
+        Returns:
+            DirectoryListing (files matching the scanner's extensions, not yet glob-filtered)
+        """
+        mtime_ns = os.stat(path).st_mtime_ns
+        if cached is not None and cached[0] == mtime_ns:
+            return DirectoryListing(path, mtime_ns, subdirs=list(cached[1]), from_cache=True)
+        
+        listing = DirectoryListing(path, mtime_ns)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not self.is_junk_dir(entry.name):
+                            listing.subdirs.append(entry.name)
+                    elif (entry.name.lower().endswith(self.extensions)
+                          and not self.is_junk_file(entry.name)):
+                        listing.files.append(entry.name)
+                        if stat_files:
+                            listing.stats[entry.name] = entry.stat()
+                except OSError:
+                    continue
+        
+        listing.subdirs.sort()
+        listing.files.sort()
+        return listing
+    
+    def walk(
+        self,
+        root: str,
+        cached: Optional[Dict[str, Tuple[int, List[str]]]] = None,
+        stat_files: bool = False
+    ) -> Iterator[DirectoryListing]:
+        """
+        Walk a tree concurrently, yielding listings as they complete
+        
+        Subdirectories are pruned (junk / exclude globs) before being queued.
+        Listings are yielded unfiltered by globs (so they can be cached as-is);
+        use accepts() to filter their files. Completion order is not
+        deterministic; sort the results if order matters.
+        
+        Args:
+            root: Root directory
+            cached: Optional path -> (mtime_ns, subdirs) map from a previous scan
+            stat_files: Also stat every listed file (size/mtime/inode)
+        
+        Yields:
+            DirectoryListing for every directory reached
+        """
+        root = os.path.abspath(str(root))
+        cached = cached or {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="scan") as pool:
+            pending = {pool.submit(self.list_directory, root, cached.get(root), stat_files)}
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        listing = future.result()
+                    except OSError:
+                        continue
+                    
+                    rel_dir = os.path.relpath(listing.path, root)
+                    listing.rel_dir = "" if rel_dir == "." else rel_dir.replace(os.sep, "/") + "/"
+                    
+                    for name in listing.subdirs:
+                        if not self.keep_dir(listing.rel_dir + name, name):
+                            continue
+                        sub_path = os.path.join(listing.path, name)
+                        pending.add(pool.submit(
+                            self.list_directory, sub_path, cached.get(sub_path), stat_files
+                        ))
+                    
+                    yield listing
+    
+    def accepts(self, listing: DirectoryListing, name: str) -> bool:
+        """
+        Whether a file of a listing passes the junk filter and include/exclude globs
+        
+        Archives are treated like folders: only junk names and exclude globs
+        drop them, include globs are applied to their members.
+        """
+        rel_path = listing.rel_dir + name
+        if is_archive(name):
+            return not self.is_junk_file(name) and self.keep_dir(rel_path, name)
+        return self.keep_file(rel_path, name)
@@ -0,0 +1,360 @@
+"""
+Shared-memory audio buffers
+Hands decoded audio to worker processes as NumPy views instead of pickled
+copies. A SharedArena owns shared segments that decoders write into directly;
+SharedAudio is a small picklable handle (segment name, offset, shape) that a
+worker maps back into a view of the same memory. Segments live in
+multiprocessing.shared_memory, or in a memory-mapped temp file when /dev/shm
+is too small (e.g. Docker's 64 MB default). Arenas must be closed explicitly;
+ones that are garbage collected or still open at exit are reported and
+cleaned up.
+"""
+
+import os
+import sys
+import mmap
+import atexit
+import shutil
+import tempfile
+import threading
+import traceback
+import weakref
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import config
+
+
+_SHM_DIR = "/dev/shm"
+_FILE_PREFIX = "edmgp_audio_"
+
+
+def _shm_has_room(nbytes: int) -> bool:
+    """True if POSIX shared memory can hold nbytes more (always True where it is not a tmpfs)"""
+    if not os.path.isdir(_SHM_DIR):
+        return True
+    try:
+        return shutil.disk_usage(_SHM_DIR).free >= nbytes + config.SHARED_AUDIO_SHM_HEADROOM
+    except OSError:
+        return True
+
+
+class _Segment:
+    """One mapped block of shared memory (POSIX shm or memory-mapped temp file)"""
+    
+    def __init__(self, name: str, kind: str, nbytes: int, create: bool = False):
+        self.name = name
+        self.kind = kind
+        self.nbytes = nbytes
+        self._shm = None
+        self._mmap = None
+        
+        if kind == "shm":
+            if create:
+                self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+                self.name = self._shm.name
+            elif sys.version_info >= (3, 13):
+                self._shm = shared_memory.SharedMemory(name=name, track=False)
+            else:
+                # Workers share the parent's resource tracker, so attaching does not
+                # make the segment disappear when the worker exits
+                self._shm = shared_memory.SharedMemory(name=name)
+            self.buf = self._shm.buf
+        else:
+            if create:
+                fd, self.name = tempfile.mkstemp(prefix=_FILE_PREFIX, suffix=".pcm",
+                                                 dir=config.SHARED_AUDIO_DIR)
+                os.ftruncate(fd, nbytes)
+            else:
+                fd = os.open(name, os.O_RDWR)
+            try:
+                self._mmap = mmap.mmap(fd, nbytes)
+            finally:
+                os.close(fd)
+            self.buf = memoryview(self._mmap)
+        self.address = np.frombuffer(self.buf, dtype=np.uint8).ctypes.data
+    
+    @classmethod
+    def create(cls, nbytes: int) -> "_Segment":
+        nbytes = max(nbytes, 1)
+        kind = "shm" if _shm_has_room(nbytes) else "file"
+        return cls("", kind, nbytes, create=True)
+    
+    def close(self) -> bool:
+        """
+        Unmap in this process
+        
+        Returns:
+            False if NumPy views of the segment are still alive (the mapping is
+            then released when the last one is garbage collected)
+        """
+        try:
+            self.buf.release()
+            if self._shm is not None:
+                self._shm.close()
+            else:
+                self._mmap.close()
+            return True
+        except BufferError:
+            return False
+    
+    def unlink(self):
+        """Remove the segment's name (memory is freed once every process has unmapped it)"""
+        try:
+            if self._shm is not None:
+                self._shm.unlink()
+            else:
+                os.unlink(self.name)
+        except FileNotFoundError:
+            pass
+
+
+class SharedAudio:
+    """
+    Picklable handle to audio in a shared segment
+    
+    Pickling sends only the segment name and the view's layout (a few
+    hundred bytes, whatever the audio length); attach() maps the segment in
+    the receiving process and returns the same samples as a NumPy view.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        nbytes: int,
+        dtype: str,
+        shape: Tuple[int, ...],
+        strides: Tuple[int, ...],
+        offset: int,
+        sample_rate: Optional[int] = None,
+        source_rate: Optional[int] = None
+    ):
+        self.name = name
+        self.kind = kind
+        self.nbytes = nbytes
+        self.dtype = dtype
+        self.shape = shape
+        self.strides = strides
+        self.offset = offset
+        self.sample_rate = sample_rate
+        self.source_rate = source_rate or sample_rate
+    
+    @property
+    def size_bytes(self) -> int:
+        """Bytes of audio this handle refers to"""
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+    
+    def attach(self) -> "AttachedAudio":
+        """
+        Map the segment in this process
+        
+        Use as a context manager: with handle.attach() as audio: ...
+        Drop every reference to audio before the block ends so the mapping can
+        be closed (views that outlive it keep the memory mapped until collected).
+        """
+        return AttachedAudio(self)
+    
+    def __repr__(self):
+        return (f"SharedAudio({self.name}, shape={self.shape}, dtype={self.dtype}, "
+                f"sample_rate={self.sample_rate})")
+
+
+class AttachedAudio:
+    """A SharedAudio mapped into this process (see SharedAudio.attach)"""
+    
+    def __init__(self, handle: SharedAudio):
+        self.handle = handle
+        self._segment = _Segment(handle.name, handle.kind, handle.nbytes)
+        _attached_count(+1)
+        self.array = np.ndarray(handle.shape, dtype=handle.dtype, buffer=self._segment.buf,
+                                offset=handle.offset, strides=handle.strides)
+    
+    def close(self):
+        """Unmap (views still alive keep the mapping until they are collected)"""
+        if self._segment is not None:
+            self.array = None
+            self._segment.close()
+            self._segment = None
+            _attached_count(-1)
+    
+    def __enter__(self) -> np.ndarray:
+        return self.array
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedArena:
+    """
+    Owner of shared audio segments
+    
+    Allocate with empty() / copy() (or pass the arena to AudioProcessor /
+    AlignedSlicer loaders, which decode straight into it), turn any view of
+    arena memory into a handle with share(), and close() when every worker
+    is done: segments are unlinked then. Use as a context manager.
+    """
+    
+    def __init__(self):
+        self._segments: List[_Segment] = []
+        self._lock = threading.Lock()
+        self._origin = "".join(traceback.format_stack(limit=4)[:-1])
+        self._finalizer = weakref.finalize(self, _report_leak, self._segments, self._origin,
+                                           "garbage collected without close()")
+        _live_arenas.add(self)
+    
+    @property
+    def nbytes(self) -> int:
+        """Total bytes allocated"""
+        with self._lock:
+            return sum(segment.nbytes for segment in self._segments)
+    
+    def empty(self, shape, dtype=np.float32) -> np.ndarray:
+        """
+        Uninitialized array in a new shared segment
+        
+        Args:
+            shape: Array shape, e.g. (frames, channels)
+            dtype: Sample dtype
+        
+        Returns:
+            C-contiguous array backed by shared memory
+        """
+        dtype = np.dtype(dtype)
+        segment = _Segment.create(int(np.prod(shape)) * dtype.itemsize)
+        with self._lock:
+            if not self._finalizer.alive:
+                segment.close()
+                segment.unlink()
+                raise ValueError("SharedArena is closed")
+            self._segments.append(segment)
+        return np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+    
+    def copy(self, audio_data: np.ndarray) -> np.ndarray:
+        """Copy an array into a new shared segment (one copy, instead of one per pickle)"""
+        out = self.empty(audio_data.shape, audio_data.dtype)
+        out[...] = audio_data
+        return out
+    
+    def share(self, audio_data: np.ndarray) -> SharedAudio:
+        """
+        Picklable handle for a view of arena memory (no copy)
+        
+        Args:
+            audio_data: Array allocated by this arena, or any slice/view of one
+        
+        Returns:
+            SharedAudio (sample rates are taken from AudioBuffer attributes)
+        """
+        segment, offset = self._locate(audio_data)
+        if segment is None:
+            raise ValueError("Array is not backed by this SharedArena (use copy() first)")
+        sample_rate = getattr(audio_data, 'sample_rate', None)
+        return SharedAudio(
+            segment.name,
+            segment.kind,
+            segment.nbytes,
+            audio_data.dtype.str,
+            tuple(audio_data.shape),
+            tuple(audio_data.strides),
+            offset,
+            sample_rate,
+            getattr(audio_data, 'source_rate', None) or sample_rate
+        )
+    
+    def owns(self, audio_data: np.ndarray) -> bool:
+        """True if the array is a view of this arena's memory"""
+        return self._locate(audio_data)[0] is not None
+    
+    def _locate(self, audio_data: np.ndarray) -> Tuple[Optional[_Segment], int]:
+        address = audio_data.__array_interface__['data'][0]
+        with self._lock:
+            for segment in self._segments:
+                # <= so an empty view at the very end still resolves
+                if segment.address <= address <= segment.address + segment.nbytes:
+                    return segment, address - segment.address
+        return None, 0
+    
+    def close(self):
+        """Unmap and unlink every segment (handles already sent out stop resolving)"""
+        with self._lock:
+            segments = list(self._segments)
+            self._segments.clear()
+            self._finalizer.detach()
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+        _live_arenas.discard(self)
+    
+    def __enter__(self) -> "SharedArena":
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+_live_arenas = weakref.WeakSet()
+_attached_lock = threading.Lock()
+_attached = 0
+
+
+def _attached_count(delta: int):
+    global _attached
+    with _attached_lock:
+        _attached += delta
+
+
+def _report_leak(segments: List[_Segment], origin: str, reason: str):
+    if not segments:
+        return
+    nbytes = sum(segment.nbytes for segment in segments)
+    print(f"⚠ SharedArena {reason}: releasing {len(segments)} segment(s), "
+          f"{nbytes / 1e6:.1f} MB. Created at:\n{origin}", file=sys.stderr)
+    for segment in segments:
+        segment.close()
+        segment.unlink()
+    segments.clear()
+
+
+def live_segments() -> Dict[str, int]:
+    """
+    Segments owned by open arenas in this process (leak check)
+    
+    Returns:
+        Dict of segment name -> bytes
+    """
+    return {segment.name: segment.nbytes
+            for arena in list(_live_arenas) for segment in list(arena._segments)}
+
+
+def find_shared(audio_data) -> Optional[SharedAudio]:
+    """
+    Handle for an array if it lives in any open SharedArena of this process
+    
+    Args:
+        audio_data: Any array
+    
+    Returns:
+        SharedAudio, or None if the array is ordinary process memory
+    """
+    if not isinstance(audio_data, np.ndarray):
+        return None
+    for arena in list(_live_arenas):
+        if arena.owns(audio_data):
+            return arena.share(audio_data)
+    return None
+
+
+def attached_count() -> int:
+    """SharedAudio handles currently mapped (attach() without close()) in this process"""
+    return _attached
+
+
+@atexit.register
+def _release_at_exit():
+    for arena in list(_live_arenas):
+        with arena._lock:
+            segments = list(arena._segments)
+            arena._segments.clear()
+            arena._finalizer.detach()
+        _report_leak(segments, arena._origin, "still open at exit")
@@ -13,15 +13,19 @@ import librosa
 import librosa.display
 import soundfile as sf
 import base64
+import time
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 import config
+import archive_source
+import resampling
 from ingestion import FileIngester
-from audio_processing import AudioProcessor, MIDIProcessor, AlignedSlicer
+from audio_processing import AudioProcessor, MIDIProcessor
+from audio_cache import get_cache as get_audio_cache
 from metadata import MetadataGenerator, StemValidator
-from export import ExportSession
+from export import ExportSession, StemJob
 
 # V2: MIDI Piano Roll Visualization
 def render_midi_piano_roll(midi_path: Path, width: int = 12, height: int = 3):
@@ -41,9 +45,9 @@ def render_midi_piano_roll(midi_path: Path, width: int = 12, height: int = 3):
         return
     
     try:
-        pm = pretty_midi.PrettyMIDI(str(midi_path))
+        notes = MIDIProcessor().load_note_array(midi_path)  # Parsed once per file (midi_cache)
         # 50 frames per second is usually enough for visualization
-        piano_roll = pm.get_piano_roll(fs=50)  # shape: (128, T)
+        piano_roll = notes.piano_roll(fs=50)  # shape: (128, T)
         
         fig, ax = plt.subplots(figsize=(width, height))
         ax.imshow(piano_roll, aspect="auto", origin="lower", cmap="viridis")
@@ -75,8 +79,7 @@ def wavesurfer_player(audio_path: Path, height: int = 128, key: str = None, enab
     # V1.3 Performance: Use cached base64 encoding
     cache_key = str(audio_path)
     if cache_key not in st.session_state.wavesurfer_b64_cache:
-        with open(audio_path, 'rb') as f:
-            audio_bytes = f.read()
+        audio_bytes = archive_source.read_bytes(audio_path)
         st.session_state.wavesurfer_b64_cache[cache_key] = base64.b64encode(audio_bytes).decode()
     
     audio_b64 = st.session_state.wavesurfer_b64_cache[cache_key]
@@ -359,6 +362,8 @@ def initialize_session_state():
         'slice_settings': {'start_bars': 0, 'end_bars': 16},
         # V1.1 Critical additions
         'enable_slicer': False,  # Default: Full Track Mode
+        'resampler': config.RESAMPLER,  # Resampler backend for non-44.1kHz sources
+        'export_workers': config.EXPORT_WORKERS,  # Stem export processes (1 = serial)
         'deleted_pairs': set(),
         'custom_instruments': {},
         'manual_uid': "",
@@ -366,6 +371,8 @@ def initialize_session_state():
         'theme': 'dark',  # Default to dark theme
         'lyrics_file': None,  # V1.3: Uploaded lyrics file
         'preview_ingest_idx': None,  # V1.3: Selected file for preview in Step 1
+        'track_pairs': {},  # Track folder -> pairs (one-track-per-folder scans)
+        'current_track': None,  # Track folder being labeled/exported
         'wavesurfer_b64_cache': {}  # V1.3: Cache for base64 encoded audio
     }
     
@@ -456,6 +463,16 @@ def render_sidebar():
                 st.success("Cache cleared!")
                 st.rerun()
         
+        # Decoded audio shared by previews, BPM detection and export
+        decoded = get_audio_cache().stats()
+        if decoded['entries']:
+            st.caption(f"Decoded audio cache: {decoded['entries']} stems, "
+                       f"{decoded['bytes'] / 1e6:.0f} / {decoded['max_bytes'] / 1e6:.0f} MB, "
+                       f"{decoded['hits'] + decoded['spill_hits']} hits / {decoded['misses']} misses")
+            if st.button("🗑️ Clear Decoded Audio", help="Drop decoded stems kept in memory"):
+                get_audio_cache().clear()
+                st.rerun()
+        
         st.markdown("---")
         
         # Vocal Rights
@@ -585,10 +602,42 @@ def render_step1_ingestion():
         "Source Directory",
         value=st.session_state.source_dir or "",
         placeholder="C:\\Path\\To\\Your\\Stems",
-        help="Folder containing .wav and .mid files (searches recursively in subfolders)"
+        help="Folder containing .wav and .mid files (searches recursively in subfolders, "
+             "including inside .zip/.tar packs), or a single .zip/.tar pack"
     )
     
     col1, col2 = st.columns([1, 3])
+    with col2:
+        use_scan_index = st.checkbox(
+            "⚡ Use scan cache",
+            value=True,
+            help="Remember the folder tree between scans so rescans only read folders that changed"
+        )
+        track_scope = st.checkbox(
+            "🗂️ One track per folder",
+            value=False,
+            help="Source folder holds several songs: each top-level folder is paired on its own "
+                 "and labeled/exported as a separate track"
+        )
+        probe_headers = st.checkbox(
+            "📋 Read file headers",
+            value=True,
+            help="Read sample rate, channels, length and MIDI tempo from file headers while scanning (no decoding)"
+        )
+        with st.expander("Scan filters"):
+            include_text = st.text_input(
+                "Include patterns",
+                value=", ".join(config.SCAN_INCLUDE_GLOBS),
+                placeholder="*/Stems/*",
+                help="Comma-separated globs (relative to the source folder). Empty = all files"
+            )
+            exclude_text = st.text_input(
+                "Exclude patterns",
+                value=", ".join(config.SCAN_EXCLUDE_GLOBS),
+                placeholder="*/Bounces*",
+                help="Comma-separated globs for files or folders to skip. "
+                     "__MACOSX, ._* and .DS_Store are always skipped"
+            )
     with col1:
         if st.button("🔍 Scan & Pair Files", type="primary", use_container_width=True):
             if source_dir:
@@ -596,9 +645,50 @@ def render_step1_ingestion():
                 
                 with st.spinner("Scanning files recursively..."):
                     try:
-                        ingester = FileIngester(Path(source_dir))
-                        ingester.scan_files()
-                        ingester.auto_pair_files()
+                        ingester = FileIngester(
+                            Path(source_dir),
+                            index_path=config.SCAN_INDEX_PATH if use_scan_index else None,
+                            include=[p.strip() for p in include_text.split(",") if p.strip()],
+                            exclude=[p.strip() for p in exclude_text.split(",") if p.strip()],
+                            probe_headers=probe_headers,
+                            track_scope=track_scope
+                        )
+                        
+                        # Pair progressively and show partial results while scanning
+                        progress_text = st.empty()
+                        partial_table = st.empty()
+                        found_pairs = {}
+                        last_render = 0.0
+                        for pair in ingester.pair_iter():
+                            found_pairs[id(pair)] = pair
+                            if time.monotonic() - last_render < 0.5:
+                                continue
+                            last_render = time.monotonic()
+                            with_midi = sum(1 for p in found_pairs.values() if p.midi)
+                            progress_text.caption(
+                                f"Found {len(found_pairs)} stem(s) so far, {with_midi} with MIDI..."
+                            )
+                            partial_table.dataframe(
+                                pd.DataFrame([
+                                    {
+                                        "Audio": p.audio.filename,
+                                        "MIDI": p.midi.filename if p.midi else "",
+                                        "Match": round(p.match_score)
+                                    }
+                                    for p in list(found_pairs.values())[-20:]
+                                ]),
+                                use_container_width=True,
+                                hide_index=True
+                            )
+                        progress_text.empty()
+                        partial_table.empty()
+                        
+                        # One track per folder: work on the first track, switch below
+                        st.session_state.track_pairs = ingester.tracks() if track_scope else {}
+                        st.session_state.current_track = None
+                        if st.session_state.track_pairs:
+                            st.session_state.current_track = next(iter(st.session_state.track_pairs))
+                            ingester.pairs = st.session_state.track_pairs[st.session_state.current_track]
                         
                         # Flag vocal files (V1.1)
                         if st.session_state.vocal_rights == "Royalty_Free":
@@ -623,6 +713,26 @@ def render_step1_ingestion():
     # Display results with delete buttons and audio playback (V1.1)
     if st.session_state.ingester:
         st.markdown("### Pairing Results")
+        
+        if st.session_state.track_pairs:
+            track_names = list(st.session_state.track_pairs)
+            selected_track = st.selectbox(
+                f"🗂️ Track folder ({len(track_names)} found)",
+                track_names,
+                index=track_names.index(st.session_state.current_track),
+                format_func=lambda t: f"{t or '(top level)'} — {len(st.session_state.track_pairs[t])} stem(s)"
+            )
+            if selected_track != st.session_state.current_track:
+                # Label and export each track separately
+                st.session_state.current_track = selected_track
+                st.session_state.ingester.pairs = st.session_state.track_pairs[selected_track]
+                st.session_state.stem_labels = {}
+                st.session_state.current_stem_index = 0
+                st.session_state.deleted_pairs = set()
+                st.session_state.preview_ingest_idx = None
+                if st.session_state.vocal_rights == "Royalty_Free":
+                    st.session_state.vocal_flagged_indices = set(st.session_state.ingester.flag_vocal_files())
+                st.rerun()
         st.caption("🎤 = Vocal file (flagged in Royalty_Free mode) | 🗑️ = Delete | ▶️ = Play audio")
         
         # Build active pairs list
@@ -657,11 +767,19 @@ def render_step1_ingestion():
                     status = "✅" if pair.audio.filename in st.session_state.stem_labels else "⏳"
                     display_name = f"**{pair.audio.filename}**" if not is_vocal else pair.audio.filename
                     st.markdown(f"{icon}{display_name} {status}")
+                    if pair.audio.header:
+                        h = pair.audio.header
+                        st.caption(f"{h.sample_rate / 1000:g} kHz · {h.channels} ch · "
+                                   f"{h.subtype} · {int(h.duration // 60)}:{int(h.duration % 60):02d}")
                 
                 with col3:
                     midi_text = pair.midi.filename if pair.midi else "❌ No MIDI"
                     score_text = f"({pair.match_score:.0f}%)" if pair.midi else ""
                     st.markdown(f"{midi_text} {score_text}")
+                    if pair.midi and pair.midi.header:
+                        h = pair.midi.header
+                        tempo_map = " · tempo map" if h.has_tempo_map else ""
+                        st.caption(f"{h.tempo:.1f} BPM · {h.time_signature[0]}/{h.time_signature[1]}{tempo_map}")
                 
                 with col4:
                     # V1.3 Performance: Single shared preview instead of per-row player
@@ -739,6 +857,16 @@ def render_step2_labeling():
     else:
         st.info("✂️ **Loop Slicer Mode:** Files will be cropped to selected bar range")
     
+    # Resampler quality (draft runs can use a fast tier, final runs a high one)
+    backends = list(resampling.BACKENDS)
+    st.session_state.resampler = st.selectbox(
+        "Resampler",
+        options=backends,
+        index=backends.index(st.session_state.resampler),
+        format_func=lambda name: f"{name} - {resampling.BACKENDS[name][1]}",
+        help="Used for sources that are not 44.1kHz. Benchmark: python resampling.py"
+    )
+    
     st.markdown("---")
     
     # Navigation
@@ -1020,6 +1148,13 @@ def render_step3_export():
     # Export config
     st.markdown("### Export Configuration")
     output_dir = st.text_input("Output Directory", value="Clean_Dataset_Staging")
+    st.session_state.export_workers = int(st.number_input(
+        "Export Workers",
+        min_value=1,
+        max_value=64,
+        value=int(st.session_state.export_workers),
+        help="Processes exporting stems in parallel (1 = one stem at a time). Output is identical."
+    ))
     
     # Summary
     st.markdown("### Export Summary")
@@ -1067,10 +1202,8 @@ def render_step3_export():
         
         try:
             # Initialize
-            audio_proc = AudioProcessor()
-            slicer = AlignedSlicer() if st.session_state.enable_slicer else None
             metadata_gen = MetadataGenerator()
-            export_session = ExportSession(output_dir)
+            export_session = ExportSession(output_dir, resampler=st.session_state.resampler)
             
             # Start batch
             status_text.text("Creating batch directory...")
@@ -1095,12 +1228,9 @@ def render_step3_export():
             audio_count = 0
             midi_count = 0
             
-            # Process each stem
-            for i, (original_idx, pair) in enumerate(active_pairs):
-                progress = 10 + int((i / total_stems) * 80)
-                progress_bar.progress(progress)
-                status_text.text(f"Processing {i+1}/{total_stems}: {pair.audio.filename}")
-                
+            # Queue each stem (filenames are allocated in this order)
+            jobs = []
+            for original_idx, pair in active_pairs:
                 # Get labels
                 group, instrument, layer = st.session_state.stem_labels[pair.audio.filename]
                 
@@ -1112,50 +1242,60 @@ def render_step3_export():
                 elif pair.midi:
                     midi_path = pair.midi.path
                 
-                # V1.1: Full Track Mode vs Loop Slicer
+                # V1.1: Full Track Mode (whole file, streamed or copied) vs Loop Slicer
                 if st.session_state.enable_slicer:
-                    # Use slicer
-                    sliced_audio, sr, sliced_midi = slicer.slice_pair(
+                    jobs.append(StemJob(
                         pair.audio.path,
                         midi_path,
+                        group,
+                        instrument,
+                        layer,
                         start_bars=st.session_state.slice_settings['start_bars'],
                         end_bars=st.session_state.slice_settings['end_bars'],
                         tempo=metadata['bpm']
-                    )
-                    sample_type = "loop"
+                    ))
                 else:
-                    # Full Track Mode - no slicing
-                    audio_data, sr = audio_proc.load_audio(pair.audio.path)
-                    # Just resample if needed
-                    if sr != config.DEFAULT_SAMPLE_RATE:
-                        audio_data = audio_proc.resample_audio(audio_data, sr, config.DEFAULT_SAMPLE_RATE)
-                        sr = config.DEFAULT_SAMPLE_RATE
-                    sliced_audio = audio_data
-                    sliced_midi = midi_path  # Use original MIDI
-                    sample_type = "full_track"
-                
-                # Export (V2: now returns actual filenames)
-                audio_filename, midi_filename = export_session.export_stem(sliced_audio, sr, sliced_midi, uid, group, instrument, layer)
-                
+                    jobs.append(StemJob(pair.audio.path, midi_path, group, instrument, layer))
+            sample_type = "loop" if st.session_state.enable_slicer else "full_track"
+            
+            def show_progress(done, total):
+                progress_bar.progress(10 + int((done / total) * 80))
+                status_text.text(f"Exported {done}/{total} stems")
+            
+            status_text.text(f"Exporting {total_stems} stems...")
+            try:
+                results = export_session.export_stems(
+                    jobs, uid, workers=st.session_state.export_workers, progress=show_progress
+                )
+            finally:
+                # Shut the worker pool down even if the progress callback raised
+                # (e.g. Streamlit stopping the script mid-export)
+                export_session.close()
+            failed = [r for r in results if r.error is not None]
+            if failed:
+                raise RuntimeError(f"{Path(failed[0].job.audio_path).name}: {failed[0].error}")
+            
+            validator = StemValidator()
+            for result in results:
+                job = result.job
                 audio_count += 1
-                if sliced_midi:
+                if result.midi_filename:
                     midi_count += 1
                 
                 # Build stem manifest entry (V2: use actual filenames from export)
-                validator = StemValidator()
-                is_mono = validator.should_force_mono(group, instrument)
+                is_mono = validator.should_force_mono(job.group, job.instrument)
                 
                 stem_entry = {
-                    "filename": audio_filename,  # V2: Use actual filename from export
-                    "group": group.lower(),
-                    "instrument": instrument.lower(),
-                    "layer": layer.lower(),
+                    "filename": result.audio_filename,  # V2: Use actual filename from export
+                    "group": job.group.lower(),
+                    "instrument": job.instrument.lower(),
+                    "layer": job.layer.lower(),
                     "type": sample_type,
                     "channels": 1 if is_mono else 2
                 }
                 
-                if midi_filename:
-                    stem_entry["midi_pair"] = midi_filename  # V2: Use actual filename from export
+                if result.midi_filename:
+                    stem_entry["midi_pair"] = result.midi_filename  # V2: Use actual filename from export
                 
                 stems_manifest.append(stem_entry)
             
@@ -1166,7 +1306,7 @@ def render_step3_export():
             track_metadata = metadata_gen.create_metadata(
                 uid=uid,
                 original_title=metadata['title'],
-                original_folder=Path(st.session_state.source_dir).name,
+                original_folder=st.session_state.current_track or Path(st.session_state.source_dir).name,
                 bpm=metadata['bpm'],
                 key=metadata['key'],
                 genre_parent=metadata['genre_parent'],
@@ -1237,6 +1377,7 @@ def render_step3_export():
             - **Mode:** {'Loop Slicer' if st.session_state.enable_slicer else 'Full Track'}
             - **Output:** `{track_path}`
             """)
+            st.caption(f"ℹ️ {export_session.resample_count} resample operation(s) in this export")
             
             st.session_state.processing_complete = True
             
@@ -0,0 +1,10 @@
+"""
+Test configuration
+The application modules live in the repository root (no package), so the
+root is put on sys.path for the tests.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
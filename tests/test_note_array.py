@@ -0,0 +1,67 @@
+"""
+NoteArrayMIDI.write must produce the bytes PrettyMIDI.write produces
+"""
+
+import io
+import numpy as np
+import pretty_midi
+import pytest
+from note_array import NoteArrayMIDI
+
+
+def _pretty_midi_bytes(midi_data: pretty_midi.PrettyMIDI) -> bytes:
+    buffer = io.BytesIO()
+    midi_data.write(buffer)
+    return buffer.getvalue()
+
+
+def _note_array_bytes(notes: NoteArrayMIDI) -> bytes:
+    buffer = io.BytesIO()
+    notes.write(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def song() -> pretty_midi.PrettyMIDI:
+    """Three instruments (one drum kit) with off-grid, overlapping and zero-length notes"""
+    rng = np.random.default_rng(7)
+    midi_data = pretty_midi.PrettyMIDI(initial_tempo=127.3)
+    midi_data.time_signature_changes = [
+        pretty_midi.TimeSignature(4, 4, 0.0),
+        pretty_midi.TimeSignature(7, 8, 6.25),
+    ]
+    for program, is_drum in ((33, False), (81, False), (0, True)):
+        instrument = pretty_midi.Instrument(program=program, is_drum=is_drum, name=f"p{program}")
+        starts = np.sort(rng.uniform(0.0, 16.0, 200))
+        for start, length in zip(starts, rng.uniform(0.0, 1.5, 200)):
+            instrument.notes.append(pretty_midi.Note(
+                velocity=int(rng.integers(1, 128)),
+                pitch=int(rng.integers(24, 100)),
+                start=float(start),
+                end=float(start + length)
+            ))
+        instrument.notes.append(pretty_midi.Note(velocity=90, pitch=60, start=3.0, end=3.0))
+        midi_data.instruments.append(instrument)
+    return midi_data
+
+
+def test_write_matches_pretty_midi(song):
+    notes = NoteArrayMIDI.from_pretty_midi(song)
+    assert _note_array_bytes(notes) == _pretty_midi_bytes(notes.to_pretty_midi())
+
+
+def test_sliced_write_matches_pretty_midi(song):
+    notes = NoteArrayMIDI.from_pretty_midi(song)
+    for start, end in ((0.0, 4.0), (2.71, 9.5), (6.25, 16.0)):
+        sliced = notes.slice(start, end)
+        assert _note_array_bytes(sliced) == _pretty_midi_bytes(sliced.to_pretty_midi())
+
+
+def test_write_without_time_signature():
+    midi_data = pretty_midi.PrettyMIDI(initial_tempo=90.0)
+    instrument = pretty_midi.Instrument(program=0)
+    instrument.notes.append(pretty_midi.Note(velocity=100, pitch=64, start=0.5, end=1.25))
+    midi_data.instruments.append(instrument)
+    
+    notes = NoteArrayMIDI.from_pretty_midi(midi_data)
+    assert _note_array_bytes(notes) == _pretty_midi_bytes(notes.to_pretty_midi())
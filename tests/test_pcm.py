@@ -0,0 +1,54 @@
+"""
+The integer PCM16 path (int32_to_pcm16) against the float path (to_pcm16)
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+import pcm
+
+
+def _float_and_int(tmp_path, audio: np.ndarray, subtype: str):
+    """The same file read as float32 and as int32"""
+    path = tmp_path / "audio.wav"
+    sf.write(str(path), audio, 44100, subtype=subtype)
+    as_float, _ = sf.read(str(path), dtype="float32", always_2d=True)
+    as_int, _ = sf.read(str(path), dtype="int32", always_2d=True)
+    return as_float, as_int
+
+
+@pytest.mark.parametrize("subtype", ["PCM_16", "PCM_24"])
+@pytest.mark.parametrize("mono", [False, True])
+def test_int_path_within_one_lsb(tmp_path, subtype, mono):
+    rng = np.random.default_rng(11)
+    audio = rng.uniform(-0.6, 0.6, (20000, 2))
+    as_float, as_int = _float_and_int(tmp_path, audio, subtype)
+    
+    expected = pcm.normalize_to_pcm16(as_float, mono=mono)
+    gain = pcm.integer_gain(pcm.peak_int(as_int, mono), 2 if mono else 1)
+    result = pcm.int32_to_pcm16(as_int, gain, mono=mono)
+    
+    assert result.shape == expected.shape
+    assert np.abs(result.astype(np.int32) - expected).max() <= 1
+    # Only samples within rounding noise of a step boundary may differ
+    assert np.mean(result != expected) < 0.01
+
+
+def test_full_scale_pcm16_is_exact(tmp_path):
+    # A 16-bit source already at full scale must come through unchanged
+    rng = np.random.default_rng(5)
+    audio = rng.uniform(-1.0, 1.0, (20000, 2))
+    audio[0, 0] = -1.0
+    as_float, as_int = _float_and_int(tmp_path, audio, "PCM_16")
+    
+    expected = pcm.normalize_to_pcm16(as_float)
+    result = pcm.int32_to_pcm16(as_int, pcm.integer_gain(pcm.peak_int(as_int)))
+    
+    np.testing.assert_array_equal(result, expected)
+    np.testing.assert_array_equal(result, as_int >> 16)
+
+
+def test_silence(tmp_path):
+    as_int = np.zeros((64, 2), dtype=np.int32)
+    result = pcm.int32_to_pcm16(as_int, pcm.integer_gain(pcm.peak_int(as_int)))
+    np.testing.assert_array_equal(result, np.zeros((64, 2), dtype=np.int16))
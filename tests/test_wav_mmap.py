@@ -0,0 +1,44 @@
+"""
+WavMap.read must return the float32 values soundfile returns
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+from wav_mmap import WavMap
+
+
+SUBTYPES = ["PCM_U8", "PCM_16", "PCM_24", "PCM_32", "FLOAT"]
+
+
+def _write(path, subtype: str, channels: int, frames: int = 4096):
+    rng = np.random.default_rng(3)
+    audio = rng.uniform(-1.0, 1.0, (frames, channels))
+    # Extremes: full-scale samples and the 24-bit words' sign bits
+    audio[:4] = [[-1.0], [1.0 - 2 ** -23], [2 ** -23], [-(2 ** -23)]]
+    sf.write(str(path), audio, 48000, subtype=subtype)
+    return path
+
+
+@pytest.mark.parametrize("subtype", SUBTYPES)
+@pytest.mark.parametrize("channels", [1, 2])
+def test_read_matches_soundfile(tmp_path, subtype, channels):
+    path = _write(tmp_path / "audio.wav", subtype, channels)
+    expected, _ = sf.read(str(path), dtype="float32")
+    
+    with WavMap(path) as wav:
+        assert wav.frames == len(expected)
+        np.testing.assert_array_equal(wav.read(), expected)
+
+
+def test_read_ranges_24bit(tmp_path):
+    # First frame: the overlapping word's stray byte comes from the header
+    path = _write(tmp_path / "audio.wav", "PCM_24", 2)
+    expected, _ = sf.read(str(path), dtype="float32")
+    
+    with WavMap(path) as wav:
+        for start, stop in ((0, 1), (1, 2), (17, 1000), (4000, 4096), (4095, None)):
+            np.testing.assert_array_equal(wav.read(start, stop), expected[start:stop])
+        out = np.zeros((10, 2), dtype=np.float32)
+        assert wav.read(100, 110, out=out) is out
+        np.testing.assert_array_equal(out, expected[100:110])
@@ -0,0 +1,455 @@
+"""
+Watch-folder ingestion daemon
+Watches an inbox for new track folders (inotify on Linux, polling elsewhere),
+waits until each folder has finished copying, pairs it and queues it for export
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass
+import config
+from ingestion import FileIngester, FilePair
+from scanner import DirectoryScanner
+
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+FolderSignature = Tuple[int, int, int]  # (file count, total bytes, newest mtime_ns)
+
+
+@dataclass
+class TrackJob:
+    """A settled inbox folder, paired and ready for export"""
+    name: str
+    path: Path
+    pairs: List[FilePair]
+    ingester: FileIngester
+    signature: FolderSignature
+
+
+def folder_signature(path: Path) -> Optional[Tuple[FolderSignature, bool]]:
+    """
+    Summarize a folder tree for change detection
+    
+    Args:
+        path: Track folder
+    
+    Returns:
+        ((file count, total bytes, newest mtime_ns), has_partial_files),
+        or None if the folder no longer exists
+    """
+    if not path.is_dir():
+        return None
+    
+    count = size = newest = 0
+    partial = False
+    partial_suffixes = tuple(s.lower() for s in config.WATCH_PARTIAL_SUFFIXES)
+    
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if not DirectoryScanner.is_junk_dir(d)]
+        for name in files:
+            if DirectoryScanner.is_junk_file(name):
+                continue
+            if name.lower().endswith(partial_suffixes):
+                partial = True
+            try:
+                st = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            count += 1
+            size += st.st_size
+            newest = max(newest, st.st_mtime_ns)
+    
+    return (count, size, newest), partial
+
+
+class InotifyBackend:
+    """
+    Recursive inotify watch on the inbox (Linux only, via ctypes)
+    
+    Reports which top-level folders saw activity. New subdirectories are
+    watched as soon as they appear; on queue overflow every folder is
+    reported so nothing is missed.
+    """
+    
+    def __init__(self, inbox: Path):
+        """
+        Initialize the backend
+        
+        Args:
+            inbox: Inbox directory
+        
+        Raises:
+            OSError: inotify is not available
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        
+        self.inbox = Path(os.path.abspath(str(inbox)))
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        
+        self.watches: Dict[int, Path] = {}
+        self.add_tree(self.inbox)
+    
+    def add_tree(self, path: Path):
+        """Watch a directory and all of its subdirectories"""
+        for root, dirs, _ in os.walk(path):
+            dirs[:] = [d for d in dirs if not DirectoryScanner.is_junk_dir(d)]
+            wd = self._add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                print(f"⚠ Cannot watch {root}: {os.strerror(err)}")
+                continue
+            self.watches[wd] = Path(root)
+    
+    def top_level(self, path: Path) -> Optional[str]:
+        """Top-level inbox folder containing path (None for the inbox itself)"""
+        try:
+            parts = path.relative_to(self.inbox).parts
+        except ValueError:
+            return None
+        return parts[0] if parts else None
+    
+    def wait(self, timeout: float) -> Set[str]:
+        """
+        Block for up to timeout seconds and collect touched folders
+        
+        Args:
+            timeout: Seconds to wait for events
+        
+        Returns:
+            Names of top-level inbox folders with activity (may be empty)
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        
+        touched = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                raw_name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + name_len]
+                offset += _EVENT_HEADER.size + name_len
+                
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped: treat every folder as touched
+                    touched.update(p.name for p in self.inbox.iterdir() if p.is_dir())
+                    continue
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                
+                directory = self.watches.get(wd)
+                if directory is None:
+                    continue
+                path = directory / os.fsdecode(raw_name.rstrip(b"\0")) if name_len else directory
+                
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                
+                track = self.top_level(path)
+                if track is not None:
+                    touched.add(track)
+        
+        return touched
+    
+    def close(self):
+        """Release the inotify descriptor"""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingBackend:
+    """Portable fallback: compares folder signatures every poll interval"""
+    
+    def __init__(self, inbox: Path):
+        """
+        Initialize the backend
+        
+        Args:
+            inbox: Inbox directory
+        """
+        self.inbox = Path(inbox)
+        self.signatures: Dict[str, Optional[Tuple[FolderSignature, bool]]] = self._snapshot()
+    
+    def _snapshot(self) -> Dict[str, Optional[Tuple[FolderSignature, bool]]]:
+        """Signature of every top-level inbox folder"""
+        return {
+            p.name: folder_signature(p)
+            for p in self.inbox.iterdir()
+            if p.is_dir() and not DirectoryScanner.is_junk_dir(p.name)
+        }
+    
+    def wait(self, timeout: float) -> Set[str]:
+        """
+        Sleep for timeout seconds, then report folders whose signature changed
+        
+        Args:
+            timeout: Seconds between polls
+        
+        Returns:
+            Names of top-level inbox folders that changed
+        """
+        time.sleep(timeout)
+        current = self._snapshot()
+        touched = {name for name, sig in current.items() if self.signatures.get(name) != sig}
+        self.signatures = current
+        return touched
+    
+    def close(self):
+        """Nothing to release"""
+        pass
+
+
+class InboxWatcher:
+    """
+    Long-running watch-folder ingestion
+    
+    Every top-level folder of the inbox is one track. A folder is processed
+    once it has been quiet for settle_seconds and its signature (file count,
+    total size, newest mtime) is unchanged across two checks, so folders that
+    are still being copied are left alone. Settled folders are ingested on
+    their own (only that folder is scanned and paired) and queued for export;
+    a single export thread hands each TrackJob to on_track. Processed folders
+    are remembered with their signature in a state file, so restarting the
+    watcher does not export them again; a folder is reprocessed only if its
+    contents change.
+    """
+    
+    def __init__(
+        self,
+        inbox: str,
+        on_track: Callable[[TrackJob], None],
+        vocal_rights: str = "Exclusive",
+        settle_seconds: float = config.WATCH_SETTLE_SECONDS,
+        poll_interval: float = config.WATCH_POLL_INTERVAL,
+        state_path: Optional[str] = None,
+        use_inotify: bool = True,
+        ingester_options: Optional[dict] = None
+    ):
+        """
+        Initialize the watcher
+        
+        Args:
+            inbox: Inbox directory producers drop track folders into
+            on_track: Export callback, called on the export thread for every settled folder
+            vocal_rights: Vocal rights setting passed to FileIngester
+            settle_seconds: Quiet time before a folder counts as fully copied
+            poll_interval: Event wait / polling interval in seconds
+            state_path: JSON file of processed folders (defaults to config.WATCH_STATE_PATH)
+            use_inotify: Use inotify when available (falls back to polling otherwise)
+            ingester_options: Extra FileIngester keyword arguments (index_path, probe_headers, ...)
+        """
+        self.inbox = Path(os.path.abspath(str(inbox)))
+        self.on_track = on_track
+        self.vocal_rights = vocal_rights
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.state_path = Path(state_path) if state_path is not None else config.WATCH_STATE_PATH
+        self.use_inotify = use_inotify
+        self.ingester_options = ingester_options or {}
+        
+        self.jobs: "queue.Queue[Optional[TrackJob]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._processed: Dict[str, FolderSignature] = self._load_state()
+        self._state_lock = threading.Lock()
+    
+    def _load_state(self) -> Dict[str, FolderSignature]:
+        """Processed folder path -> signature"""
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return {path: tuple(sig) for path, sig in json.load(f).items()}
+        except (OSError, ValueError):
+            print(f"⚠ Ignoring unreadable watch state: {self.state_path}")
+            return {}
+    
+    def _save_state(self):
+        """Write the processed-folder state atomically"""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._processed, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+    
+    def _open_backend(self):
+        """inotify backend when available, polling otherwise"""
+        if self.use_inotify:
+            try:
+                backend = InotifyBackend(self.inbox)
+                print(f"✓ Watching {self.inbox} (inotify)")
+                return backend
+            except (OSError, AttributeError) as e:
+                print(f"ℹ inotify unavailable ({e}); polling every {self.poll_interval:g}s")
+        else:
+            print(f"✓ Watching {self.inbox} (polling every {self.poll_interval:g}s)")
+        return PollingBackend(self.inbox)
+    
+    def stop(self):
+        """Ask run() to return after the current iteration"""
+        self._stop.set()
+    
+    def run(self):
+        """
+        Watch the inbox until stop() is called (or KeyboardInterrupt)
+        
+        Folders already in the inbox at startup that were not processed
+        before are picked up like new ones.
+        """
+        if not self.inbox.is_dir():
+            raise FileNotFoundError(f"Inbox not found: {self.inbox}")
+        
+        backend = self._open_backend()
+        exporter = threading.Thread(target=self._export_loop, name="watch-export", daemon=True)
+        exporter.start()
+        
+        # Folder -> time of last activity; checked folder -> (signature, time first seen)
+        pending: Dict[str, float] = {
+            p.name: 0.0 for p in self.inbox.iterdir()
+            if p.is_dir() and not DirectoryScanner.is_junk_dir(p.name)
+        }
+        settling: Dict[str, Tuple[FolderSignature, float]] = {}
+        
+        try:
+            while not self._stop.is_set():
+                touched = backend.wait(self.poll_interval)
+                now = time.monotonic()
+                for name in touched:
+                    if not DirectoryScanner.is_junk_dir(name):
+                        pending[name] = now
+                        settling.pop(name, None)
+                
+                for name, last_activity in list(pending.items()):
+                    if now - last_activity < self.settle_seconds:
+                        continue
+                    job = self._check_settled(name, now, settling)
+                    if job is None:
+                        continue
+                    del pending[name]
+                    if job is not False:
+                        self.jobs.put(job)
+        except KeyboardInterrupt:
+            print("\nℹ Stopping watcher...")
+        finally:
+            backend.close()
+            self.jobs.put(None)
+            exporter.join()
+    
+    def _check_settled(
+        self,
+        name: str,
+        now: float,
+        settling: Dict[str, Tuple[FolderSignature, float]]
+    ):
+        """
+        Decide whether a quiet folder is complete
+        
+        Returns:
+            None while the folder is still settling, False if there is nothing
+            to do (deleted, unchanged since last export, or empty), or a TrackJob
+        """
+        path = self.inbox / name
+        result = folder_signature(path)
+        if result is None:
+            settling.pop(name, None)
+            return False
+        
+        signature, partial = result
+        previous = settling.get(name)
+        if partial or previous is None or previous[0] != signature:
+            # First look, still copying, or changed since the last check
+            settling[name] = (signature, now)
+            return None
+        if now - previous[1] < self.settle_seconds:
+            return None
+        
+        del settling[name]
+        with self._state_lock:
+            if self._processed.get(str(path)) == signature:
+                return False
+        
+        return self._ingest(name, path, signature)
+    
+    def _ingest(self, name: str, path: Path, signature: FolderSignature):
+        """Scan and pair one settled folder; returns a TrackJob or False if it has no stems"""
+        print(f"\n📥 New track folder: {name}")
+        ingester = FileIngester(str(path), self.vocal_rights, **self.ingester_options)
+        ingester.scan_files()
+        if not ingester.audio_files:
+            print(f"  ℹ No audio files in {name}, skipping")
+            return False
+        
+        pairs = ingester.auto_pair_files()
+        for pair in pairs:
+            pair.track = name
+        return TrackJob(name=name, path=path, pairs=pairs, ingester=ingester, signature=signature)
+    
+    def _export_loop(self):
+        """Export thread: hand queued tracks to on_track one at a time"""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            try:
+                self.on_track(job)
+            except Exception as e:
+                print(f"❌ Export failed for {job.name}: {e}")
+                continue
+            
+            with self._state_lock:
+                self._processed[str(job.path)] = job.signature
+                self._save_state()
+            print(f"✓ Processed track folder: {job.name} ({self.jobs.qsize()} queued)")
+
+
+if __name__ == "__main__":
+    # Print the pairing report of every settled folder (no export)
+    inbox_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    
+    def report(job: TrackJob):
+        print(job.ingester.get_pairing_report())
+    
+    InboxWatcher(inbox_dir, report).run()
@@ -0,0 +1,252 @@
+"""
+Memory-mapped WAV reader
+Maps the data chunk of an uncompressed WAV (RIFF, RF64/BW64, plain or
+WAVE_FORMAT_EXTENSIBLE) as a strided NumPy view, so slicing and previews
+read only the pages they touch, and the OS page cache shares those pages
+between reruns and worker processes. Samples convert to float32 exactly as
+soundfile does.
+"""
+
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+import numpy as np
+import archive_source
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format tag, bits per sample) -> (soundfile subtype, raw dtype)
+_FORMATS = {
+    (WAVE_FORMAT_PCM, 8): ("PCM_U8", np.dtype(np.uint8)),
+    (WAVE_FORMAT_PCM, 16): ("PCM_16", np.dtype('<i2')),
+    (WAVE_FORMAT_PCM, 24): ("PCM_24", np.dtype(np.uint8)),  # 3 bytes per sample, see WavMap.raw
+    (WAVE_FORMAT_PCM, 32): ("PCM_32", np.dtype('<i4')),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): ("FLOAT", np.dtype('<f4')),
+    (WAVE_FORMAT_IEEE_FLOAT, 64): ("DOUBLE", np.dtype('<f8')),
+}
+
+_RF64_SIZE = 0xFFFFFFFF  # 32-bit size fields that defer to the ds64 chunk
+
+
+class WavFormatError(ValueError):
+    """Raised when a file is not an uncompressed WAV this reader can map"""
+
+
+@dataclass
+class WavLayout:
+    """Sample format and data chunk position of a WAV file"""
+    format_tag: int  # WAVE_FORMAT_PCM or WAVE_FORMAT_IEEE_FLOAT (EXTENSIBLE resolved)
+    channels: int
+    sample_rate: int
+    bits: int
+    subtype: str  # soundfile subtype name, e.g. "PCM_16"
+    data_offset: int  # File offset of the first sample byte
+    frames: int  # Whole frames present (truncated files keep what is there)
+    
+    @property
+    def block_align(self) -> int:
+        """Bytes per frame"""
+        return self.channels * self.bits // 8
+    
+    @property
+    def data_bytes(self) -> int:
+        """Size of the sample data in bytes (whole frames only)"""
+        return self.frames * self.block_align
+
+
+class WavMap:
+    """
+    Memory-mapped view of a WAV file's samples
+    
+    raw is the data chunk itself: (frames, channels) of the file's sample
+    type, or (frames, channels, 3) bytes for 24-bit. read() converts a frame
+    range to float32 (the same values sf.read returns); nothing is read from
+    disk until a range is touched.
+    """
+    
+    def __init__(self, path: Union[str, Path]):
+        """
+        Parse the header and map the data chunk
+        
+        Args:
+            path: WAV file on disk (not an archive member)
+        
+        Raises:
+            WavFormatError: Not a WAV, compressed, or an unsupported sample format
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            layout = read_wav_layout(f)
+        
+        self.sample_rate = layout.sample_rate
+        self.channels = layout.channels
+        self.bits = layout.bits
+        self.subtype = layout.subtype
+        self.data_offset = layout.data_offset
+        self.frames = layout.frames
+        block_align = layout.block_align
+        dtype = _FORMATS[(layout.format_tag, layout.bits)][1]
+        
+        # Mapped from one byte early: 24-bit samples are then read as overlapping
+        # int32 words whose low byte belongs to the previous sample (see read)
+        if self.frames == 0:
+            data = np.zeros(1, dtype=np.uint8)
+        else:
+            data = np.memmap(self.path, dtype=np.uint8, mode='r', offset=self.data_offset - 1,
+                             shape=(self.frames * block_align + 1,))
+        if self.bits == 24:
+            self.raw = data[1:].reshape(self.frames, self.channels, 3)
+            self._words = np.ndarray((self.frames, self.channels), dtype='<i4', buffer=data,
+                                     strides=(block_align, 3))
+        else:
+            self.raw = data[1:].view(dtype).reshape(self.frames, self.channels)
+            self._words = None
+    
+    @property
+    def duration(self) -> float:
+        """Length in seconds"""
+        return self.frames / self.sample_rate
+    
+    def read(
+        self,
+        start: int = 0,
+        stop: Optional[int] = None,
+        out: Optional[np.ndarray] = None,
+        always_2d: bool = False
+    ) -> np.ndarray:
+        """
+        Frames [start, stop) as float32 (same values as soundfile)
+        
+        Args:
+            start: First frame (clipped to the file)
+            stop: End frame, exclusive (None = end of file)
+            out: float32 array to fill, (frames,) for mono or (frames, channels)
+            always_2d: Return (frames, 1) for mono instead of (frames,)
+        
+        Returns:
+            float32 samples (out if given)
+        """
+        stop = self.frames if stop is None else stop
+        start = min(max(start, 0), self.frames)
+        stop = min(max(stop, start), self.frames)
+        raw = self.raw[start:stop]
+        
+        if out is None:
+            out = np.empty((stop - start, self.channels), dtype=np.float32)
+        target = out.reshape(stop - start, self.channels)
+        
+        if self.subtype == "PCM_U8":
+            np.subtract(raw, 128, out=target, dtype=np.float32)
+            target *= np.float32(1 / 0x80)
+        elif self.subtype == "PCM_24":
+            # Overlapping word = sample left-aligned in an int32 plus a stray low byte
+            words = np.bitwise_and(self._words[start:stop], -0x100)
+            np.multiply(words, np.float32(1 / 0x80000000), out=target, dtype=np.float32)
+        elif self.subtype == "PCM_16":
+            np.multiply(raw, np.float32(1 / 0x8000), out=target, dtype=np.float32)
+        elif self.subtype == "PCM_32":
+            np.multiply(raw.astype(np.float32), np.float32(1 / 0x80000000), out=target)
+        else:
+            target[...] = raw
+        
+        if self.channels == 1 and not always_2d and out.ndim == 2:
+            return out[:, 0]
+        return out
+    
+    def close(self):
+        """Drop the mapping (arrays returned by read() stay valid)"""
+        self.raw = None
+        self._words = None
+    
+    def __enter__(self) -> "WavMap":
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_wav_layout(f: BinaryIO) -> WavLayout:
+    """
+    Parse a WAV header up to the data chunk
+    
+    Args:
+        f: Seekable binary file (a file on disk or an archive member stream)
+    
+    Returns:
+        WavLayout
+    
+    Raises:
+        WavFormatError: Not a WAV, compressed, or an unsupported sample format
+    """
+    name = Path(str(getattr(f, 'name', 'WAV'))).name
+    file_size = f.seek(0, 2)
+    f.seek(0)
+    riff, _, wave = struct.unpack('<4sI4s', _read_exact(f, 12))
+    if riff not in (b'RIFF', b'RF64', b'BW64') or wave != b'WAVE':
+        raise WavFormatError(f"Not a little-endian WAV file: {name}")
+    
+    fmt = None
+    ds64_data_size = None
+    data_offset = data_size = None
+    
+    while f.tell() + 8 <= file_size:
+        chunk_id, chunk_size = struct.unpack('<4sI', _read_exact(f, 8))
+        body = f.tell()
+        if chunk_id == b'ds64':
+            _, ds64_data_size = struct.unpack('<QQ', _read_exact(f, 16))
+        elif chunk_id == b'fmt ':
+            fmt = _read_exact(f, min(chunk_size, 40))
+        elif chunk_id == b'data':
+            data_offset = body
+            data_size = ds64_data_size if chunk_size == _RF64_SIZE and ds64_data_size else chunk_size
+            break
+        f.seek(body + chunk_size + (chunk_size & 1))  # Chunks are word aligned
+    
+    if fmt is None or data_offset is None:
+        raise WavFormatError(f"Missing fmt or data chunk: {name}")
+    
+    tag, channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        tag = struct.unpack('<H', fmt[24:26])[0]  # First two bytes of the SubFormat GUID
+    if (tag, bits) not in _FORMATS or channels < 1 or block_align != channels * bits // 8:
+        raise WavFormatError(f"Unsupported WAV format (tag {tag:#06x}, {bits} bit): {name}")
+    
+    return WavLayout(
+        format_tag=tag,
+        channels=channels,
+        sample_rate=sample_rate,
+        bits=bits,
+        subtype=_FORMATS[(tag, bits)][0],
+        data_offset=data_offset,
+        # Truncated files (interrupted copies) keep whatever whole frames are present
+        frames=max(min(data_size, file_size - data_offset), 0) // block_align,
+    )
+
+
+def _read_exact(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise WavFormatError("Truncated WAV header")
+    return data
+
+
+def open_wav(path: Union[str, Path]) -> Optional[WavMap]:
+    """
+    Map a WAV file if it can be (else None, so callers fall back to soundfile)
+    
+    Args:
+        path: Audio file path (archive members and other formats return None)
+    
+    Returns:
+        WavMap or None
+    """
+    if archive_source.split_archive_path(path) is not None:
+        return None
+    try:
+        return WavMap(path)
+    except (WavFormatError, OSError, ValueError):
+        return None